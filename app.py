@@ -1,11 +1,13 @@
 
 import streamlit as st
-import pandas as pd
-import random
-from datetime import datetime
-from collections import defaultdict
-import io
-import base64
+import os
+import time
+from datetime import date, datetime, timedelta
+
+# pandas, utils and exports are imported where the results need them, so a
+# cold start only pays for Streamlit and the pure-Python scheduler
+from muniapms_scheduler import Config, HistoryStore, Metrics, TaskScheduler
+from muniapms_scheduler.metrics import PROFILERS
 
 # Page configuration - completely disable sidebar
 st.set_page_config(
@@ -15,252 +17,79 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# CSS for styling and hiding sidebar
-st.markdown("""
-<style>
-    /* Hide sidebar elements */
-    section[data-testid="stSidebar"] {
-        display: none !important;
-    }
-
-    /* Hide sidebar toggle button */
-    button[title="View sidebar"] {
-        display: none !important;
-    }
-
-    /* Ensure main content uses full width */
-    .main .block-container {
-        padding-left: 1rem !important;
-        padding-right: 1rem !important;
-        max-width: none !important;
-        width: 100% !important;
-    }
-
-    /* Main Header */
-    .main-header {
-        background: linear-gradient(90deg, #1f4a7c 0%, #0a1f3c 100%); /* Deep blue gradient */
-        padding: 1.5rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-        color: #f0f2f6; /* Off-white for readability */
-        font-size: 2.2rem;
-        font-weight: bold;
-        box-shadow: 0 6px 12px rgba(0, 0, 0, 0.2);
-    }
-
-    /* Section Headers */
-    .section-header {
-        background-color: #3b7bbf; /* Muted blue */
-        color: white;
-        padding: 0.7rem 1.2rem;
-        border-radius: 5px;
-        margin: 1.5rem 0 1rem 0;
-        font-weight: bold;
-        font-size: 1.2rem;
-        box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
-    }
-
-    /* Info Boxes */
-    .info-box {
-        background-color: #e6f2ff; /* Very light blue */
-        border-left: 5px solid #3b7bbf; /* Muted blue for accent */
-        padding: 1rem 1.2rem;
-        margin: 1rem 0;
-        border-radius: 5px;
-        color: #2c3e50 !important; /* Darker text for contrast */
-        font-weight: 500;
-        line-height: 1.5;
-    }
-
-    /* Buttons */
-    .stButton > button {
-        background: linear-gradient(90deg, #3b7bbf 0%, #1f4a7c 100%); /* Muted blue to deep blue gradient */
-        color: white !important;
-        border: none;
-        border-radius: 5px;
-        padding: 0.6rem 1.5rem;
-        font-weight: bold;
-        font-size: 1rem;
-        transition: all 0.3s ease;
-        box-shadow: 0 4px 8px rgba(0, 0, 0, 0.1);
-    }
-    .stButton > button:hover {
-        background: linear-gradient(90deg, #1f4a7c 0%, #3b7bbf 100%); /* Reverse on hover */
-        box-shadow: 0 6px 12px rgba(0, 0, 0, 0.2);
-        transform: translateY(-2px);
-    }
-
-    /* Specific styling for team member names */
-    .team-member-name {
-        color: #ffffff; /* White text */
-        background-color: #4a7d9b; /* A more subdued, professional blue */
-        padding: 10px 15px;
-        border-radius: 7px;
-        font-weight: 700; /* Slightly bolder */
-        font-size: 1.1rem; /* Slightly larger */
-        text-shadow: 1px 1px 3px rgba(0, 0, 0, 0.5); /* Subtle text shadow */
-        border: 1px solid #3a6b84; /* Slightly darker border for depth */
-        margin: 8px 0;
-        display: block;
-        box-shadow: 0 2px 5px rgba(0, 0, 0, 0.1);
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Configuration class
-class Config:
-    PEOPLE = ["Grace", "Bouj", "Zi", "Dapper", "Max", "Mark"]
-
-    TASKS = [
-        "Opti (Urgent and Standard)",
-        "Sizing",
-        "1st & 2nd File, 2nd round raises",
-        "Algo sales, Review 2nd round raises",
-        "Review AM Raises, 3rd file"
-    ]
-
-    TASK_WEIGHTS = {
-        "Opti (Urgent and Standard)": 3,
-        "Sizing": 2,
-        "1st & 2nd File, 2nd round raises": 3,
-        "Algo sales, Review 2nd round raises": 2,
-        "Review AM Raises, 3rd file": 2
+# Styles live in static/style.css, served by Streamlit's static file server
+# (.streamlit/config.toml) so the browser fetches and caches them once instead
+# of receiving the whole stylesheet again on every rerun
+st.markdown('<link rel="stylesheet" href="app/static/style.css">', unsafe_allow_html=True)
+
+def day_label(day):
+    """Display name for a day key: weekday name for codes, the date itself otherwise"""
+    if day in Config.WEEKDAYS:
+        return Config.WEEKDAY_DISPLAY[Config.WEEKDAYS.index(day)]
+    return day
+
+@st.cache_resource
+def get_scheduler(engine, constrained_first=False):
+    """One shared scheduler per engine and slot order; each run takes its seed per call"""
+    return TaskScheduler(engine=engine, constrained_first=constrained_first)
+
+@st.cache_resource
+def get_history():
+    """Schedule history shared by every session (MUNIAPMS_HISTORY overrides the file)"""
+    return HistoryStore(os.environ.get("MUNIAPMS_HISTORY", "muniapms_history.sqlite3"))
+
+@st.cache_resource
+def get_scenario_runner(engine, constrained_first=False):
+    """Scenario results shared by every session, one runner per scheduler"""
+    from scenarios import ScenarioRunner
+    return ScenarioRunner(get_scheduler(engine, constrained_first))
+
+def get_metrics():
+    """This session's Metrics when the page is opened with ?diagnostics=1, otherwise None"""
+    if st.query_params.get("diagnostics") != "1":
+        return None
+    if "metrics" not in st.session_state:
+        st.session_state.metrics = Metrics()
+    return st.session_state.metrics
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _schedule_views(fingerprint, _schedule, _metrics=None):
+    """Memoized DataFrame views, keyed on the schedule fingerprint only"""
+    from utils import build_schedule_views
+    return build_schedule_views(_schedule, Config.PEOPLE, day_label, _metrics)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def _schedule_stats(fingerprint, _schedule):
+    """Memoized workload statistics, keyed on the schedule fingerprint only"""
+    from utils import calculate_workload_statistics
+    stats = calculate_workload_statistics(_schedule)
+    return {
+        'person_task_counts': dict(stats['person_task_counts']),
+        'task_distribution': dict(stats['task_distribution'])
     }
 
-    NO_SIZING = ["Zi", "Mark"]
-
-    DAY_MAPPING = {
-        'monday': 'mon', 'mon': 'mon', 'm': 'mon',
-        'tuesday': 'tue', 'tue': 'tue', 'tu': 'tue', 't': 'tue',
-        'wednesday': 'wed', 'wed': 'wed', 'w': 'wed',
-        'thursday': 'thu', 'thu': 'thu', 'th': 'thu', 'r': 'thu',
-        'friday': 'fri', 'fri': 'fri', 'f': 'fri'
-    }
-
-    WEEKDAYS = ["mon", "tue", "wed", "thu", "fri"]
-    WEEKDAY_DISPLAY = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-
-# Task Scheduler class
-class TaskScheduler:
-    def __init__(self):
-        self.people = Config.PEOPLE
-        self.tasks = Config.TASKS
-        self.task_weights = Config.TASK_WEIGHTS
-        self.no_sizing = Config.NO_SIZING
-        self.weekdays = Config.WEEKDAYS
-        self.weekday_display = Config.WEEKDAY_DISPLAY
-
-    def is_valid_assignment(self, person, task, day, availability):
-        """Check if a person can be assigned a task on a given day"""
-        if day in availability.get(person, []):
-            return False
-        if task == "Sizing" and person in self.no_sizing:
-            return False
-        return True
-
-    def generate_schedule(self, availability, holidays):
-        """Generate the task schedule based on availability and holidays"""
-        schedule = {}
-        person_tasks = defaultdict(lambda: defaultdict(list))
-        person_task_count = defaultdict(lambda: defaultdict(int))
-        daily_task_count = defaultdict(lambda: defaultdict(int))
-
-        for day in self.weekdays:
-            schedule[day] = {}
-
-            if day in holidays:
-                for task in self.tasks:
-                    schedule[day][task] = "🏝️ Holiday"
-                continue
-
-            for task in self.tasks:
-                eligible_people = [
-                    person for person in self.people
-                    if self.is_valid_assignment(person, task, day, availability)
-                ]
-
-                if not eligible_people:
-                    schedule[day][task] = "❌ No one available"
-                    continue
-
-                # Priority 1: People with 0 tasks today
-                zero_task_people = [p for p in eligible_people if daily_task_count[day][p] == 0]
-
-                if zero_task_people:
-                    # Among zero-task people, prefer those who haven't done this task
-                    never_done_task = [p for p in zero_task_people if person_task_count[p][task] == 0]
-                    if never_done_task:
-                        chosen = random.choice(never_done_task)
-                    else:
-                        chosen = random.choice(zero_task_people)
-                else:
-                    # Priority 2: People who haven't done this task
-                    never_done_task = [p for p in eligible_people if person_task_count[p][task] == 0]
-                    if never_done_task:
-                        chosen = random.choice(never_done_task)
-                    else:
-                        # Priority 3: Least loaded person
-                        min_tasks = min(daily_task_count[day][p] for p in eligible_people)
-                        least_loaded = [p for p in eligible_people if daily_task_count[day][p] == min_tasks]
-                        chosen = random.choice(least_loaded)
-
-                schedule[day][task] = chosen
-                person_tasks[chosen][day].append(task)
-                person_task_count[chosen][task] += 1
-                daily_task_count[day][chosen] += 1
-
-        return schedule, person_tasks
+@st.cache_data(show_spinner=False, max_entries=8)
+def _schedule_bundle(fingerprint, _schedule, week_start):
+    """Memoized zip of every export view, keyed on the schedule fingerprint"""
+    import io
+    from exports import write_bundle
+    buffer = io.BytesIO()
+    write_bundle(_schedule, buffer, Config.PEOPLE, week_start)
+    return buffer.getvalue()
 
 def create_schedule_dataframes(schedule):
     """Create DataFrames for display"""
-    # Task-by-day view
-    task_df = pd.DataFrame(schedule).T
-    task_df.index.name = "Day"
-
-    # Person-by-day view
-    person_schedule = defaultdict(dict)
-    for day, tasks in schedule.items():
-        for task, person in tasks.items():
-            if person not in ["🏝️ Holiday", "❌ No one available"]:
-                if person not in person_schedule:
-                    person_schedule[person] = {d: [] for d in Config.WEEKDAY_DISPLAY}
-                day_display = Config.WEEKDAY_DISPLAY[Config.WEEKDAYS.index(day)]
-                person_schedule[person][day_display].append(task)
-
-    # Convert to DataFrame
-    person_data = {}
-    for person in Config.PEOPLE:
-        person_data[person] = {}
-        for day_display in Config.WEEKDAY_DISPLAY:
-            day = Config.WEEKDAYS[Config.WEEKDAY_DISPLAY.index(day_display)]
-            if day in schedule and any(schedule[day][task] == person for task in Config.TASKS):
-                tasks = [task for task, assigned_person in schedule[day].items() if assigned_person == person]
-                person_data[person][day_display] = "; ".join(tasks) if tasks else "😎"
-            else:
-                person_data[person][day_display] = "😎"
+    from utils import schedule_fingerprint
+    return _schedule_views(schedule_fingerprint(schedule), schedule)
 
-    person_df = pd.DataFrame(person_data).T
-    person_df.index.name = "Person"
+def render_timing(label, started):
+    """Show how long the current (full or fragment) rerun took"""
+    st.caption(f"⏱️ {label} rendered in {(time.perf_counter() - started) * 1000:.1f} ms")
 
-    return task_df, person_df
-
-def main():
-    # Header
-    st.markdown('<div class="main-header">📅 MuniAPMs Task Scheduler</div>', unsafe_allow_html=True)
-
-    # Brief instructions
-    st.markdown('<div class="info-box"><strong>Quick Start:</strong> Set team availability → Mark holidays → Generate schedule → Download CSV files. Note: Zi and Mark cannot do Sizing tasks.</div>', unsafe_allow_html=True)
-
-    # Initialize session state
-    if 'availability' not in st.session_state:
-        st.session_state.availability = {}
-    if 'holidays' not in st.session_state:
-        st.session_state.holidays = []
-    if 'schedule_generated' not in st.session_state:
-        st.session_state.schedule_generated = False
-
-    # Main content
+@st.fragment
+def availability_panel():
+    """Availability and holiday pickers; edits rerun only this fragment"""
+    started = time.perf_counter()
     col1, col2 = st.columns([1, 1])
 
     with col1:
@@ -268,6 +97,22 @@ def main():
 
         st.markdown('<div class="info-box">Select the days when each team member is <strong>unavailable</strong> (days off, vacation, etc.)</div>', unsafe_allow_html=True)
 
+        with st.expander("📂 Bulk import"):
+            upload = st.file_uploader(
+                "CSV, Excel or JSON file",
+                type=["csv", "tsv", "txt", "xlsx", "xls", "json"],
+                key="import_file",
+                help="One row per person (name, then days), person/day or person/start/end columns, or a JSON object of person -> days"
+            )
+            pasted = st.text_area(
+                "Or paste one person per line",
+                placeholder="Max: m, th\nZi: tu-th\nGrace: 2024-07-01..2024-07-05",
+                key="import_text"
+            )
+            if st.button("Import availability", key="import_button", disabled=upload is None and not pasted.strip()):
+                import_availability_input(upload, pasted)
+
+        imported = st.session_state.get("imported_dates", {})
         availability = {}
         for person in Config.PEOPLE:
             # Applying the new CSS class for team member names
@@ -280,6 +125,9 @@ def main():
             )
             # Convert to internal format
             availability[person] = [Config.WEEKDAYS[Config.WEEKDAY_DISPLAY.index(day)] for day in unavailable_days]
+            if imported.get(person):
+                st.caption(f"📅 Also unavailable on {len(imported[person])} imported dates")
+                availability[person] += imported[person]
 
         st.session_state.availability = availability
 
@@ -296,86 +144,395 @@ def main():
         # Convert to internal format
         st.session_state.holidays = [Config.WEEKDAYS[Config.WEEKDAY_DISPLAY.index(day)] for day in holidays]
 
-    # Generate schedule button
-    st.markdown("---")
-    col1, col2, col3 = st.columns([1, 2, 1])
-    with col2:
-        if st.button("🚀 Generate Weekly Schedule", use_container_width=True):
-            scheduler = TaskScheduler()
-            schedule, person_tasks = scheduler.generate_schedule(
+    render_timing("Availability", started)
+
+def import_availability_input(upload, pasted):
+    """Parse a bulk import into the pickers; imported dates are kept alongside them"""
+    from imports import import_availability, parse_availability_text
+    try:
+        if upload is not None:
+            result = import_availability(upload, people=Config.PEOPLE)
+        else:
+            result = parse_availability_text(pasted, people=Config.PEOPLE)
+    except (ImportError, ValueError, UnicodeDecodeError) as error:
+        st.error(f"Could not read the import: {error}")
+        return
+    if not result.is_valid:
+        shown = "\n".join(f"- {error}" for error in result.errors[:20])
+        more = f"\n- ...and {len(result.errors) - 20} more" if len(result.errors) > 20 else ""
+        st.error(f"Nothing imported, {len(result.errors)} problems found:\n{shown}{more}")
+        return
+    for person in Config.PEOPLE:
+        days = result.availability[person]
+        st.session_state[f"availability_{person}"] = [day_label(day) for day in days if day in Config.WEEKDAYS]
+    st.session_state.imported_dates = {
+        person: [day for day in days if day not in Config.WEEKDAYS]
+        for person, days in result.availability.items()
+    }
+    st.success(f"✅ Imported {result.tokens} unavailable days for {len(result.availability)} people in {result.elapsed * 1000:.0f} ms")
+    if result.has_dates:
+        st.info("Imported dates apply to the weeks being planned, starting from the first week below")
+
+def generate_form():
+    """Generation settings; nothing reruns until the form is submitted"""
+    with st.form("generate_form", border=False):
+        seed_text = st.text_input(
+            "Seed (optional)",
+            key="seed_input",
+            help="Leave blank for a new random schedule, or enter a previous seed to reproduce it"
+        )
+        weeks = st.number_input(
+            "Weeks to plan",
+            min_value=1,
+            max_value=52,
+            value=1,
+            key="weeks_input",
+            help="Unavailable days and holidays above repeat every week"
+        )
+        today = date.today()
+        start = st.date_input(
+            "First week starting",
+            value=today + timedelta(days=-today.weekday() % 7),
+            key="start_input",
+            help="The week being planned; dates the schedule in history and calendar exports"
+        )
+        use_history = st.checkbox(
+            "Balance against the last 4 weeks",
+            value=True,
+            key="history_input",
+            help="Among people equally due a task, prefers those with the fewest tasks in the last 4 weeks, then the fewest turns at that task. A seed only reproduces a schedule with the same history."
+        )
+        engine = st.radio(
+            "Scheduling engine",
+            TaskScheduler.ENGINES,
+            format_func=lambda name: {"greedy": "Greedy (fast)", "optimal": "Optimal (min-cost flow)"}[name],
+            horizontal=True,
+            key="engine_input"
+        )
+        constrained_first = st.checkbox(
+            "Fill the hardest tasks first",
+            value=False,
+            key="constrained_input",
+            help="Greedy engine: fills each day's tasks with the fewest eligible people first and keeps them free for those tasks. Seeds from the default order give different schedules."
+        )
+        polish_ms = st.number_input(
+            "Polish for up to (ms)",
+            min_value=0,
+            max_value=5000,
+            value=0,
+            step=100,
+            key="polish_input",
+            help="Local search after generating: moves and swaps tasks to even out weighted load and repeats (try 200). A seed reproduces a polished schedule only if polishing finished within the time."
+        )
+        submitted = st.form_submit_button("🚀 Generate Weekly Schedule", use_container_width=True)
+
+    if submitted:
+        try:
+            seed = int(seed_text) if seed_text.strip() else None
+        except ValueError:
+            st.error(f"Seed must be a whole number, got '{seed_text}'")
+            return
+        scheduler = get_scheduler(engine, constrained_first)
+        history = get_history()
+        week_start = start - timedelta(days=start.weekday())
+        # Imported dates only match days of a dated horizon, even for one week
+        dated = any(
+            day not in Config.WEEKDAYS for days in st.session_state.availability.values() for day in days
+        )
+        horizon = weeks > 1 or dated
+        if horizon:
+            shortfalls = scheduler.check_feasibility(
+                st.session_state.availability, st.session_state.holidays, start=start, weeks=weeks
+            )
+        else:
+            shortfalls = scheduler.check_feasibility(
+                st.session_state.availability, st.session_state.holidays
+            )
+        for day, columns in shortfalls.items():
+            st.warning(f"⚠️ {day_label(day)}: not enough eligible people to cover {', '.join(columns)}")
+        first_day = start if horizon else week_start
+        state = history.window_state(first_day) if use_history else None
+        metrics = get_metrics()
+        if horizon:
+            schedule, person_tasks, seed, _ = scheduler.generate_horizon(
                 st.session_state.availability,
-                st.session_state.holidays
+                st.session_state.holidays,
+                start=start,
+                weeks=weeks,
+                state=state,
+                seed=seed,
+                metrics=metrics
             )
-            st.session_state.schedule = schedule
-            st.session_state.person_tasks = person_tasks
-            st.session_state.schedule_generated = True
-            st.success("✅ Schedule generated successfully!")
-
-    # Display schedule if generated
-    if st.session_state.schedule_generated and 'schedule' in st.session_state:
-        st.markdown("---")
-        st.markdown('<div class="section-header">📊 Generated Schedule</div>', unsafe_allow_html=True)
-
-        # Create DataFrames
-        task_df, person_df = create_schedule_dataframes(st.session_state.schedule)
-
-        # Display tabs for different views
-        tab1, tab2, tab3 = st.tabs(["📋 Task Assignment View", "👤 Individual View", "📈 Statistics"])
-
-        with tab1:
-            st.markdown("**Task-by-Day Schedule** - Shows who is assigned to each task each day")
-            st.dataframe(task_df, use_container_width=True)
-
-            # Download button
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            csv_task = task_df.to_csv()
-            st.download_button(
-                label="📥 Download Task Schedule CSV",
-                data=csv_task,
-                file_name=f"MuniAPMs_Task_Schedule_{timestamp}.csv",
-                mime="text/csv"
+        else:
+            schedule, person_tasks, seed = scheduler.generate_schedule(
+                st.session_state.availability,
+                st.session_state.holidays,
+                seed=seed,
+                state=state,
+                metrics=metrics
             )
-
-        with tab2:
-            st.markdown("**Person-by-Day Schedule** - Shows what each person is doing each day")
-            st.dataframe(person_df, use_container_width=True)
-
-            # Download button
-            csv_person = person_df.to_csv()
-            st.download_button(
-                label="📥 Download Individual Schedule CSV",
-                data=csv_person,
-                file_name=f"MuniAPMs_Individual_Schedule_{timestamp}.csv",
-                mime="text/csv"
+        report = None
+        if polish_ms:
+            schedule, person_tasks, report = scheduler.improve_schedule(
+                schedule,
+                st.session_state.availability,
+                budget=polish_ms / 1000,
+                seed=seed,
+                state=state
+            )
+        history.save_schedule(schedule, week_start=week_start, seed=seed)
+        st.session_state.week_start = week_start
+        st.session_state.schedule = schedule
+        st.session_state.person_tasks = person_tasks
+        st.session_state.schedule_seed = seed
+        st.session_state.schedule_generated = True
+        st.success(f"✅ Schedule generated successfully! (seed {seed})")
+        if report is not None:
+            st.caption(
+                f"✨ Polishing improved the fairness score by {report.relative:.0%} "
+                f"({report.before:.2f} → {report.after:.2f}) with {report.moves} moves and "
+                f"{report.swaps} swaps in {report.elapsed * 1000:.0f} ms"
             )
 
-        with tab3:
-            st.markdown("**Workload Distribution Statistics**")
+@st.fragment
+def schedule_results():
+    """Schedule views, downloads and statistics; reruns only this fragment"""
+    from utils import schedule_fingerprint
+    started = time.perf_counter()
+    schedule = st.session_state.schedule
+    fingerprint = schedule_fingerprint(schedule)
+
+    st.markdown("---")
+    st.markdown('<div class="section-header">📊 Generated Schedule</div>', unsafe_allow_html=True)
+
+    metrics = get_metrics()
+
+    # Create DataFrames
+    task_df, person_df = _schedule_views(fingerprint, schedule, metrics)
+
+    # Display tabs for different views; diagnostics only with ?diagnostics=1
+    labels = ["📋 Task Assignment View", "👤 Individual View", "📈 Statistics"]
+    if metrics is not None:
+        labels.append("🩺 Diagnostics")
+    tab1, tab2, tab3, *diagnostics = st.tabs(labels)
+
+    with tab1:
+        st.markdown("**Task-by-Day Schedule** - Shows who is assigned to each task each day")
+        st.dataframe(task_df, use_container_width=True)
+
+        # Download button
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        csv_task = task_df.to_csv()
+        st.download_button(
+            label="📥 Download Task Schedule CSV",
+            data=csv_task,
+            file_name=f"MuniAPMs_Task_Schedule_{timestamp}.csv",
+            mime="text/csv"
+        )
+
+    with tab2:
+        st.markdown("**Person-by-Day Schedule** - Shows what each person is doing each day")
+        st.dataframe(person_df, use_container_width=True)
+
+        # Download button
+        csv_person = person_df.to_csv()
+        st.download_button(
+            label="📥 Download Individual Schedule CSV",
+            data=csv_person,
+            file_name=f"MuniAPMs_Individual_Schedule_{timestamp}.csv",
+            mime="text/csv"
+        )
+
+    with tab3:
+        st.markdown("**Workload Distribution Statistics**")
+
+        # Calculate statistics
+        stats = _schedule_stats(fingerprint, schedule)
+        task_counts = stats['task_distribution']
+        person_task_counts = stats['person_task_counts']
+
+        # Display metrics
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("**Tasks per Person**")
+            for person in Config.PEOPLE:
+                count = person_task_counts.get(person, 0)
+                st.metric(person, count)
+
+        with col2:
+            st.markdown("**Task Distribution**")
+            for task in Config.TASKS:
+                count = task_counts.get(task, 0)
+                st.metric(task.split()[0], count)  # Shortened task name
+
+    if diagnostics:
+        with diagnostics[0]:
+            diagnostics_panel(metrics)
+
+    st.download_button(
+        label="📦 Download All Views (.zip)",
+        data=_schedule_bundle(fingerprint, schedule, st.session_state.week_start),
+        file_name=f"MuniAPMs_Schedule_Bundle_{timestamp}.zip",
+        mime="application/zip",
+        help="Task, individual and assignment CSVs, Parquet when available, and a calendar (.ics) per person"
+    )
+
+    render_timing("Schedule", started)
+
+@st.fragment
+def scenario_panel():
+    """What-if variants of the current availability, compared side by side"""
+    import pandas as pd
+    from muniapms_scheduler import derive_seed
+    from scenarios import Scenario, comparison_table
+    from utils import schedule_fingerprint
+    started = time.perf_counter()
+
+    st.markdown('<div class="info-box">Try changes to the availability and holidays above without touching them. Every scenario is planned for one week with the same seed, so the differences come from the changes alone.</div>', unsafe_allow_html=True)
+
+    count = st.number_input("Scenarios", min_value=1, max_value=6, value=2, key="scenario_count")
+    options = [(person, day) for person in Config.PEOPLE for day in Config.WEEKDAYS]
+
+    def person_day(option):
+        return f"{option[0]} – {day_label(option[1])}"
+
+    def by_person(picked):
+        days = {}
+        for person, day in picked:
+            days.setdefault(person, []).append(day)
+        return days
+
+    scenarios = []
+    for i, column in enumerate(st.columns(count)):
+        with column:
+            name = st.text_input("Name", value=f"Scenario {i + 1}", key=f"scenario_name_{i}")
+            off = st.multiselect("Also unavailable", options, format_func=person_day, key=f"scenario_off_{i}")
+            back = st.multiselect("Available after all", options, format_func=person_day, key=f"scenario_back_{i}")
+            extra = st.multiselect("Extra holidays", Config.WEEKDAYS, format_func=day_label, key=f"scenario_holidays_{i}")
+            lifted = st.multiselect("Holidays worked", Config.WEEKDAYS, format_func=day_label, key=f"scenario_workdays_{i}")
+            scenarios.append(Scenario(name, by_person(off), by_person(back), extra, lifted))
+
+    # Reuse the last schedule's seed so the current plan matches it (without history)
+    if "scenario_seed" not in st.session_state:
+        st.session_state.scenario_seed = st.session_state.get("schedule_seed") or derive_seed(None)
+    runner = get_scenario_runner(
+        st.session_state.get("engine_input", "greedy"), st.session_state.get("constrained_input", False)
+    )
+    results = runner.run(
+        st.session_state.availability, st.session_state.holidays, scenarios,
+        seed=st.session_state.scenario_seed
+    )
+
+    st.markdown("**Side-by-side statistics**")
+    st.dataframe(pd.DataFrame(comparison_table(results, Config.PEOPLE)), use_container_width=True)
+
+    st.markdown("**Conflicts**")
+    for result, column in zip(results, st.columns(len(results))):
+        with column:
+            st.markdown(f"**{result.name}**")
+            for conflict in result.conflicts:
+                st.caption(f"⚠️ {conflict}")
+            if not result.conflicts:
+                st.caption("✅ No conflicts")
+
+    shown = st.radio(
+        "Show schedule for",
+        range(len(results)),
+        format_func=lambda i: results[i].name,
+        horizontal=True,
+        key="scenario_view"
+    )
+    schedule = results[shown].schedule
+    task_df, _ = _schedule_views(schedule_fingerprint(schedule), schedule)
+    st.dataframe(task_df, use_container_width=True)
+
+    fresh = sum(not result.cached for result in results)
+    st.caption(f"🔀 Seed {st.session_state.scenario_seed}; {fresh} of {len(results)} scenarios scheduled this run, the rest from cache")
+    render_timing("Scenarios", started)
+
+def diagnostics_panel(metrics):
+    """Tier counters, phase timers, metric exports and the profiler switch"""
+    import pandas as pd
+    st.markdown("**Scheduling Diagnostics** - Totals for every run in this session")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Priority tier picks**")
+        for tier, count in metrics.tiers.items():
+            st.metric(tier.replace("_", " ").capitalize(), count)
+    with col2:
+        st.markdown("**Slots**")
+        for name, count in metrics.counters.items():
+            st.metric(name.replace("_", " ").capitalize(), count)
+
+    st.markdown("**Phase timers**")
+    st.dataframe(
+        pd.DataFrame(
+            [(name, calls, seconds * 1000) for name, (calls, seconds) in metrics.phases.items()],
+            columns=["Phase", "Calls", "Total (ms)"]
+        ),
+        use_container_width=True,
+        hide_index=True
+    )
+
+    st.code(metrics.to_prometheus(), language="text")
+    st.download_button(
+        label="📥 Download Metrics (JSON lines)",
+        data=metrics.to_json_lines(),
+        file_name="MuniAPMs_Metrics.jsonl",
+        mime="application/x-ndjson"
+    )
 
-            # Calculate statistics
-            task_counts = defaultdict(int)
-            person_task_counts = defaultdict(int)
+    profiler = st.selectbox(
+        "Profiler",
+        (None,) + PROFILERS,
+        index=((None,) + PROFILERS).index(metrics.profiler),
+        format_func=lambda name: name or "Off",
+        key="profiler_input",
+        help="Profiles the next generated schedules; switching resets the session's metrics"
+    )
+    if profiler != metrics.profiler:
+        st.session_state.metrics = Metrics(profiler)
+        st.rerun()
+    report = metrics.profile_report()
+    if report:
+        st.code(report, language="text")
 
-            for day, tasks in st.session_state.schedule.items():
-                for task, person in tasks.items():
-                    if person not in ["🏝️ Holiday", "❌ No one available"]:
-                        task_counts[task] += 1
-                        person_task_counts[person] += 1
+def main():
+    started = time.perf_counter()
 
-            # Display metrics
-            col1, col2 = st.columns(2)
+    # Header
+    st.markdown('<div class="main-header">📅 MuniAPMs Task Scheduler</div>', unsafe_allow_html=True)
 
-            with col1:
-                st.markdown("**Tasks per Person**")
-                for person in Config.PEOPLE:
-                    count = person_task_counts[person]
-                    st.metric(person, count)
+    # Brief instructions
+    st.markdown('<div class="info-box"><strong>Quick Start:</strong> Set team availability → Mark holidays → Generate schedule → Download CSV files. Note: Zi and Mark cannot do Sizing tasks.</div>', unsafe_allow_html=True)
 
-            with col2:
-                st.markdown("**Task Distribution**")
-                for task in Config.TASKS:
-                    count = task_counts[task]
-                    st.metric(task.split()[0], count)  # Shortened task name
+    # Initialize session state
+    if 'availability' not in st.session_state:
+        st.session_state.availability = {}
+    if 'holidays' not in st.session_state:
+        st.session_state.holidays = []
+    if 'schedule_generated' not in st.session_state:
+        st.session_state.schedule_generated = False
+
+    # Main content
+    availability_panel()
+
+    # Generate schedule button
+    st.markdown("---")
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col2:
+        generate_form()
+
+    # Display schedule if generated
+    if st.session_state.schedule_generated and 'schedule' in st.session_state:
+        schedule_results()
+
+    # What-if scenarios; nothing is imported or scheduled for them until switched on
+    st.markdown("---")
+    if st.toggle("🔀 Compare what-if scenarios", key="scenarios_toggle"):
+        scenario_panel()
 
     # Footer
     st.markdown("---")
@@ -383,6 +540,7 @@ def main():
         '<div style="text-align: center; color: #666; padding: 1rem;">For the Shareholders</div>',
         unsafe_allow_html=True
     )
+    render_timing("Page", started)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
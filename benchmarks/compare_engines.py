@@ -0,0 +1,69 @@
+"""
+Compare the greedy and optimal scheduling engines
+
+Builds a synthetic roster, runs both engines on the same inputs and reports
+run time and weighted-load spread (max - min and standard deviation of each
+person's summed TASK_WEIGHTS).
+
+    python benchmarks/compare_engines.py --people 500 --tasks 50 --days 20
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muniapms_scheduler import Config, TaskScheduler  # noqa: E402
+from synthetic import synthetic_availability, synthetic_days, synthetic_roster  # noqa: E402
+from utils import calculate_workload_statistics  # noqa: E402
+
+
+def synthetic_inputs(people, tasks, days, unavailable, seed):
+    """Roster, day keys and availability for a synthetic team"""
+    roster = synthetic_roster(people, tasks, seed)
+    day_keys = synthetic_days(days)
+    return roster, day_keys, synthetic_availability(roster.people, day_keys, unavailable, seed)
+
+
+def run_engine(engine, inputs, seed):
+    roster, days, availability = inputs
+    scheduler = TaskScheduler(seed=seed, engine=engine, roster=roster)
+
+    start = time.perf_counter()
+    schedule, _, _, _ = scheduler.generate_horizon(availability, [], start=days[0], end=days[-1])
+    elapsed = time.perf_counter() - start
+
+    stats = calculate_workload_statistics(schedule, roster.task_weights)
+    loads = [stats['weighted_loads'][person] for person in roster.people]
+    return {
+        'seconds': elapsed,
+        'spread': max(loads) - min(loads),
+        'stdev': statistics.pstdev(loads),
+        'unassigned': stats['unassigned_tasks'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--people", type=int, default=len(Config.PEOPLE))
+    parser.add_argument("--tasks", type=int, default=len(Config.TASKS))
+    parser.add_argument("--days", type=int, default=len(Config.WEEKDAYS))
+    parser.add_argument("--unavailable", type=float, default=0.1,
+                        help="Probability a person is off on a given day")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    inputs = synthetic_inputs(args.people, args.tasks, args.days, args.unavailable, args.seed)
+    print(f"{args.people} people x {args.tasks} tasks x {args.days} days")
+    print(f"{'engine':<10}{'time (ms)':>12}{'spread':>10}{'stdev':>10}{'unassigned':>12}")
+    for engine in TaskScheduler.ENGINES:
+        result = run_engine(engine, inputs, args.seed)
+        print(f"{engine:<10}{result['seconds'] * 1000:>12.1f}{result['spread']:>10}"
+              f"{result['stdev']:>10.2f}{result['unassigned']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Load generator for the multi-team scheduling service
+
+Starts muniapms_scheduler.service in-process (or targets --host/--port of a
+running one), sends batched /schedule requests over keep-alive connections
+and reports p50/p99 latency and requests per second. --distinct controls how
+many different team inputs are cycled through, so the cache hit rate can be
+dialled from cold (every team unique) to hot (a handful of repeats).
+
+    python benchmarks/load_service.py --requests 500 --teams 40 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muniapms_scheduler import Config  # noqa: E402
+from muniapms_scheduler.service import SchedulingService, percentile, start_server  # noqa: E402
+
+
+def team_inputs(distinct, seed):
+    """Distinct team requests with random availability and holidays"""
+    rng = random.Random(seed)
+    teams = []
+    for i in range(distinct):
+        teams.append({
+            "team": f"team-{i:04d}",
+            "availability": {
+                person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in Config.PEOPLE
+            },
+            "holidays": rng.sample(Config.WEEKDAYS, rng.randint(0, 1)),
+            "seed": i,
+        })
+    return teams
+
+
+async def _post(reader, writer, host, body):
+    writer.write(
+        f"POST /schedule HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(host, port, bodies, latencies, failures):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while bodies:
+            body = bodies.pop()
+            started = time.perf_counter()
+            status = await _post(reader, writer, host, body)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                failures.append(status)
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load(host, port, requests, teams, concurrency, distinct, seed):
+    inputs = team_inputs(distinct, seed)
+    rng = random.Random(seed)
+    bodies = [
+        json.dumps({"teams": [rng.choice(inputs) for _ in range(teams)]}).encode("utf-8")
+        for _ in range(requests)
+    ]
+    latencies, failures = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, bodies, latencies, failures) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "teams_per_request": teams,
+        "failures": len(failures),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed,
+        "teams_per_second": len(latencies) * teams / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def _main(args):
+    service = server = None
+    host, port = args.host, args.port
+    if port is None:
+        service = SchedulingService(workers=args.workers)
+        server = await start_server(service, host, 0)
+        port = server.sockets[0].getsockname()[1]
+    try:
+        result = await run_load(host, port, args.requests, args.teams, args.concurrency,
+                                args.distinct, args.seed)
+        if service is not None:
+            result["server"] = service.stats()
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+            service.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Target a running service instead of starting one")
+    parser.add_argument("--workers", type=int, help="Worker processes for the in-process service")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--teams", type=int, default=40, help="Teams per request")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--distinct", type=int, default=200,
+                        help="Distinct team inputs to draw from (lower means more cache hits)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="Print the full result as JSON")
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(_main(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    print(f"{result['requests']} requests x {result['teams_per_request']} teams "
+          f"in {result['seconds']:.2f} s ({result['failures']} failed)")
+    print(f"{result['rps']:.1f} requests/s, {result['teams_per_second']:.0f} teams/s")
+    print(f"p50 {result['p50_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms")
+    if "server" in result:
+        server = result["server"]
+        print(f"server: {server['solved']} solved, {server['cache_hits']} cache hits, "
+              f"{server['deduplicated']} deduplicated in flight")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+"""
+Benchmark the scheduling pipeline and check for regressions
+
+Times each stage the app runs for a schedule, on synthetic teams of
+increasing size:
+
+    generate        TaskScheduler.generate_schedule (generate_horizon past a week)
+    dataframes      utils.build_schedule_views, behind app.create_schedule_dataframes
+    statistics      utils.calculate_workload_statistics
+    export          utils.format_schedule_for_export, both views, to CSV text
+
+Each stage reports the fastest wall time of --repeat runs and the peak
+traced memory of one extra run under tracemalloc. Results are written as
+JSON; with --baseline, any stage slower (or hungrier) than the baseline by
+more than the threshold fails the run with exit status 1.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json --threshold 0.25
+    python benchmarks/run_benchmarks.py --people 200 --tasks 20 --days 60 --unavailable 0.3
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muniapms_scheduler import Config, TaskScheduler  # noqa: E402
+from synthetic import synthetic_availability, synthetic_days, synthetic_roster  # noqa: E402
+from utils import (  # noqa: E402
+    build_schedule_views,
+    calculate_workload_statistics,
+    format_schedule_for_export,
+)
+
+# name: (people, tasks, days, unavailable)
+SCENARIOS = {
+    "team": (len(Config.PEOPLE), len(Config.TASKS), len(Config.WEEKDAYS), 0.1),
+    "department": (50, 10, 20, 0.2),
+    "organisation": (500, 50, 60, 0.2),
+}
+
+STAGES = ("generate", "dataframes", "statistics", "export")
+
+
+def build_stages(people, tasks, days, unavailable, seed=0):
+    """Callables for each stage on one synthetic team; later stages reuse one schedule"""
+    roster = synthetic_roster(people, tasks, seed)
+    day_keys = synthetic_days(days)
+    weekly = days == len(Config.WEEKDAYS)
+    if weekly:
+        day_keys = Config.WEEKDAYS
+    availability = synthetic_availability(roster.people, day_keys, unavailable, seed)
+    scheduler = TaskScheduler(seed=seed, roster=roster)
+
+    def generate():
+        if weekly:
+            return scheduler.generate_schedule(availability, [])[0]
+        return scheduler.generate_horizon(availability, [], start=day_keys[0], end=day_keys[-1])[0]
+
+    schedule = generate()
+    return {
+        "generate": generate,
+        "dataframes": lambda: build_schedule_views(schedule, roster.people),
+        "statistics": lambda: calculate_workload_statistics(schedule, roster.task_weights),
+        "export": lambda: (
+            format_schedule_for_export(schedule, "task_view").to_csv(),
+            format_schedule_for_export(schedule, "person_view", roster.people).to_csv(),
+        ),
+    }
+
+
+def measure(stage, repeat):
+    """Fastest of repeat runs (least affected by machine noise), then peak traced bytes of one more"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run(scenarios, repeat, seed=0):
+    results = {}
+    for name, size in scenarios.items():
+        stages = build_stages(*size, seed=seed)
+        for stage in STAGES:
+            results[f"{name}/{stage}"] = measure(stages[stage], repeat)
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold, min_delta=0.0005):
+    """
+    Stages that regressed against a baseline
+
+    A slowdown only counts if it also exceeds min_delta seconds, so
+    sub-millisecond stages don't fail on timer noise.
+
+    Returns:
+        list: (key, metric, baseline value, current value) per regression
+    """
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        slower = current["seconds"] - previous["seconds"]
+        if current["seconds"] > previous["seconds"] * (1 + threshold) and slower > min_delta:
+            regressions.append((key, "seconds", previous["seconds"], current["seconds"]))
+        if current["peak_bytes"] > previous["peak_bytes"] * (1 + memory_threshold):
+            regressions.append((key, "peak_bytes", previous["peak_bytes"], current["peak_bytes"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Built-in scenario to run; repeatable (default: all)")
+    parser.add_argument("--people", type=int, help="Run one custom scenario instead")
+    parser.add_argument("--tasks", type=int, default=len(Config.TASKS))
+    parser.add_argument("--days", type=int, default=len(Config.WEEKDAYS))
+    parser.add_argument("--unavailable", type=float, default=0.1,
+                        help="Probability a person is off on a given day")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against these results")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline as a fraction (default 0.25)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="Allowed peak memory growth vs baseline (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5,
+                        help="Ignore slowdowns smaller than this many ms (default 0.5)")
+    args = parser.parse_args(argv)
+
+    if args.people:
+        scenarios = {"custom": (args.people, args.tasks, args.days, args.unavailable)}
+    else:
+        scenarios = {name: SCENARIOS[name] for name in args.scenario or SCENARIOS}
+
+    results = run(scenarios, args.repeat, args.seed)
+
+    print(f"{'stage':<28}{'time (ms)':>12}{'peak (KiB)':>14}")
+    for key, result in results.items():
+        print(f"{key:<28}{result['seconds'] * 1000:>12.2f}{result['peak_bytes'] / 1024:>14.1f}")
+
+    if args.output:
+        payload = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+                "scenarios": {name: list(size) for name, size in scenarios.items()},
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+            handle.write("\n")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)["results"]
+        regressions = compare(results, baseline, args.threshold, args.memory_threshold,
+                              args.min_delta_ms / 1000)
+        for key, metric, before, after in regressions:
+            print(f"REGRESSION {key} {metric}: {before:.6g} -> {after:.6g} "
+                  f"({(after / before - 1) * 100:+.0f}%)")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+"""
+Measure the Streamlit app's cold start
+
+Each run starts a fresh interpreter (so nothing is already imported or
+cached) and times:
+
+    streamlit       import streamlit
+    scheduler       import muniapms_scheduler, the app's only eager import
+    first_render    app.py's first script run, as a new session sees it
+    rerun           a second run of the same session
+    results         generating a schedule and rendering the results tabs
+
+It also records which heavy modules (pandas, numpy, utils, exports) were
+loaded by the first render; none of them should be until results are shown.
+Reports the median and fastest of --repeat runs, optionally as JSON, and
+with --budget-ms exits 1 if the median cold start (imports plus first
+render) is over budget.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 10 --output startup.json --budget-ms 2000
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ("streamlit", "scheduler", "first_render", "rerun", "results")
+
+HEAVY_MODULES = ("pandas", "numpy", "utils", "exports")
+
+_PROBE = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)
+timings = {}
+started = time.perf_counter()
+import streamlit
+timings["streamlit"] = time.perf_counter() - started
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+import muniapms_scheduler
+timings["scheduler"] = time.perf_counter() - started
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+started = time.perf_counter()
+app.run()
+timings["first_render"] = time.perf_counter() - started
+loaded = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+started = time.perf_counter()
+app.run()
+timings["rerun"] = time.perf_counter() - started
+started = time.perf_counter()
+next(button for button in app.button if "Generate" in button.label).click().run()
+timings["results"] = time.perf_counter() - started
+errors = [str(error.value) for error in app.exception]
+print(json.dumps({"timings": timings, "loaded": loaded, "errors": errors}))
+"""
+
+
+def probe(app_path):
+    """One cold start in a fresh interpreter"""
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, MUNIAPMS_HISTORY=os.path.join(scratch, "history.sqlite3"))
+        completed = subprocess.run(
+            [sys.executable, "-c", _PROBE, app_path, json.dumps(HEAVY_MODULES)],
+            cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(app_path, repeat):
+    runs = [probe(app_path) for _ in range(repeat)]
+    results = {}
+    for stage in STAGES:
+        samples = [result["timings"][stage] for result in runs]
+        results[stage] = {"median": statistics.median(samples), "min": min(samples)}
+    cold = [result["timings"]["streamlit"] + result["timings"]["scheduler"]
+            + result["timings"]["first_render"] for result in runs]
+    results["cold_start"] = {"median": statistics.median(cold), "min": min(cold)}
+    loaded = sorted({name for result in runs for name in result["loaded"]})
+    errors = sorted({error for result in runs for error in result["errors"]})
+    return results, loaded, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--output", metavar="FILE", help="Write results as JSON")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Fail if the median cold start (imports + first render) is slower")
+    args = parser.parse_args(argv)
+
+    results, loaded, errors = run(args.app, args.repeat)
+
+    print(f"{'stage':<16}{'median (ms)':>14}{'min (ms)':>12}")
+    for stage, result in results.items():
+        print(f"{stage:<16}{result['median'] * 1000:>14.1f}{result['min'] * 1000:>12.1f}")
+    print(f"loaded by first render: {', '.join(loaded) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+    for error in errors:
+        print(f"ERROR in app: {error}")
+
+    if args.output:
+        payload = {
+            "meta": {
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+            "loaded_by_first_render": loaded,
+        }
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+            handle.write("\n")
+
+    if errors:
+        return 1
+    if args.budget_ms is not None and results["cold_start"]["median"] * 1000 > args.budget_ms:
+        print(f"OVER BUDGET: cold start {results['cold_start']['median'] * 1000:.0f} ms "
+              f"> {args.budget_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
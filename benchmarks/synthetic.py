@@ -0,0 +1,41 @@
+"""
+Synthetic rosters and availability for benchmarks
+
+Scales people, tasks, days and the density of unavailable days while
+keeping the shape of the real team: a Sizing task with a third of the
+roster excluded, and task weights of 2 or 3.
+"""
+
+import os
+import random
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from muniapms_scheduler import Config, Roster, horizon_days  # noqa: E402
+
+
+def synthetic_roster(people, tasks, seed=0):
+    """Roster of people P000.. and tasks Sizing, Task 01.. with random weights"""
+    rng = random.Random(seed)
+    names = [f"P{i:03d}" for i in range(people)]
+    task_names = ["Sizing"] + [f"Task {i:02d}" for i in range(1, tasks)]
+    weights = {task: rng.choice([2, 3]) for task in task_names}
+    no_sizing = rng.sample(names, people // 3)
+    return Roster(names, task_names, weights, restrictions={"Sizing": no_sizing})
+
+
+def synthetic_days(count, start=date(2024, 1, 1)):
+    """The first count weekdays from start, as ISO day keys"""
+    weeks = -(-count // len(Config.WEEKDAYS))
+    return [day.isoformat() for day in horizon_days(start, weeks=weeks)[:count]]
+
+
+def synthetic_availability(people, days, unavailable, seed=0):
+    """person -> days off, each day off with probability unavailable"""
+    rng = random.Random(seed)
+    return {
+        person: [day for day in days if rng.random() < unavailable]
+        for person in people
+    }
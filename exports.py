@@ -0,0 +1,290 @@
+"""
+Streaming export pipeline for the MuniAPMs Task Scheduler
+
+Exports are built from row generators rather than DataFrames, so writing a
+year-long horizon never holds more than one chunk of output in memory on
+top of the schedule itself. The task and person views produce the same CSV
+as format_schedule_for_export(...).to_csv(); the assignments view is one
+(day, task, person) row per slot for Parquet/Arrow and other tools.
+
+Parquet and Arrow output need pyarrow, which is imported only when used.
+"""
+
+import csv
+import hashlib
+import io
+import re
+import zipfile
+from datetime import date, timedelta
+
+from muniapms_scheduler import Config
+from utils import (
+    HOLIDAY,
+    UNASSIGNED,
+    day_display_name,
+    generate_filename,
+)
+
+CHUNK_ROWS = 10_000
+
+
+def iter_task_rows(schedule):
+    """Task-by-day view: header, then one row per day; columns from every day"""
+    if not schedule:
+        return
+    tasks = list(dict.fromkeys(task for assigned in schedule.values() for task in assigned))
+    yield [""] + tasks
+    for day, assigned in schedule.items():
+        yield [day_display_name(day)] + [assigned.get(task, "") for task in tasks]
+
+
+def iter_person_rows(schedule, people=None, block_size=256):
+    """
+    Person-by-day view: header, then one row per person
+
+    people lists the rows; pass the active roster's (scheduler.people) for
+    a custom team. It defaults to Config.PEOPLE, the built-in team, so
+    everyone on it has a row even in a week they have no tasks. People are
+    inverted in blocks, so memory grows with block_size x days rather than
+    with the whole roster.
+    """
+    people = list(people or Config.PEOPLE)
+    yield ["Person"] + [day_display_name(day) for day in schedule]
+    for start in range(0, len(people), block_size):
+        block = {person: {} for person in people[start:start + block_size]}
+        for day, assigned in schedule.items():
+            for task, person in assigned.items():
+                days = block.get(person)
+                if days is not None:
+                    days.setdefault(day, []).append(task)
+        for person, days in block.items():
+            yield [person] + ["; ".join(days[day]) if day in days else "😎" for day in schedule]
+
+
+def iter_assignment_rows(schedule):
+    """Long format: header, then one (day, task, person) row per slot"""
+    yield ["day", "task", "person"]
+    for day, assigned in schedule.items():
+        for task, person in assigned.items():
+            yield [day, task, person]
+
+
+def iter_csv(rows, chunk_rows=CHUNK_ROWS):
+    """Encode rows as CSV, yielding UTF-8 chunks of at most chunk_rows rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode("utf-8")
+
+
+def write_csv(rows, destination):
+    """
+    Stream rows to a CSV file
+
+    Args:
+        rows (iterable): Rows from one of the iter_*_rows generators
+        destination: Path or binary file-like object
+    """
+    if hasattr(destination, "write"):
+        for chunk in iter_csv(rows):
+            destination.write(chunk)
+        return
+    with open(destination, "wb") as handle:
+        for chunk in iter_csv(rows):
+            handle.write(chunk)
+
+
+def _record_batches(rows, chunk_rows):
+    import pyarrow as pa
+
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        return None, iter(())
+    names = [name or "Day" for name in header]
+    schema = pa.schema([(name, pa.string()) for name in names])
+
+    def batches():
+        columns = [[] for _ in names]
+        for row in rows:
+            for column, value in zip(columns, row):
+                column.append(value)
+            if len(columns[0]) >= chunk_rows:
+                yield pa.record_batch([pa.array(column, pa.string()) for column in columns], schema=schema)
+                columns = [[] for _ in names]
+        if columns[0]:
+            yield pa.record_batch([pa.array(column, pa.string()) for column in columns], schema=schema)
+
+    return schema, batches()
+
+
+def write_parquet(rows, destination, chunk_rows=CHUNK_ROWS):
+    """Write rows to Parquet one row group per chunk (requires pyarrow)"""
+    import pyarrow.parquet as pq
+
+    schema, batches = _record_batches(rows, chunk_rows)
+    if schema is None:
+        return
+    with pq.ParquetWriter(destination, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def write_arrow(rows, destination, chunk_rows=CHUNK_ROWS):
+    """Write rows to an Arrow IPC file one record batch per chunk (requires pyarrow)"""
+    import pyarrow as pa
+
+    schema, batches = _record_batches(rows, chunk_rows)
+    if schema is None:
+        return
+    with pa.ipc.new_file(destination, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+def _day_date(day, week_start):
+    """Calendar date for an ISO day key or a weekday code in week_start's week"""
+    if day in Config.WEEKDAYS:
+        if week_start is None:
+            raise ValueError("week_start is required to put weekday codes on a calendar")
+        return week_start + timedelta(days=Config.WEEKDAYS.index(day))
+    return date.fromisoformat(day)
+
+
+def _ics_escape(text):
+    return (text.replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def iter_ics(schedule, person, week_start=None, stamp=None):
+    """
+    iCalendar feed for one person: an all-day event per assigned task
+
+    Args:
+        schedule (dict): Generated schedule dictionary
+        person (str): Whose feed to build
+        week_start (date): Monday of the week when days are weekday codes
+        stamp (str): DTSTAMP value (defaults to now, UTC)
+
+    Yields:
+        str: CRLF-terminated iCalendar lines
+    """
+    if stamp is None:
+        from datetime import datetime, timezone
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield "BEGIN:VCALENDAR\r\n"
+    yield "VERSION:2.0\r\n"
+    yield "PRODID:-//MuniAPMs//Task Scheduler//EN\r\n"
+    yield f"X-WR-CALNAME:{_ics_escape(person)} - MuniAPMs tasks\r\n"
+    for day, assigned in schedule.items():
+        when = None
+        for task, assignee in assigned.items():
+            if assignee != person:
+                continue
+            when = when or _day_date(day, week_start)
+            key = f"{person}|{when.isoformat()}|{task}".encode("utf-8")
+            uid = f"{hashlib.sha1(key).hexdigest()[:20]}@muniapms"
+            yield "BEGIN:VEVENT\r\n"
+            yield f"UID:{uid}\r\n"
+            yield f"DTSTAMP:{stamp}\r\n"
+            yield f"DTSTART;VALUE=DATE:{when:%Y%m%d}\r\n"
+            yield f"DTEND;VALUE=DATE:{when + timedelta(days=1):%Y%m%d}\r\n"
+            yield f"SUMMARY:{_ics_escape(task)}\r\n"
+            yield "END:VEVENT\r\n"
+    yield "END:VCALENDAR\r\n"
+
+
+def write_ics(schedule, person, destination, week_start=None):
+    """Stream one person's iCalendar feed to a path or binary file-like object"""
+    lines = iter_ics(schedule, person, week_start)
+    if hasattr(destination, "write"):
+        for line in lines:
+            destination.write(line.encode("utf-8"))
+        return
+    with open(destination, "wb") as handle:
+        for line in lines:
+            handle.write(line.encode("utf-8"))
+
+
+def _member_name(person, taken):
+    """A safe, unique archive file name for a person: no separators, no leading dots"""
+    base = re.sub(r"(?:[^\w .-]|\.{2,})+", "_", person).strip(" ._") or "person"
+    name, number = base, 1
+    while name.lower() in taken:
+        number += 1
+        name = f"{base}_{number}"
+    taken.add(name.lower())
+    return name
+
+
+def _assigned_people(schedule, people):
+    seen = dict.fromkeys(people or [])
+    for assigned in schedule.values():
+        for person in assigned.values():
+            if person != HOLIDAY and person != UNASSIGNED:
+                seen.setdefault(person)
+    return list(seen)
+
+
+def write_bundle(schedule, destination, people=None, week_start=None, columnar=True):
+    """
+    Write every view into one zip archive
+
+    The archive holds the task, person and assignments CSVs, a Parquet copy
+    of the assignments when pyarrow is installed, and one .ics feed per
+    person under calendars/ (names made file-safe, so they can't nest or
+    climb out of the folder). Each member is streamed straight into the
+    archive.
+
+    Args:
+        schedule (dict): Generated schedule dictionary
+        destination: Path or binary file-like object for the .zip
+        people (list): Person-view rows and feeds, e.g. scheduler.people
+            (defaults to Config.PEOPLE); anyone else assigned is added
+            after them
+        week_start (date): Monday of the week when days are weekday codes;
+            without it, weekly schedules are exported without .ics feeds
+        columnar (bool): Include Parquet output if pyarrow is available
+
+    Returns:
+        list: Names of the archive members
+    """
+    people = _assigned_people(schedule, people or Config.PEOPLE)
+    calendar = week_start is not None or not any(day in Config.WEEKDAYS for day in schedule)
+
+    views = [
+        ("Task_Schedule", iter_task_rows(schedule)),
+        ("Individual_Schedule", iter_person_rows(schedule, people)),
+        ("Assignments", iter_assignment_rows(schedule)),
+    ]
+
+    with zipfile.ZipFile(destination, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for base_name, rows in views:
+            with archive.open(generate_filename(base_name, "csv"), "w") as member:
+                write_csv(rows, member)
+
+        if columnar:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                pass
+            else:
+                with archive.open(generate_filename("Assignments", "parquet"), "w") as member:
+                    write_parquet(iter_assignment_rows(schedule), member)
+
+        if calendar:
+            taken = set()
+            for person in people:
+                with archive.open(f"calendars/{_member_name(person, taken)}.ics", "w") as member:
+                    write_ics(schedule, person, member, week_start)
+
+        return archive.namelist()
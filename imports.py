@@ -0,0 +1,299 @@
+"""
+Bulk availability import for the MuniAPMs Task Scheduler
+
+Reads who is unavailable when from CSV, Excel, JSON or pasted text and turns
+it into the person -> [days] mapping the scheduler takes. Every cell of the
+input becomes one row of a single long DataFrame, and splitting, day-alias
+mapping, range expansion and grouping run as vectorized pandas passes over
+it, so files with thousands of people parse without a loop per person.
+
+Accepted layouts:
+
+    Max: m, th                       pasted text, one person per line
+    Max,mon,tue                      CSV without a header, name first
+    person,day / person,start,end    CSV or Excel with a header row
+    {"Max": ["m", "2024-07-01..2024-07-05"]}    JSON object
+    [{"person": "Max", "start": "2024-07-01", "end": "2024-07-05"}]    JSON records
+
+Day tokens go through Config.DAY_MAPPING ('m', 'tu', 'r', 'thursday', ...)
+or are ISO dates. A range is "a..b", "a to b" or, for weekdays, "mon-wed",
+or a start/end column pair; date ranges expand to the weekdays they cover.
+Excel needs openpyxl, which pandas imports only when a workbook is read.
+"""
+
+import io
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from muniapms_scheduler import Config
+from utils import validate_availability_input
+
+# Longest date range accepted, in calendar days
+MAX_RANGE_DAYS = 366
+
+PERSON_COLUMNS = ("person", "name", "member")
+DAY_COLUMNS = ("day", "days", "date", "dates", "unavailable")
+
+_FORMATS = {
+    ".csv": "csv", ".tsv": "csv", ".txt": "text",
+    ".xlsx": "excel", ".xls": "excel", ".json": "json",
+}
+
+_WEEKDAY_INDEX = {day: i for i, day in enumerate(Config.WEEKDAYS)}
+
+
+class ImportResult:
+    """Parsed availability plus every problem found on the way"""
+
+    def __init__(self, availability, errors, tokens, elapsed):
+        self.availability = availability
+        self.errors = errors
+        self.tokens = tokens
+        self.elapsed = elapsed
+
+    @property
+    def is_valid(self):
+        return not self.errors
+
+    @property
+    def has_dates(self):
+        """Whether any entry is an ISO date, which needs a dated horizon to take effect"""
+        return any(
+            day not in _WEEKDAY_INDEX for days in self.availability.values() for day in days
+        )
+
+    def __repr__(self):
+        return (f"ImportResult({len(self.availability)} people, {self.tokens} days, "
+                f"{len(self.errors)} errors in {self.elapsed * 1000:.1f} ms)")
+
+
+def _text_cells(text):
+    """(person, cell) rows from "Name: days" / "Name,days" lines"""
+    lines = pd.Series(text.splitlines(), dtype="object").str.strip()
+    lines = lines[(lines != "") & ~lines.str.startswith("#")]
+    parts = lines.str.extract(r"^([^:,;\t]+?)\s*(?:[:,;\t]\s*(.*))?$")
+    parts.columns = ["person", "cell"]
+    parts = parts[~parts["person"].str.lower().isin(PERSON_COLUMNS)]
+    return parts.fillna({"cell": ""})
+
+
+def _table_cells(table):
+    """(person, cell) rows from a table with a header row"""
+    table = table.rename(columns=lambda column: str(column).strip().lower())
+    columns = list(table.columns)
+    person = next((column for column in columns if column in PERSON_COLUMNS), columns[0])
+    table = table.fillna("").astype(str)
+    frames = []
+    if "start" in columns:
+        start = table["start"].str.strip()
+        end = table["end"].str.strip() if "end" in columns else start
+        # A blank end means a single day; a blank start, no range on that row
+        span = (start + ".." + end.where(end != "", start)).where(start != "", "")
+        frames.append(pd.DataFrame({"person": table[person], "cell": span}))
+    day_columns = [column for column in columns if column in DAY_COLUMNS]
+    if not day_columns and "start" not in columns:
+        day_columns = [column for column in columns if column != person]
+    if day_columns:
+        melted = table.melt(id_vars=[person], value_vars=day_columns, value_name="cell")
+        frames.append(melted.rename(columns={person: "person"})[["person", "cell"]])
+    if not frames:
+        return pd.DataFrame({"person": table[person], "cell": ""})
+    return pd.concat(frames, ignore_index=True)
+
+
+def _wide_cells(table):
+    """(person, cell) rows from a headerless table: name first, then day cells"""
+    table = table.fillna("").astype(str)
+    first = table.columns[0]
+    if len(table.columns) == 1:
+        return pd.DataFrame({"person": table[first], "cell": ""})
+    melted = table.melt(id_vars=[first], value_name="cell")
+    return melted.rename(columns={first: "person"})[["person", "cell"]]
+
+
+def _mapping_cells(data):
+    """(person, cell) rows from JSON: person -> days, or a list of records"""
+    if isinstance(data, list):
+        return _table_cells(pd.DataFrame.from_records(data))
+    if not isinstance(data, dict):
+        raise ValueError("expected an object of person -> days or a list of records")
+    people = pd.Series(list(data.keys()), dtype="object")
+    cells = pd.Series(
+        [days if isinstance(days, list) else [days] for days in data.values()],
+        dtype="object"
+    )
+    frame = pd.DataFrame({"person": people, "cell": cells}).explode("cell")
+    frame["cell"] = frame["cell"].fillna("").astype(str)
+    return frame
+
+
+def _has_header(first_row):
+    return str(first_row).strip().lower() in PERSON_COLUMNS
+
+
+def _read_cells(source, fmt):
+    """(person, cell) DataFrame for any supported source"""
+    if fmt == "excel":
+        if isinstance(source, bytes):
+            source = io.BytesIO(source)
+        table = pd.read_excel(source, header=None, dtype=str)
+        if table.empty:
+            return pd.DataFrame(columns=["person", "cell"])
+        if _has_header(table.iat[0, 0]):
+            table.columns = table.iloc[0]
+            return _table_cells(table.iloc[1:])
+        return _wide_cells(table)
+
+    text = source.read() if hasattr(source, "read") else source
+    if isinstance(text, bytes):
+        text = text.decode("utf-8-sig")
+    if fmt == "json":
+        return _mapping_cells(json.loads(text))
+    header = text.lstrip().split("\n", 1)[0]
+    if fmt == "csv" and _has_header(header.split(",", 1)[0]):
+        table = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False,
+                            skipinitialspace=True)
+        return _table_cells(table)
+    # Headerless CSV rows read the same as "Name, day, day" text lines
+    return _text_cells(text)
+
+
+def _expand(cells):
+    """One (person, day) row per unavailable day, with unparseable tokens kept as-is"""
+    tokens = (
+        cells["cell"]
+        .str.replace(r"\s+to\s+|\s*[–—]\s*", "..", regex=True)
+        .str.split(r"[,;|/\s]+", regex=True)
+    )
+    frame = pd.DataFrame({"person": cells["person"], "token": tokens})
+    frame = frame.explode("token")
+    frame["token"] = frame["token"].fillna("").str.strip()
+    frame = frame[frame["token"] != ""].reset_index(drop=True)
+    # "mon-wed"; ISO dates keep their hyphens
+    frame["token"] = frame["token"].str.replace(r"^([A-Za-z]+)-([A-Za-z]+)$", r"\1..\2", regex=True)
+
+    ranged = frame["token"].str.contains("..", regex=False)
+    singles = frame[~ranged]
+    lowered = singles["token"].str.lower()
+    days = lowered.map(Config.DAY_MAPPING)
+    dates = pd.to_datetime(singles["token"], format="%Y-%m-%d", errors="coerce")
+    days = days.fillna(dates.dt.strftime("%Y-%m-%d")).fillna(singles["token"])
+    parts = [pd.DataFrame({"person": singles["person"], "day": days})]
+
+    if ranged.any():
+        ranges = frame[ranged]
+        bounds = ranges["token"].str.split("..", n=1, regex=False)
+        ranges = ranges.assign(start=bounds.str[0].str.strip(), end=bounds.str[1].str.strip())
+        parts.extend(_expand_ranges(ranges))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _expand_ranges(ranges):
+    """Weekday ("mon..wed") and date ("2024-07-01..2024-07-12") ranges, row per day"""
+    start_day = ranges["start"].str.lower().map(Config.DAY_MAPPING).map(_WEEKDAY_INDEX)
+    end_day = ranges["end"].str.lower().map(Config.DAY_MAPPING).map(_WEEKDAY_INDEX)
+    start_date = pd.to_datetime(ranges["start"], format="%Y-%m-%d", errors="coerce")
+    end_date = pd.to_datetime(ranges["end"], format="%Y-%m-%d", errors="coerce")
+
+    weekday = start_day.notna() & end_day.notna() & (end_day >= start_day)
+    length = (end_date - start_date).dt.days + 1
+    dated = start_date.notna() & end_date.notna() & length.between(1, MAX_RANGE_DAYS)
+
+    parts = []
+    if weekday.any():
+        rows = ranges[weekday]
+        counts = (end_day[weekday] - start_day[weekday] + 1).astype(int)
+        repeated = rows.loc[rows.index.repeat(counts)]
+        offsets = repeated.groupby(level=0).cumcount().to_numpy()
+        codes = np.array(Config.WEEKDAYS, dtype=object)
+        index = start_day.loc[repeated.index].astype(int).to_numpy() + offsets
+        parts.append(pd.DataFrame({"person": repeated["person"].to_numpy(), "day": codes[index]}))
+    if dated.any():
+        rows = ranges[dated]
+        repeated = rows.loc[rows.index.repeat(length[dated].astype(int))]
+        offsets = repeated.groupby(level=0).cumcount().to_numpy()
+        stamps = start_date.loc[repeated.index] + pd.to_timedelta(offsets, unit="D")
+        keep = (stamps.dt.dayofweek < 5).to_numpy()
+        parts.append(pd.DataFrame({
+            "person": repeated["person"].to_numpy()[keep],
+            "day": stamps[keep].dt.strftime("%Y-%m-%d").to_numpy(),
+        }))
+    bad = ranges[~weekday & ~dated]
+    if len(bad):
+        # Left whole so validation names the range that didn't parse
+        parts.append(pd.DataFrame({"person": bad["person"], "day": bad["token"]}))
+    return parts
+
+
+def _group(days):
+    """person -> sorted unique days: weekday codes in week order, then dates"""
+    days = days.drop_duplicates()
+    codes, people = pd.factorize(days["person"])
+    order = days["day"].map(_WEEKDAY_INDEX).fillna(len(Config.WEEKDAYS))
+    days = days.assign(code=codes, order=order).sort_values(["code", "order", "day"])
+    # One split of the sorted column instead of a Python-level group per person
+    bounds = np.cumsum(np.bincount(codes, minlength=len(people)))[:-1]
+    return dict(zip(people, (chunk.tolist() for chunk in np.split(days["day"].to_numpy(), bounds))))
+
+
+def import_availability(source, fmt=None, people=None):
+    """
+    Parse and validate unavailable days from a file
+
+    Args:
+        source: Path, binary or text file-like object (e.g. a Streamlit
+            upload) or bytes
+        fmt (str): "csv", "excel", "json" or "text"; inferred from the file
+            name when there is one, otherwise text
+        people (list): The team; names outside it are reported, and anyone
+            not mentioned gets no unavailable days. Without it, whoever the
+            source lists is the team.
+
+    Returns:
+        ImportResult: availability (person -> days, weekday codes first, then
+        ISO dates) and the full list of errors, found in one sweep
+    """
+    started = time.perf_counter()
+    if fmt is None:
+        name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+        fmt = _FORMATS.get(os.path.splitext(str(name))[1].lower(), "text")
+    if isinstance(source, (str, os.PathLike)) and fmt != "excel":
+        with open(source, "rb") as handle:
+            cells = _read_cells(handle, fmt)
+    else:
+        cells = _read_cells(source, fmt)
+
+    # Lines with no name (": tue") and blank cells come through as NaN
+    cells = cells.fillna("").astype({"person": str, "cell": str})
+    cells["person"] = cells["person"].str.strip()
+    errors = []
+    unnamed = int((cells["person"] == "").sum())
+    if unnamed:
+        errors.append(f"{unnamed} entries have no person")
+    cells = cells[cells["person"] != ""]
+
+    # People in the order the source lists them, including those with no days
+    availability = {person: [] for person in cells["person"].drop_duplicates()}
+    availability.update(_group(_expand(cells)))
+
+    if people is not None:
+        known = set(people)
+        errors.extend(f"Unknown person '{person}'" for person in availability if person not in known)
+        for person in people:
+            availability.setdefault(person, [])
+    _, problems = validate_availability_input(
+        availability, people if people is not None else list(availability), allow_dates=True
+    )
+    errors.extend(problems)
+
+    tokens = sum(len(days) for days in availability.values())
+    return ImportResult(availability, errors, tokens, time.perf_counter() - started)
+
+
+def parse_availability_text(text, people=None):
+    """import_availability for pasted "Max: m, th" lines, one person per line"""
+    return import_availability(io.StringIO(text), fmt="text", people=people)
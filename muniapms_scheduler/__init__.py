@@ -0,0 +1,19 @@
+"""
+MuniAPMs Task Scheduler
+
+Scheduling library behind the Streamlit app and the muniapms-schedule CLI.
+"""
+
+from .config import Config
+from .history import HistoryStore
+from .metrics import Metrics
+from .repair import diff_by_person, diff_schedules
+from .roster import Roster, RuleIndex, load_roster
+from .schedule import Schedule
+from .scheduler import FairnessState, TaskScheduler, horizon_days
+from .selection import derive_seed
+
+__all__ = [
+    "Config", "FairnessState", "HistoryStore", "Metrics", "Roster", "RuleIndex", "Schedule",
+    "TaskScheduler", "derive_seed", "diff_by_person", "diff_schedules", "horizon_days", "load_roster",
+]
@@ -0,0 +1,229 @@
+"""
+muniapms-schedule: generate schedules from the command line
+
+Reads availability and holidays from JSON or CSV files and writes the
+schedule as JSON or CSV to stdout or a file. Only the standard library and
+the pure scheduling package are imported, so it starts quickly enough to be
+called from cron or other services.
+
+Examples:
+
+    muniapms-schedule -a availability.json --holiday fri
+    muniapms-schedule -a availability.csv --start 2024-07-01 --weeks 13 -f csv -o q3.csv
+    muniapms-schedule -a availability.json --weeks 1 --state plan-state.json
+    muniapms-schedule -a availability.json --roster roster.yaml
+    muniapms-schedule -a availability.json --start 2024-07-08 --history history.sqlite3
+    muniapms-schedule -a availability.json --roster roster.yaml --check
+    muniapms-schedule -a availability.json --start 2024-07-01 --weeks 4 --improve 200
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+
+from .history import WINDOW_DAYS, HistoryStore
+from .roster import load_roster
+from .scheduler import FairnessState, TaskScheduler
+
+
+def _is_json(path):
+    return path == "-" or path.lower().endswith(".json")
+
+
+def _open(path):
+    if path == "-":
+        return sys.stdin
+    return open(path, newline="", encoding="utf-8")
+
+
+def load_availability(path):
+    """
+    Read unavailable days per person
+
+    JSON: {"Max": ["mon", "2024-07-03"], ...}
+    CSV: one row per person, name first, then any number of day cells
+    ("Max,mon,tue"); a header row starting with "person" is skipped.
+    """
+    with _open(path) as handle:
+        if _is_json(path):
+            data = json.load(handle)
+            if not isinstance(data, dict):
+                raise ValueError(f"{path}: expected an object of person -> list of days")
+            return {person: [str(day) for day in days] for person, days in data.items()}
+
+        availability = {}
+        for row in csv.reader(handle):
+            cells = [cell.strip() for cell in row if cell.strip()]
+            if not cells or cells[0].lower() == "person":
+                continue
+            availability.setdefault(cells[0], []).extend(cells[1:])
+        return availability
+
+
+def load_holidays(path):
+    """
+    Read company holidays
+
+    JSON: ["fri", "2024-07-04"]; CSV/text: one or more days per row.
+    """
+    with _open(path) as handle:
+        if _is_json(path):
+            data = json.load(handle)
+            if not isinstance(data, list):
+                raise ValueError(f"{path}: expected a list of days")
+            return [str(day) for day in data]
+        return [
+            cell.strip()
+            for row in csv.reader(handle)
+            for cell in row
+            if cell.strip() and cell.strip().lower() not in ("day", "holiday", "date")
+        ]
+
+
+def write_schedule(schedule, seed, handle, fmt, state=None):
+    """Write a schedule as JSON or as day,task,person CSV rows"""
+    if fmt == "csv":
+        writer = csv.writer(handle)
+        writer.writerow(["day", "task", "person"])
+        for day, tasks in schedule.items():
+            for task, person in tasks.items():
+                writer.writerow([day, task, person])
+        return
+
+    payload = {"seed": seed, "schedule": schedule}
+    if state is not None:
+        payload["state"] = state.to_dict()
+    json.dump(payload, handle, ensure_ascii=False, indent=2)
+    handle.write("\n")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="muniapms-schedule",
+        description="Generate MuniAPMs task schedules without the web app."
+    )
+    parser.add_argument("-a", "--availability", metavar="FILE",
+                        help="Unavailable days per person (.json or .csv, '-' for JSON on stdin)")
+    parser.add_argument("--holidays", metavar="FILE",
+                        help="Company holidays (.json list or .csv/.txt)")
+    parser.add_argument("--holiday", action="append", default=[], metavar="DAY",
+                        help="Company holiday (weekday code or ISO date); repeatable")
+    parser.add_argument("--seed", type=int, help="Seed to reproduce a previous schedule")
+    parser.add_argument("--engine", choices=TaskScheduler.ENGINES, default="greedy")
+    parser.add_argument("--roster", metavar="FILE",
+                        help="Team and constraint rules (.yaml or .json) instead of the built-in team")
+    parser.add_argument("--constrained-first", action="store_true",
+                        help="Greedy engine: fill each day's most constrained tasks first "
+                             "(changes which schedule a seed gives)")
+    parser.add_argument("--improve", type=float, metavar="MS",
+                        help="Polish the schedule with local search for up to MS milliseconds")
+    parser.add_argument("--check", action="store_true",
+                        help="Only report days whose tasks cannot all be covered; "
+                             "exit status 1 if there are any")
+
+    horizon = parser.add_argument_group("multi-week horizon")
+    horizon.add_argument("--start", metavar="DATE", help="First day of the horizon (ISO date)")
+    span = horizon.add_mutually_exclusive_group()
+    span.add_argument("--weeks", type=int, help="Number of weeks to schedule")
+    span.add_argument("--end", metavar="DATE", help="Last day of the horizon (ISO date)")
+    horizon.add_argument("--state", metavar="FILE",
+                         help="Fairness state file: continued from if it exists, then updated")
+    horizon.add_argument("--history", metavar="DB",
+                         help="SQLite history: seeds fairness from recent weeks (with --start) "
+                              "and stores the new schedule")
+    horizon.add_argument("--window-days", type=int, default=WINDOW_DAYS,
+                         help=f"History window before --start (default {WINDOW_DAYS} days)")
+
+    parser.add_argument("-f", "--format", choices=("json", "csv"), default="json")
+    parser.add_argument("-o", "--output", metavar="FILE", help="Write here instead of stdout")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        availability = load_availability(args.availability) if args.availability else {}
+        holidays = list(args.holiday)
+        if args.holidays:
+            holidays.extend(load_holidays(args.holidays))
+        roster = load_roster(args.roster) if args.roster else None
+        state = None
+        if args.state and os.path.exists(args.state):
+            with open(args.state, encoding="utf-8") as handle:
+                state = FairnessState.from_dict(json.load(handle))
+        history = None
+        if args.history:
+            if not args.start:
+                parser.error("--history needs --start (the Monday of the week being planned)")
+            history = HistoryStore(args.history)
+            if state is None:
+                state = history.window_state(args.start, args.window_days)
+    except (OSError, ValueError, sqlite3.Error) as error:
+        parser.error(str(error))
+
+    scheduler = TaskScheduler(seed=args.seed, engine=args.engine, roster=roster,
+                              constrained_first=args.constrained_first)
+    horizon = bool(args.weeks or args.end or args.state)
+    # Continuing from a state without a span extends the plan by one week
+    weeks = args.weeks if args.weeks or args.end else 1
+    try:
+        if horizon:
+            shortfalls = scheduler.check_feasibility(
+                availability, holidays, start=args.start or (state and state.next_day),
+                weeks=weeks, end=args.end
+            )
+        else:
+            shortfalls = scheduler.check_feasibility(availability, holidays)
+    except ValueError as error:
+        parser.error(str(error))
+    for day, columns in shortfalls.items():
+        print(f"{day}: cannot cover {', '.join(columns)}", file=sys.stderr)
+    if args.check:
+        return 1 if shortfalls else 0
+
+    initial = state
+    if horizon:
+        try:
+            schedule, person_tasks, seed, state = scheduler.generate_horizon(
+                availability, holidays, start=args.start, weeks=weeks,
+                end=args.end, state=state
+            )
+        except ValueError as error:
+            parser.error(str(error))
+    else:
+        schedule, person_tasks, seed = scheduler.generate_schedule(availability, holidays, state=state)
+        # A history window is an input only; weekly output carries no state
+        state = None
+
+    if args.improve:
+        schedule, person_tasks, report = scheduler.improve_schedule(
+            schedule, availability, budget=args.improve / 1000, seed=seed, state=initial
+        )
+        print(f"improved objective {report.before:.3f} -> {report.after:.3f} "
+              f"({report.relative:.0%}) in {report.elapsed * 1000:.0f} ms", file=sys.stderr)
+        if state is not None:
+            # Carry forward the polished schedule's counts, not the greedy ones
+            next_day = state.next_day
+            state = initial.copy() if initial is not None else FairnessState()
+            state.record(person_tasks)
+            state.next_day = next_day
+
+    if args.state:
+        with open(args.state, "w", encoding="utf-8") as handle:
+            json.dump(state.to_dict(), handle, ensure_ascii=False, indent=2)
+
+    if history is not None:
+        history.save_schedule(schedule, week_start=args.start, seed=seed,
+                              tasks=dict(scheduler.rules.slots))
+
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as handle:
+            write_schedule(schedule, seed, handle, args.format, state)
+    else:
+        write_schedule(schedule, seed, sys.stdout, args.format, state)
+    return 0
@@ -0,0 +1,39 @@
+"""
+Team, task and calendar configuration for the MuniAPMs Task Scheduler
+"""
+
+# Configuration class
+class Config:
+    PEOPLE = ["Grace", "Bouj", "Zi", "Dapper", "Max", "Mark"]
+
+    TASKS = [
+        "Opti (Urgent and Standard)",
+        "Sizing",
+        "1st & 2nd File, 2nd round raises",
+        "Algo sales, Review 2nd round raises",
+        "Review AM Raises, 3rd file"
+    ]
+
+    TASK_WEIGHTS = {
+        "Opti (Urgent and Standard)": 3,
+        "Sizing": 2,
+        "1st & 2nd File, 2nd round raises": 3,
+        "Algo sales, Review 2nd round raises": 2,
+        "Review AM Raises, 3rd file": 2
+    }
+
+    NO_SIZING = ["Zi", "Mark"]
+
+    DAY_MAPPING = {
+        'monday': 'mon', 'mon': 'mon', 'm': 'mon',
+        'tuesday': 'tue', 'tue': 'tue', 'tu': 'tue', 't': 'tue',
+        'wednesday': 'wed', 'wed': 'wed', 'w': 'wed',
+        'thursday': 'thu', 'thu': 'thu', 'th': 'thu', 'r': 'thu',
+        'friday': 'fri', 'fri': 'fri', 'f': 'fri'
+    }
+
+    WEEKDAYS = ["mon", "tue", "wed", "thu", "fri"]
+    WEEKDAY_DISPLAY = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
+    # More than this many tasks for one person on one day counts as overload
+    MAX_DAILY_TASKS = 3
@@ -0,0 +1,225 @@
+"""
+Per-day feasibility for the MuniAPMs Task Scheduler
+
+Each working day is a bipartite matching between slots and people: a slot
+can go to anyone available and eligible for its task, and a person takes at
+most their daily capacity and never two seats of the same task. A maximum
+matching, grown by augmenting paths over the bitmask domains, gives the
+exact number of slots a day can cover before any assignment runs.
+
+Avoided pairings are left out of the matching (it would no longer be a
+matching problem), so a shortfall it reports is certain, while a day it
+clears can still lose a slot to a pairing rule.
+"""
+
+from .selection import SelectionEngine, count_bits
+
+
+def iter_bits(mask):
+    """Indices of the set bits of mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class DayMatching:
+    """
+    Maximum matching of one day's slots to people
+
+    Args:
+        domains (list): Mask of people who could take each slot
+        tasks (list): Task behind each slot; seats of one task need
+            different people
+        room (dict): person index -> slots they can still take today, for
+            people with a daily capacity; everyone else is unlimited
+
+    After construction, match[j] is the person covering slot j (or None) and
+    size is the number of slots covered.
+    """
+
+    def __init__(self, domains, tasks, room=None):
+        self.domains = domains
+        self.tasks = tasks
+        self.room = room or {}
+        self.match = [None] * len(domains)
+        self.holder = {}
+        self.held = {}
+        self.load = {}
+        self.size = 0
+        # Cheap first pass: the lowest free person who doesn't hold the task yet
+        full = sum(1 << i for i, left in self.room.items() if left <= 0)
+        holding = {}
+        load = {}
+        stuck = False
+        for j, domain in enumerate(domains):
+            free = domain & ~full & ~holding.get(tasks[j], 0)
+            if not free:
+                stuck = stuck or bool(domain)
+                continue
+            low = free & -free
+            i = low.bit_length() - 1
+            self.match[j] = i
+            holding[tasks[j]] = holding.get(tasks[j], 0) | low
+            if i in self.room:
+                load[i] = load.get(i, 0) + 1
+                if load[i] >= self.room[i]:
+                    full |= low
+            self.size += 1
+        if not stuck:
+            return
+
+        # Augmenting paths for the slots the first pass couldn't fill
+        for j, i in enumerate(self.match):
+            if i is not None:
+                self.holder[(i, tasks[j])] = j
+                self.held.setdefault(i, set()).add(j)
+                self.load[i] = self.load.get(i, 0) + 1
+        for j, domain in enumerate(domains):
+            if self.match[j] is None and domain and self._augment(j, set(), set(), set()):
+                self.size += 1
+
+    def uncovered(self):
+        """Slots no maximum matching could fill alongside the others"""
+        return [j for j, person in enumerate(self.match) if person is None]
+
+    def _augment(self, j, slots_seen, pairs_seen, people_seen):
+        """Give slot j a person, moving other slots along an augmenting path"""
+        slots_seen.add(j)
+        task = self.tasks[j]
+        for i in iter_bits(self.domains[j]):
+            if (i, task) in pairs_seen:
+                continue
+            pairs_seen.add((i, task))
+            k = self.holder.get((i, task))
+            if k is not None:
+                # i already has a seat of this task; try to move that seat
+                if k not in slots_seen and self._augment(k, slots_seen, pairs_seen, people_seen):
+                    self._assign(j, i)
+                    return True
+                continue
+            if i in people_seen:
+                continue
+            people_seen.add(i)
+            if self.load.get(i, 0) < self.room.get(i, len(self.domains)):
+                self._assign(j, i)
+                return True
+            # i is full; try to move one of their other slots
+            for k in list(self.held.get(i, ())):
+                if k not in slots_seen and self._augment(k, slots_seen, pairs_seen, people_seen):
+                    self._assign(j, i)
+                    return True
+        return False
+
+    def _assign(self, j, i):
+        old = self.match[j]
+        task = self.tasks[j]
+        if old is not None:
+            del self.holder[(old, task)]
+            self.held[old].discard(j)
+            self.load[old] -= 1
+        self.match[j] = i
+        self.holder[(i, task)] = j
+        self.held.setdefault(i, set()).add(j)
+        self.load[i] = self.load.get(i, 0) + 1
+
+
+def day_matching(engine, day, slots, seated=None, person=None, task=None):
+    """
+    Maximum matching of the given slots on day in the engine's current state
+
+    Args:
+        engine (SelectionEngine): Built with rules; supplies availability,
+            eligibility, daily loads, capacities and avoided pairings
+        slots (list): (column, task) pairs still to fill
+        seated (dict): task -> mask of people already in a seat of it today
+        person (str): Optionally, match as if person had just taken task
+        task (str): The task person takes
+    """
+    rules = engine.rules
+    available = engine.available[day]
+    seated = dict(seated or {})
+    loads = engine.daily_load[day]
+    extra = None
+    if person is not None:
+        extra = engine.index[person]
+        bit = 1 << extra
+        seated[task] = seated.get(task, 0) | bit
+        limit = rules.capacity[extra]
+        if limit is not None and loads.get(person, 0) + 1 >= limit:
+            available &= ~bit
+        available &= ~rules.avoid[extra]
+
+    room = {
+        i: rules.capacity[i] - loads.get(rules.people[i], 0) - (i == extra)
+        for i in rules.limited
+    }
+    domains = [available & engine.allowed[owner] & ~seated.get(owner, 0) for _, owner in slots]
+    return DayMatching(domains, [owner for _, owner in slots], room)
+
+
+def most_constrained(engine, day, slots):
+    """Slots ordered by how few people could take them on day, roster order on ties"""
+    available = engine.available[day]
+    return sorted(slots, key=lambda slot: count_bits(available & engine.allowed[slot[1]]))
+
+
+class DayPlan:
+    """
+    Most-constrained-first slot order for one day, with reservations
+
+    Slots are filled in order of how few people could take them, and a pick
+    is only allowed if the slots after it can still be covered as fully as
+    before, so scarce people are kept for the tasks that need them.
+    """
+
+    def __init__(self, engine, day, slots):
+        self.engine = engine
+        self.day = day
+        self.slots = most_constrained(engine, day, slots)
+        self.needed = day_matching(engine, day, self.slots).size
+        self.sizes = {}
+
+    def guard(self, position, seated):
+        """keeps_feasible callback for SelectionEngine.select on the slot at position"""
+        rest = self.slots[position + 1:]
+        task = self.slots[position][1]
+        self.sizes = {}
+
+        def keeps_feasible(person):
+            size = day_matching(self.engine, self.day, rest, seated, person, task).size
+            self.sizes[person] = size
+            return size + 1 >= self.needed
+
+        return keeps_feasible
+
+    def taken(self, person):
+        """Record the pick for the current slot (None if it stayed empty)"""
+        # An empty slot was in no maximum matching, so the rest still need as many
+        if person is not None:
+            self.needed = self.sizes[person]
+
+
+def check_feasibility(rules, days, availability, holidays):
+    """
+    Slots that cannot all be covered, per day, before anything is assigned
+
+    Args:
+        rules (RuleIndex): Compiled roster rules
+        days (list): Day keys to check
+        availability (dict): person -> unavailable day keys
+        holidays (iterable): Day keys nobody works
+
+    Returns:
+        dict: day -> columns a maximum matching leaves uncovered, for days
+        with a shortfall only, in day order
+    """
+    engine = SelectionEngine(rules.people, rules.tasks, days, availability, rules=rules)
+    shortfalls = {}
+    for day in days:
+        if day in holidays:
+            continue
+        matching = day_matching(engine, day, rules.slots)
+        if matching.size < len(rules.slots):
+            shortfalls[day] = [rules.slots[j][0] for j in matching.uncovered()]
+    return shortfalls
@@ -0,0 +1,141 @@
+"""
+Schedule history for the MuniAPMs Task Scheduler
+
+Generated schedules are kept in an embedded SQLite database, one row per
+assignment, indexed on (person, task, day). A rolling window of history is
+read back as a FairnessState with a single GROUP BY query, so a new week can
+account for who did which task recently without replaying old schedules.
+"""
+
+import sqlite3
+import threading
+from datetime import date, timedelta
+
+from .config import Config
+from .scheduler import FairnessState
+
+HOLIDAY = "🏝️ Holiday"
+UNASSIGNED = "❌ No one available"
+
+# Default rolling window used to seed fairness counters
+WINDOW_DAYS = 28
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS assignments (
+    day TEXT NOT NULL,
+    slot TEXT NOT NULL,
+    task TEXT NOT NULL,
+    person TEXT NOT NULL,
+    seed INTEGER,
+    PRIMARY KEY (day, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assignments_person_task_day ON assignments (person, task, day);
+"""
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class HistoryStore:
+    """
+    SQLite-backed store of past assignments
+
+    Args:
+        path (str): Database file, or ":memory:" for a throwaway store. File
+            databases use WAL journaling so readers never block the writer.
+
+    The connection is shared between threads (e.g. Streamlit sessions) and
+    guarded by a lock.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def save_schedule(self, schedule, week_start=None, seed=None, tasks=None):
+        """
+        Store a schedule, replacing whatever was stored for its days
+
+        Args:
+            schedule (dict): Generated schedule; days are ISO dates or
+                weekday codes
+            week_start (date): Any day of the week (its Monday is used),
+                required when days are weekday codes
+            seed (int): Seed the schedule was generated with
+            tasks (dict): Column -> task for rosters with headcount seats
+                (e.g. dict(scheduler.rules.slots)); columns default to tasks
+
+        Returns:
+            int: Number of assignments stored
+        """
+        week_start = _as_date(week_start)
+        if week_start is not None:
+            week_start -= timedelta(days=week_start.weekday())
+        tasks = tasks or {}
+        days, rows = [], []
+        for day, assigned in schedule.items():
+            if day in Config.WEEKDAYS:
+                if week_start is None:
+                    raise ValueError("week_start is required to store weekday-coded schedules")
+                day = (week_start + timedelta(days=Config.WEEKDAYS.index(day))).isoformat()
+            days.append((day,))
+            rows.extend(
+                (day, slot, tasks.get(slot, slot), person, seed)
+                for slot, person in assigned.items()
+                if person != HOLIDAY and person != UNASSIGNED
+            )
+
+        with self.lock, self.connection:
+            self.connection.executemany("DELETE FROM assignments WHERE day = ?", days)
+            self.connection.executemany(
+                "INSERT INTO assignments (day, slot, task, person, seed) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+        return len(rows)
+
+    def person_task_count(self, start, end):
+        """
+        Assignments per person and task for days in [start, end)
+
+        Returns:
+            dict: person -> task -> count
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT person, task, COUNT(*) FROM assignments"
+                " WHERE day >= ? AND day < ? GROUP BY person, task",
+                (_as_date(start).isoformat(), _as_date(end).isoformat())
+            ).fetchall()
+        counts = {}
+        for person, task, count in rows:
+            counts.setdefault(person, {})[task] = count
+        return counts
+
+    def window_state(self, before, days=WINDOW_DAYS):
+        """
+        Fairness counters from the days window before `before`
+
+        Pass the result as state= to generate_schedule or generate_horizon.
+        """
+        before = _as_date(before)
+        counts = self.person_task_count(before - timedelta(days=days), before)
+        return FairnessState(counts, next_day=before)
+
+    def assignments(self, start, end, person=None):
+        """(day, slot, task, person) rows for [start, end), optionally for one person"""
+        query = "SELECT day, slot, task, person FROM assignments WHERE day >= ? AND day < ?"
+        params = [_as_date(start).isoformat(), _as_date(end).isoformat()]
+        if person is not None:
+            query += " AND person = ?"
+            params.append(person)
+        with self.lock:
+            return self.connection.execute(query + " ORDER BY day, slot", params).fetchall()
@@ -0,0 +1,318 @@
+"""
+Local-search improvement for the MuniAPMs Task Scheduler
+
+The greedy engine settles each slot once, in order, so a finished schedule
+often has lopsided weighted loads or people stuck on the same task.
+improve_schedule polishes it with two neighbourhoods:
+
+    move    give a slot to another eligible person who is free to take it
+    swap    exchange two people's slots on the same day
+
+A candidate is scored by its change to the objective alone, read off running
+per-person totals, so every step is O(1) however long the schedule is. Steps
+that don't make the objective worse are kept until the time budget runs out
+or the search stalls. Every rule the greedy engine enforces (availability,
+eligibility, one seat per task, daily capacity, avoided pairings, preferred
+days for anyone not already working) holds for every step.
+
+Objective (lower is better):
+
+    LOAD_WEIGHT       variance of weighted load (TASK_WEIGHTS) across people
+    DIVERSITY_WEIGHT  repeats: n * (n - 1) / 2 per person and task done n times
+    OVERLOAD_WEIGHT   tasks beyond Config.MAX_DAILY_TASKS per person and day
+"""
+
+import random
+import time
+from collections import defaultdict
+
+from .config import Config
+from .selection import count_bits, derive_seed, nth_bit
+
+LOAD_WEIGHT = 1.0
+DIVERSITY_WEIGHT = 1.0
+OVERLOAD_WEIGHT = 10.0
+
+# Give up after this many non-improving steps per filled slot
+STALL_FACTOR = 50
+
+
+class ImprovementReport:
+    """Objective before and after local search, and what it took"""
+
+    def __init__(self, before, after, steps, moves, swaps, elapsed):
+        self.before = before
+        self.after = after
+        self.steps = steps
+        self.moves = moves
+        self.swaps = swaps
+        self.elapsed = elapsed
+
+    @property
+    def improvement(self):
+        """Drop in the objective versus the input schedule"""
+        return self.before - self.after
+
+    @property
+    def relative(self):
+        """improvement as a fraction of the starting objective"""
+        return self.improvement / self.before if self.before else 0.0
+
+    def __repr__(self):
+        return (f"ImprovementReport({self.before:.3f} -> {self.after:.3f}, "
+                f"{self.moves} moves, {self.swaps} swaps in {self.elapsed * 1000:.0f} ms)")
+
+
+class _Search:
+    """Running totals for one schedule and O(1) deltas against them"""
+
+    def __init__(self, rules, schedule, availability, state):
+        self.rules = rules
+        self.days = list(schedule)
+        self.slots = rules.slots
+        n = len(rules.people)
+        self.n = n
+        task_id = {task: t for t, task in enumerate(rules.tasks)}
+        self.slot_task = [task_id[task] for _, task in self.slots]
+        self.weights = [rules.task_weights[task] for task in rules.tasks]
+        self.eligible = [rules.eligible[task] for task in rules.tasks]
+        self.capacity = rules.capacity
+        self.limit = Config.MAX_DAILY_TASKS
+
+        unavailable = {
+            rules.index[person]: {str(day) for day in days}
+            for person, days in availability.items() if person in rules.index
+        }
+        self.available = []
+        self.preferred = []
+        for day in self.days:
+            mask = rules.everyone
+            for i, days_off in unavailable.items():
+                if day in days_off or rules.weekday(day) in days_off:
+                    mask &= ~(1 << i)
+            self.available.append(mask)
+            self.preferred.append(rules.preferred[rules.weekday(day)])
+
+        self.load = [0] * n
+        self.count = [[0] * len(rules.tasks) for _ in range(n)]
+        for person, counts in (state.person_task_count if state is not None else {}).items():
+            i = rules.index.get(person)
+            if i is None:
+                continue
+            for task, times in counts.items():
+                if task in task_id:
+                    self.count[i][task_id[task]] += times
+                    self.load[i] += times * self.weights[task_id[task]]
+
+        # cells[d][j]: person index, or None for holidays and empty slots
+        self.cells = []
+        self.daily = []
+        self.holding = []
+        self.working = []
+        self.full = []
+        self.filled = []
+        for d, day in enumerate(self.days):
+            assigned = schedule[day]
+            row = []
+            daily = {}
+            holding = [0] * len(rules.tasks)
+            for j, (column, _) in enumerate(self.slots):
+                i = rules.index.get(assigned.get(column))
+                row.append(i)
+                if i is None:
+                    continue
+                t = self.slot_task[j]
+                daily[i] = daily.get(i, 0) + 1
+                holding[t] |= 1 << i
+                self.count[i][t] += 1
+                self.load[i] += self.weights[t]
+                self.filled.append((d, j))
+            self.cells.append(row)
+            self.daily.append(daily)
+            self.holding.append(holding)
+            self.working.append(sum(1 << i for i in daily))
+            self.full.append(sum(
+                1 << i for i, load in daily.items()
+                if self.capacity[i] is not None and load >= self.capacity[i]
+            ))
+
+    def objective(self):
+        total = sum(self.load)
+        variance = sum(load * load for load in self.load) / self.n - (total / self.n) ** 2
+        repeats = sum(times * (times - 1) // 2 for row in self.count for times in row)
+        overload = sum(
+            max(0, load - self.limit) for daily in self.daily for load in daily.values()
+        )
+        return LOAD_WEIGHT * variance + DIVERSITY_WEIGHT * repeats + OVERLOAD_WEIGHT * overload
+
+    def _daily_delta(self, d, i, change):
+        before = self.daily[d].get(i, 0)
+        return max(0, before + change - self.limit) - max(0, before - self.limit)
+
+    def move_delta(self, d, j, b):
+        """Objective change if b takes slot (d, j) from its current holder"""
+        a = self.cells[d][j]
+        t = self.slot_task[j]
+        w = self.weights[t]
+        load = ((self.load[a] - w) ** 2 + (self.load[b] + w) ** 2
+                - self.load[a] ** 2 - self.load[b] ** 2) / self.n
+        repeats = self.count[b][t] - (self.count[a][t] - 1)
+        overload = self._daily_delta(d, a, -1) + self._daily_delta(d, b, 1)
+        return LOAD_WEIGHT * load + DIVERSITY_WEIGHT * repeats + OVERLOAD_WEIGHT * overload
+
+    def swap_delta(self, d, j, k):
+        """Objective change if the holders of slots (d, j) and (d, k) trade"""
+        a, b = self.cells[d][j], self.cells[d][k]
+        s, t = self.slot_task[j], self.slot_task[k]
+        shift = self.weights[t] - self.weights[s]
+        load = ((self.load[a] + shift) ** 2 + (self.load[b] - shift) ** 2
+                - self.load[a] ** 2 - self.load[b] ** 2) / self.n
+        # a: s -> t, b: t -> s
+        repeats = (self.count[a][t] - (self.count[a][s] - 1)
+                   + self.count[b][s] - (self.count[b][t] - 1))
+        return LOAD_WEIGHT * load + DIVERSITY_WEIGHT * repeats
+
+    def movers(self, d, j):
+        """Mask of people who could take slot (d, j) in a move"""
+        t = self.slot_task[j]
+        mask = self.available[d] & self.eligible[t] & ~self.holding[d][t] & ~self.full[d]
+        # Someone not yet working that day must prefer it
+        return mask & (self.working[d] | self.preferred[d])
+
+    def can_join(self, d, b):
+        """Avoided pairings allow b to start working on day d"""
+        if self.working[d] >> b & 1:
+            return True
+        return not self.rules.avoid[b] & self.working[d]
+
+    def can_swap(self, d, j, k):
+        a, b = self.cells[d][j], self.cells[d][k]
+        s, t = self.slot_task[j], self.slot_task[k]
+        if s == t or a == b:
+            return False
+        holding = self.holding[d]
+        return (
+            self.eligible[t] >> a & 1 and not holding[t] >> a & 1
+            and self.eligible[s] >> b & 1 and not holding[s] >> b & 1
+        )
+
+    def _take(self, d, j, i):
+        t = self.slot_task[j]
+        bit = 1 << i
+        self.cells[d][j] = i
+        self.load[i] += self.weights[t]
+        self.count[i][t] += 1
+        self.holding[d][t] |= bit
+        load = self.daily[d].get(i, 0) + 1
+        self.daily[d][i] = load
+        self.working[d] |= bit
+        if self.capacity[i] is not None and load >= self.capacity[i]:
+            self.full[d] |= bit
+
+    def _give_up(self, d, j):
+        i = self.cells[d][j]
+        t = self.slot_task[j]
+        bit = 1 << i
+        self.load[i] -= self.weights[t]
+        self.count[i][t] -= 1
+        self.holding[d][t] &= ~bit
+        load = self.daily[d][i] - 1
+        if load:
+            self.daily[d][i] = load
+        else:
+            del self.daily[d][i]
+            self.working[d] &= ~bit
+        self.full[d] &= ~bit
+
+    def move(self, d, j, b):
+        self._give_up(d, j)
+        self._take(d, j, b)
+
+    def swap(self, d, j, k):
+        a, b = self.cells[d][j], self.cells[d][k]
+        self._give_up(d, j)
+        self._give_up(d, k)
+        self._take(d, j, b)
+        self._take(d, k, a)
+
+
+def schedule_objective(scheduler, schedule, state=None):
+    """The local-search objective of a schedule (lower is better)"""
+    return _Search(scheduler.rules, schedule, {}, state).objective()
+
+
+def improve_schedule(scheduler, schedule, availability, budget=0.2, seed=None, state=None,
+                     max_steps=None):
+    """
+    Polish a generated schedule with move and swap local search
+
+    Args:
+        scheduler (TaskScheduler): Supplies the roster and its compiled rules
+        schedule (dict): Schedule to improve (not modified); holidays and
+            empty slots are left alone
+        availability (dict): person -> unavailable days; weekday codes also
+            match ISO-dated days
+        budget (float): Seconds to search for at most
+        seed: Seed for the search (int, random.Random or numpy Generator)
+        state (FairnessState): Counters the schedule was generated from, so
+            loads and repeats are balanced against earlier weeks too
+        max_steps (int): Optional cap on steps; with a generous budget this
+            makes a run reproducible from its seed
+
+    Returns:
+        tuple: (schedule, person_tasks, report) with the improved schedule,
+        the matching person -> day -> [task] mapping and an ImprovementReport
+    """
+    started = time.perf_counter()
+    deadline = started + budget
+    rng = random.Random(derive_seed(scheduler.seed if seed is None else seed))
+    search = _Search(scheduler.rules, schedule, availability, state)
+    before = search.objective()
+
+    filled = search.filled
+    width = len(search.slots)
+    stall_limit = STALL_FACTOR * max(1, len(filled))
+    steps = moves = swaps = stalled = 0
+    while filled and stalled < stall_limit and (max_steps is None or steps < max_steps):
+        if steps & 127 == 0 and time.perf_counter() >= deadline:
+            break
+        steps += 1
+        stalled += 1
+        d, j = filled[rng.randrange(len(filled))]
+
+        if rng.random() < 0.5:
+            mask = search.movers(d, j)
+            if not mask:
+                continue
+            b = nth_bit(mask, rng.randrange(count_bits(mask)))
+            if not search.can_join(d, b):
+                continue
+            delta = search.move_delta(d, j, b)
+            if delta <= 1e-9:
+                search.move(d, j, b)
+                moves += 1
+        else:
+            k = rng.randrange(width)
+            if search.cells[d][k] is None or not search.can_swap(d, j, k):
+                continue
+            delta = search.swap_delta(d, j, k)
+            if delta <= 1e-9:
+                search.swap(d, j, k)
+                swaps += 1
+        if delta < -1e-9:
+            stalled = 0
+
+    people = scheduler.rules.people
+    improved = {}
+    person_tasks = defaultdict(lambda: defaultdict(list))
+    for d, day in enumerate(search.days):
+        improved[day] = dict(schedule[day])
+        for j, (column, task) in enumerate(search.slots):
+            i = search.cells[d][j]
+            if i is not None:
+                improved[day][column] = people[i]
+                person_tasks[people[i]][day].append(task)
+
+    report = ImprovementReport(before, search.objective(), steps, moves, swaps,
+                               time.perf_counter() - started)
+    return improved, person_tasks, report
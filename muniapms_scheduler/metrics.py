@@ -0,0 +1,145 @@
+"""
+Optional instrumentation for the MuniAPMs Task Scheduler
+
+Pass a Metrics instance as metrics= to generate_schedule, generate_horizon
+or utils.build_schedule_views to collect per-phase timers, how often each
+greedy priority tier picked the assignee, and how many slots fell back to
+"No one available". Without one, the scheduling loop only pays an
+"is not None" check per slot.
+
+Metrics export as Prometheus text or JSON lines, and can wrap the timed
+phases in cProfile or pyinstrument (imported only when asked for).
+"""
+
+import io
+import json
+import time
+from contextlib import contextmanager, nullcontext
+
+TIERS = ("zero_task", "never_done", "least_loaded")
+
+PROFILERS = ("cprofile", "pyinstrument")
+
+_NO_PHASE = nullcontext()
+
+
+def no_phase(name, profile=False):
+    """Stand-in for Metrics.phase when instrumentation is off"""
+    return _NO_PHASE
+
+
+class Metrics:
+    """
+    Counters, phase timers and an optional profiler
+
+    Args:
+        profiler (str): None, "cprofile" or "pyinstrument"; profiles every
+            phase entered with profile=True
+    """
+
+    def __init__(self, profiler=None):
+        if profiler not in (None,) + PROFILERS:
+            raise ValueError(f"Unknown profiler '{profiler}', expected one of {PROFILERS}")
+        self.profiler = profiler
+        self.tiers = dict.fromkeys(TIERS, 0)
+        self.counters = {"runs": 0, "slots": 0, "unassigned": 0, "holiday_slots": 0}
+        self.phases = {}
+        self._profile = None
+
+    @contextmanager
+    def phase(self, name, profile=False):
+        """Time a block under name; with profile=True also run the profiler"""
+        profiling = profile and self.profiler is not None
+        if profiling:
+            self._start_profile()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if profiling:
+                self._stop_profile()
+            calls, seconds = self.phases.get(name, (0, 0.0))
+            self.phases[name] = (calls + 1, seconds + elapsed)
+
+    def _start_profile(self):
+        if self.profiler == "cprofile":
+            import cProfile
+            if self._profile is None:
+                self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            from pyinstrument import Profiler
+            if self._profile is None:
+                self._profile = Profiler()
+            self._profile.start()
+
+    def _stop_profile(self):
+        if self.profiler == "cprofile":
+            self._profile.disable()
+        else:
+            self._profile.stop()
+
+    def profile_report(self, limit=25):
+        """Text report of everything profiled so far, or "" if nothing was"""
+        if self._profile is None:
+            return ""
+        if self.profiler == "cprofile":
+            import pstats
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(limit)
+            return out.getvalue()
+        return self._profile.output_text()
+
+    def record_schedule(self, schedule, unassigned, holiday):
+        """Count runs, slots and fallbacks from a finished schedule"""
+        self.counters["runs"] += 1
+        for assigned in schedule.values():
+            for person in assigned.values():
+                self.counters["slots"] += 1
+                if person == unassigned:
+                    self.counters["unassigned"] += 1
+                elif person == holiday:
+                    self.counters["holiday_slots"] += 1
+
+    def samples(self):
+        """(metric, labels, value) triples, the common form of both exports"""
+        for tier, count in self.tiers.items():
+            yield "tier_selections_total", {"tier": tier}, count
+        for name, count in self.counters.items():
+            yield f"{name}_total", None, count
+        for name, (calls, _) in self.phases.items():
+            yield "phase_calls_total", {"phase": name}, calls
+        for name, (_, seconds) in self.phases.items():
+            yield "phase_seconds_total", {"phase": name}, seconds
+
+    def to_dict(self):
+        return {
+            "tiers": dict(self.tiers),
+            "counters": dict(self.counters),
+            "phases": {name: {"calls": calls, "seconds": seconds}
+                       for name, (calls, seconds) in self.phases.items()},
+        }
+
+    def to_prometheus(self, prefix="muniapms_"):
+        """Prometheus text exposition format"""
+        lines = []
+        typed = set()
+        for name, labels, value in self.samples():
+            metric = prefix + name
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            if labels:
+                rendered = ",".join(f'{key}="{label}"' for key, label in labels.items())
+                lines.append(f"{metric}{{{rendered}}} {value}")
+            else:
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def to_json_lines(self):
+        """One JSON object per sample"""
+        return "".join(
+            json.dumps(dict({"metric": name, "value": value}, **(labels or {}))) + "\n"
+            for name, labels, value in self.samples()
+        )
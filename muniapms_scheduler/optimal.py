@@ -0,0 +1,317 @@
+"""
+Optimal assignment engine for the MuniAPMs Task Scheduler
+
+Each week is solved as a min-cost flow problem:
+
+    slot (day, task) --1--> (person, day) --daily--> person --weekly--> sink
+
+A slot arc exists only where TaskScheduler.is_valid_assignment allows it.
+The (person, day) -> person arc charges DAILY_COST * k for a person's k-th
+extra task that day, and the remaining arcs price the growth of the
+person's squared weighted load, so the solver first avoids doubling people
+up on a day and then evens out weighted load across the week. Both costs are
+convex, which lets the solver add slots one at a time along shortest
+augmenting paths (Dijkstra with node potentials) and stay optimal, giving a
+polynomial O(slots * arcs * log) run time.
+
+A person's squared load (carried + W)^2, with W the weighted load taken on
+this week, grows by 2 * carried * W + W^2. The first term is separable per
+slot, so each slot arc is priced with its own task's weight against the
+person's carried load. W^2 is not separable over slots of different weights;
+the person -> sink ladder prices it at the week's mean slot weight, so on
+its own the flow only evens out task counts within a week. A rebalancing
+pass then moves and swaps slots while that lowers the exact sum of squared
+weighted loads, which is what makes TASK_WEIGHTS count in a single week.
+Costs are scaled by the number of tasks squared so they stay integers.
+"""
+
+import heapq
+
+# Cost of each additional task a person takes on the same day; large enough
+# that the solver only doubles someone up when coverage requires it
+DAILY_COST = 1000
+
+
+class MinCostFlow:
+    """
+    Successive-shortest-path min-cost flow with convex arc costs
+
+    An arc's k-th unit of flow (0-based) costs base + slope * k, so a positive
+    slope turns the arc into an increasing-marginal-cost ladder without
+    adding parallel arcs.
+    """
+
+    def __init__(self):
+        self.adj = []
+        self.potential = []
+        self.to = []
+        self.cap = []
+        self.flow = []
+        self.base = []
+        self.slope = []
+
+    def add_node(self):
+        self.adj.append([])
+        self.potential.append(0)
+        return len(self.adj) - 1
+
+    def add_arc(self, u, v, cap, base=0, slope=0):
+        """Add an arc u -> v (and its residual twin); returns the arc id"""
+        arc = len(self.to)
+        for tail, head in ((u, v), (v, u)):
+            self.adj[tail].append(len(self.to))
+            self.to.append(head)
+            self.cap.append(cap)
+            self.flow.append(0)
+            self.base.append(base)
+            self.slope.append(slope)
+        return arc
+
+    def _residual(self, arc):
+        """(capacity, cost) of pushing one more unit along a residual arc"""
+        if arc & 1:
+            forward = arc ^ 1
+            flow = self.flow[forward]
+            return flow, -(self.base[forward] + self.slope[forward] * (flow - 1))
+        flow = self.flow[arc]
+        return self.cap[arc] - flow, self.base[arc] + self.slope[arc] * flow
+
+    def augment(self, source, sink):
+        """
+        Push one unit from a newly supplied source to sink along a shortest path
+
+        Returns:
+            bool: False if sink is unreachable from source
+        """
+        potential = self.potential
+        # A fresh source has no residual in-arcs; lift its potential so all
+        # of its out-arcs have non-negative reduced cost
+        lift = None
+        for arc in self.adj[source]:
+            capacity, cost = self._residual(arc)
+            if capacity > 0:
+                value = potential[self.to[arc]] - cost
+                if lift is None or value > lift:
+                    lift = value
+        if lift is None:
+            return False
+        potential[source] = max(potential[source], lift)
+
+        adj, to, cap, flow = self.adj, self.to, self.cap, self.flow
+        base, slope = self.base, self.slope
+        dist = {source: 0}
+        parent = {}
+        done = []
+        heap = [(0, source)]
+        while heap:
+            d, node = heapq.heappop(heap)
+            if d > dist[node]:
+                continue
+            if node == sink:
+                break
+            done.append(node)
+            offset = d + potential[node]
+            # Inlined _residual: this loop dominates the solve time
+            for arc in adj[node]:
+                if arc & 1:
+                    units = flow[arc ^ 1]
+                    if units <= 0:
+                        continue
+                    cost = -(base[arc] + slope[arc] * (units - 1))
+                else:
+                    units = flow[arc]
+                    if units >= cap[arc]:
+                        continue
+                    cost = base[arc] + slope[arc] * units
+                head = to[arc]
+                nd = offset + cost - potential[head]
+                if nd < dist.get(head, nd + 1):
+                    dist[head] = nd
+                    parent[head] = arc
+                    heapq.heappush(heap, (nd, head))
+        else:
+            return False
+
+        # Early-exit potential update: settled nodes move by dist - dist(sink)
+        total = dist[sink]
+        for node in done:
+            potential[node] += dist[node] - total
+
+        node = sink
+        while node != source:
+            arc = parent[node]
+            if arc & 1:
+                self.flow[arc ^ 1] -= 1
+            else:
+                self.flow[arc] += 1
+            node = self.to[arc ^ 1]
+        return True
+
+
+def optimal_assignment(people, tasks, days, is_eligible, task_weights=None,
+                       person_load=None, rng=None, daily_capacity=None, seat_of=None):
+    """
+    Assign every (day, task) slot to minimise daily doubling and load spread
+
+    Args:
+        people (list): Roster
+        tasks (list): Tasks to staff each day
+        days (list): Day keys to solve together (typically one week)
+        is_eligible (callable): is_eligible(person, task, day) -> bool
+        task_weights (dict): Task -> weight used to price load (default 1)
+        person_load (dict): Weighted load each person already carries from
+            earlier weeks
+        rng (random.Random): Optional; shuffles arc order so equally good
+            optima are chosen at random
+        daily_capacity (dict): Person -> most tasks they may take on one day
+        seat_of (dict): Column -> task for tasks staffed by several people;
+            columns of the same task never go to the same person on a day
+
+    Returns:
+        dict: (day, task) -> person, or None where nobody is eligible
+    """
+    task_weights = task_weights or {}
+    weight = {task: task_weights.get(task, 1) for task in tasks}
+    size = len(tasks) or 1
+    total = sum(weight.values()) or 1
+    person_load = person_load or {}
+    daily_capacity = daily_capacity or {}
+    seat_of = seat_of or {}
+    order = list(people)
+
+    graph = MinCostFlow()
+    sink = graph.add_node()
+    slots = len(days) * len(tasks)
+
+    person_node = {}
+    for person in people:
+        node = graph.add_node()
+        person_node[person] = node
+        # Growth of (mean * k)^2 for the k-th task, mean = total / size,
+        # scaled by size^2: total^2 * (2k + 1)
+        graph.add_arc(node, sink, slots, base=total * total, slope=2 * total * total)
+
+    assignment = {}
+    slot_arcs = {}
+    day_node = {}
+    for day in days:
+        if rng is not None:
+            rng.shuffle(order)
+        for task in tasks:
+            slot = graph.add_node()
+            arcs = []
+            for person in order:
+                if not is_eligible(person, task, day):
+                    continue
+                key = (person, day)
+                if key not in day_node:
+                    day_node[key] = graph.add_node()
+                    graph.add_arc(day_node[key], person_node[person],
+                                  min(len(tasks), daily_capacity.get(person) or len(tasks)),
+                                  base=0, slope=DAILY_COST * size * size)
+                target = day_node[key]
+                if task in seat_of:
+                    seat = (person, day, seat_of[task])
+                    if seat not in day_node:
+                        day_node[seat] = graph.add_node()
+                        graph.add_arc(day_node[seat], target, 1)
+                    target = day_node[seat]
+                # 2 * carried * w of the squared load, scaled by size^2
+                cost = 2 * size * size * weight[task] * person_load.get(person, 0)
+                arcs.append((graph.add_arc(slot, target, 1, base=cost), person))
+            slot_arcs[(day, task)] = arcs
+            if not graph.augment(slot, sink):
+                assignment[(day, task)] = None
+
+    for key, arcs in slot_arcs.items():
+        if key in assignment:
+            continue
+        assignment[key] = next(person for arc, person in arcs if graph.flow[arc])
+
+    _rebalance(assignment, {key: [person for _, person in arcs] for key, arcs in slot_arcs.items()},
+               weight, person_load, daily_capacity, seat_of, size)
+    return assignment
+
+
+def _rebalance(assignment, candidates, weight, person_load, daily_capacity, seat_of, size):
+    """
+    Move and swap slots while that lowers the exact squared weighted load
+
+    Prices each person by sum((carried + W)^2) plus DAILY_COST per pair of
+    tasks they hold on one day, and keeps only strict improvements, so it
+    never undoes the flow's coverage or adds doubling. Updates assignment
+    in place.
+    """
+    keys = [key for key in candidates if assignment[key] is not None]
+    load = {}
+    per_day = {}
+    seats = set()
+    for day, task in keys:
+        person = assignment[(day, task)]
+        load[person] = load.get(person, person_load.get(person, 0)) + weight[task]
+        per_day[(person, day)] = per_day.get((person, day), 0) + 1
+        if task in seat_of:
+            seats.add((person, day, seat_of[task]))
+
+    def limit(person):
+        return min(size, daily_capacity.get(person) or size)
+
+    def fits(person, day, task):
+        if per_day.get((person, day), 0) >= limit(person):
+            return False
+        return task not in seat_of or (person, day, seat_of[task]) not in seats
+
+    def shift(person, day, task, sign):
+        load[person] = load.get(person, person_load.get(person, 0)) + sign * weight[task]
+        per_day[(person, day)] = per_day.get((person, day), 0) + sign
+        if task in seat_of:
+            (seats.add if sign > 0 else seats.discard)((person, day, seat_of[task]))
+
+    def doubling(person, day, delta):
+        count = per_day.get((person, day), 0)
+        return DAILY_COST * ((count + delta) * (count + delta - 1) - count * (count - 1)) // 2
+
+    improved = True
+    while improved:
+        improved = False
+        for day, task in keys:
+            giver = assignment[(day, task)]
+            w = weight[task]
+            for taker in candidates[(day, task)]:
+                # Squared loads drop by 2 * w * (load[giver] - load[taker] - w)
+                gain = 2 * w * (load[giver] - load.get(taker, person_load.get(taker, 0)) - w)
+                if taker == giver or gain <= 0 or not fits(taker, day, task):
+                    continue
+                gain -= doubling(giver, day, -1) + doubling(taker, day, 1)
+                if gain > 0:
+                    shift(giver, day, task, -1)
+                    shift(taker, day, task, 1)
+                    assignment[(day, task)] = taker
+                    giver = taker
+                    improved = True
+        for i, first in enumerate(keys):
+            for second in keys[i + 1:]:
+                a, b = assignment[first], assignment[second]
+                delta = weight[second[1]] - weight[first[1]]
+                # a takes second and gives first; b the reverse. Their squared
+                # loads drop by 2 * delta * (load[b] - load[a] - delta)
+                gain = 2 * delta * (load[b] - load[a] - delta)
+                if a == b or gain <= 0:
+                    continue
+                if a not in candidates[second] or b not in candidates[first]:
+                    continue
+                if first[0] != second[0]:
+                    gain -= (doubling(a, first[0], -1) + doubling(a, second[0], 1)
+                             + doubling(b, second[0], -1) + doubling(b, first[0], 1))
+                if gain <= 0:
+                    continue
+                shift(a, *first, -1)
+                shift(b, *second, -1)
+                if fits(a, *second) and fits(b, *first):
+                    shift(a, *second, 1)
+                    shift(b, *first, 1)
+                    assignment[first], assignment[second] = b, a
+                    improved = True
+                else:
+                    shift(a, *first, 1)
+                    shift(b, *second, 1)
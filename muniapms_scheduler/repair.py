@@ -0,0 +1,284 @@
+"""
+Incremental schedule repair for the MuniAPMs Task Scheduler
+
+When someone's availability changes after a schedule is published, repair
+keeps every assignment that is still one the greedy engine could have made
+and re-picks only the rest. A slot is re-checked only if it is on a day
+whose availability changed, comes later on the same day as a changed slot
+(daily loads moved), or is a later slot of the same task that week whose
+"not done this task this week" tier flipped for someone. Re-picks cascade
+through that rule, so work grows with the size of the change rather than
+with the horizon. Earlier history only orders people inside a tier, so it
+guides re-picks but never unseats a valid holder.
+"""
+
+import heapq
+import random
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime
+
+from .config import Config
+from .selection import count_bits, derive_seed, nth_bit, priority_tier, week_numbers
+
+HOLIDAY = "🏝️ Holiday"
+UNASSIGNED = "❌ No one available"
+
+
+def _day_index(days, start):
+    """
+    Position of the first day on or after start in the schedule's order
+
+    Dated schedules take a date or ISO date; weekday-coded schedules take a
+    weekday code, or a date standing for its weekday.
+    """
+    if start is None or not days:
+        return 0
+    if isinstance(start, datetime):
+        start = start.date()
+    start = start.isoformat() if isinstance(start, date) else str(start).strip()
+    dated = days[0] not in Config.WEEKDAYS
+    if start.lower() in Config.WEEKDAYS:
+        if dated:
+            raise ValueError(f"start '{start}' is a weekday code but the schedule is keyed by date")
+        code = start.lower()
+    else:
+        try:
+            parsed = date.fromisoformat(start)
+        except ValueError:
+            raise ValueError(f"start must be a date or weekday code, got '{start}'") from None
+        if dated:
+            return next((i for i, day in enumerate(days) if day >= start), len(days))
+        if parsed.weekday() >= len(Config.WEEKDAYS):
+            raise ValueError(f"start {start} is not a working day of a weekday-coded schedule")
+        code = Config.WEEKDAYS[parsed.weekday()]
+    order = Config.WEEKDAYS.index(code)
+    return next((i for i, day in enumerate(days) if Config.WEEKDAYS.index(day) >= order), len(days))
+
+
+class _TaskHistory:
+    """Sorted (day index, slot index) positions of each person's turns at one task"""
+
+    def __init__(self, schedule, days, seats, index):
+        self.turns = {}
+        for i, day in enumerate(days):
+            assigned = schedule[day]
+            for j, column in seats:
+                person = index.get(assigned[column])
+                if person is not None:
+                    self.turns.setdefault(person, []).append((i, j))
+
+    def first_after(self, person, position):
+        """Earliest turn strictly after position, or None"""
+        turns = self.turns.get(person, ())
+        k = bisect_right(turns, position)
+        return turns[k] if k < len(turns) else None
+
+    def done_between(self, person, since, position):
+        """Whether person had a turn at or after since and before position"""
+        turns = self.turns.get(person, ())
+        k = bisect_left(turns, since)
+        return k < len(turns) and turns[k] < position
+
+    def count_before(self, person, position):
+        return bisect_left(self.turns.get(person, ()), position)
+
+    def move(self, position, old, new):
+        if old is not None:
+            self.turns[old].remove(position)
+        if new is not None:
+            insort(self.turns.setdefault(new, []), position)
+
+
+def repair_schedule(scheduler, schedule, availability, changes, start=None,
+                    state=None, seed=None):
+    """
+    Re-pick only the slots an availability change invalidates
+
+    Args:
+        scheduler (TaskScheduler): Supplies the roster and its compiled rules
+        schedule (dict): Existing schedule (not modified)
+        availability (dict): person -> unavailable days, after the change;
+            weekday codes also match ISO-dated days
+        changes (dict): person -> days whose availability changed, either way
+        start: First day that may change (day key or date; a date picks
+            its weekday in a weekday-coded schedule); earlier days have
+            already happened and are left alone. Raises ValueError if it
+            can't be placed in the schedule
+        state (FairnessState): Counters the schedule was generated from
+        seed: Seed for re-picks (int, random.Random or numpy Generator)
+
+    Returns:
+        tuple: (schedule, diff, seed) where diff lists (day, column, before,
+        after) for every slot that changed, in schedule order
+    """
+    rules = scheduler.rules
+    people = rules.people
+    index = rules.index
+    days = list(schedule)
+    slots = rules.slots
+    seed = derive_seed(scheduler.seed if seed is None else seed)
+    rng = random.Random(seed)
+
+    day_of = {day: i for i, day in enumerate(days)}
+    first = _day_index(days, start)
+    unavailable = {person: set(map(str, entries)) for person, entries in availability.items()}
+    carried = state.person_task_count if state is not None else {}
+    weeks = week_numbers(days, rules.weekday)
+    week_start = {}
+    for i, week in enumerate(weeks):
+        week_start.setdefault(week, i)
+    week_end = {week: i for i, week in enumerate(weeks)}
+
+    seats = {}
+    for j, (column, task) in enumerate(slots):
+        seats.setdefault(task, []).append((j, column))
+    histories = {}
+
+    def history(task):
+        if task not in histories:
+            histories[task] = _TaskHistory(repaired, days, seats[task], index)
+        return histories[task]
+
+    def is_off(person, day):
+        entries = unavailable.get(person)
+        return bool(entries) and (day in entries or rules.weekday(day) in entries)
+
+    def earlier(person, task, since):
+        """Turns at task before the week, carried history included"""
+        return carried.get(people[person], {}).get(task, 0) + history(task).count_before(person, since)
+
+    def least_done(task, mask, since):
+        """Same tiebreak as SelectionEngine.least_done, from the repaired schedule"""
+        candidates = [i for i in range(mask.bit_length()) if mask >> i & 1]
+        totals = {i: sum(earlier(i, other, since) for other in rules.tasks) for i in candidates}
+        fewest = min(totals.values())
+        candidates = [i for i in candidates if totals[i] == fewest]
+        turns = {i: earlier(i, task, since) for i in candidates}
+        fewest = min(turns.values())
+        return sum(1 << i for i in candidates if turns[i] == fewest)
+
+    repaired = dict(schedule)
+    diff = []
+    queue = []
+    queued = set()
+
+    def push(i, j):
+        if i >= first and (i, j) not in queued:
+            queued.add((i, j))
+            heapq.heappush(queue, (i, j))
+
+    # Every slot on a day whose availability changed
+    for person, entries in changes.items():
+        for entry in entries:
+            entry = str(entry)
+            matches = [day_of[entry]] if entry in day_of else [
+                i for i, day in enumerate(days) if rules.weekday(day) == entry
+            ]
+            for i in matches:
+                for j in range(len(slots)):
+                    push(i, j)
+
+    while queue:
+        i, j = heapq.heappop(queue)
+        day = days[i]
+        column, task = slots[j]
+        current = repaired[day][column]
+        if current == HOLIDAY:
+            continue
+
+        # Replay the greedy state just before this slot
+        available = rules.eligible[task]
+        for person in unavailable:
+            if person in index and is_off(person, day):
+                available &= ~(1 << index[person])
+        loads = {}
+        for column_before, task_before in slots[:j]:
+            person = index.get(repaired[day][column_before])
+            if person is None:
+                continue
+            loads[person] = loads.get(person, 0) + 1
+            available &= ~rules.avoid[person]
+            if task_before == task:
+                available &= ~(1 << person)
+        buckets = {0: rules.everyone}
+        for person, load in loads.items():
+            bit = 1 << person
+            limit = rules.capacity[person]
+            if limit is not None and load >= limit:
+                available &= ~bit
+            buckets[0] &= ~bit
+            buckets[load] = buckets.get(load, 0) | bit
+        levels = sorted(level for level, mask in buckets.items() if mask)
+
+        past = history(task)
+        since = (week_start[weeks[i]], 0)
+        never_done = rules.everyone
+        for person in range(len(people)):
+            if past.done_between(person, since, (i, j)):
+                never_done &= ~(1 << person)
+
+        _, mask = priority_tier(available, never_done, buckets, levels)
+        preferred = mask & rules.preferred[rules.weekday(day)]
+        if preferred:
+            mask = preferred
+
+        old = index.get(current)
+        if old is not None and mask >> old & 1:
+            continue
+        if mask:
+            mask = least_done(task, mask, since)
+        new = nth_bit(mask, rng.randrange(count_bits(mask))) if mask else None
+        if new == old:
+            continue
+
+        chosen = people[new] if new is not None else UNASSIGNED
+        if repaired[day] is schedule[day]:
+            repaired[day] = dict(schedule[day])
+        repaired[day][column] = chosen
+        diff.append((i, j, day, column, current, chosen))
+        past.move((i, j), old, new)
+
+        # Later slots today see different loads
+        for later in range(j + 1, len(slots)):
+            push(i, later)
+        # Later turns at this task this week, up to where whoever's
+        # never-done status flipped takes the task again
+        end = i
+        last = week_end[weeks[i]]
+        for person in (old, new):
+            if person is None or past.done_between(person, since, (i, j)):
+                continue
+            turn = past.first_after(person, (i, j))
+            end = max(end, turn[0] if turn and turn[0] <= last else last)
+        for k in range(i + 1, end + 1):
+            for seat, _ in seats[task]:
+                push(k, seat)
+
+    diff.sort()
+    return repaired, [change[2:] for change in diff], seed
+
+
+def diff_schedules(before, after):
+    """(day, column, before, after) for every cell that differs between two schedules"""
+    return [
+        (day, column, person, after[day][column])
+        for day, assigned in before.items()
+        for column, person in assigned.items()
+        if after[day][column] != person
+    ]
+
+
+def diff_by_person(diff):
+    """
+    Group a diff into per-person notifications
+
+    Returns:
+        dict: person -> {"added": [(day, column)], "removed": [(day, column)]}
+    """
+    notices = {}
+    for day, column, before, after in diff:
+        if before not in (HOLIDAY, UNASSIGNED):
+            notices.setdefault(before, {"added": [], "removed": []})["removed"].append((day, column))
+        if after not in (HOLIDAY, UNASSIGNED):
+            notices.setdefault(after, {"added": [], "removed": []})["added"].append((day, column))
+    return notices
@@ -0,0 +1,265 @@
+"""
+Roster and constraint rules for the MuniAPMs Task Scheduler
+
+A Roster describes who can be scheduled and under which rules: skills,
+per-task exclusions (like Config.NO_SIZING), per-person limits on tasks per
+day, pairs of people to keep off the same day, per-task headcount and
+preferred days. It can be loaded from a YAML or JSON file:
+
+    people:
+      - Grace
+      - name: Zi
+        max_tasks_per_day: 2
+        preferred_days: [mon, tue]
+      - name: Mark
+        skills: ["Opti (Urgent and Standard)", "Review AM Raises, 3rd file"]
+    tasks:
+      - name: Sizing
+        weight: 2
+        exclude: [Zi]
+      - name: "Opti (Urgent and Standard)"
+        weight: 3
+        headcount: 2
+    avoid_pairs:
+      - [Grace, Bouj]
+
+Roster.compile() turns the rules into a RuleIndex of bitmask lookup tables
+(bit i is the i-th person), so checking a rule during assignment is a single
+AND instead of a chain of conditionals.
+"""
+
+import json
+from datetime import date
+
+from .config import Config
+
+
+class Roster:
+    """
+    People, tasks and the rules that constrain who does what
+
+    Args:
+        people (list): Roster in priority order
+        tasks (list): Task names in scheduling order
+        task_weights (dict): Task -> weight (missing tasks weigh 1)
+        restrictions (dict): Task -> people who may not do it
+        skills (dict): Person -> tasks they can do; people not listed can do
+            every task
+        max_daily (dict): Person -> most tasks they may take on one day
+        avoid_pairs (list): (person, person) pairs never scheduled on the
+            same day
+        headcount (dict): Task -> people needed each day (default 1)
+        preferred_days (dict): Person -> weekday codes they prefer; they are
+            favoured on those days within a priority tier
+    """
+
+    def __init__(self, people, tasks, task_weights=None, restrictions=None, skills=None,
+                 max_daily=None, avoid_pairs=None, headcount=None, preferred_days=None):
+        self.people = list(people)
+        self.tasks = list(tasks)
+        self.task_weights = dict(task_weights or {})
+        self.restrictions = {task: list(names) for task, names in (restrictions or {}).items()}
+        self.skills = {person: list(names) for person, names in (skills or {}).items()}
+        self.max_daily = dict(max_daily or {})
+        self.avoid_pairs = [tuple(pair) for pair in (avoid_pairs or [])]
+        self.headcount = dict(headcount or {})
+        self.preferred_days = {person: list(days) for person, days in (preferred_days or {}).items()}
+        self._check()
+
+    def _check(self):
+        known_people = set(self.people)
+        known_tasks = set(self.tasks)
+        errors = []
+        for task in list(self.task_weights) + list(self.headcount) + list(self.restrictions):
+            if task not in known_tasks:
+                errors.append(f"Unknown task '{task}'")
+        for person, names in self.skills.items():
+            errors.extend(f"Unknown task '{task}' in skills for {person}"
+                          for task in names if task not in known_tasks)
+        for names in self.restrictions.values():
+            errors.extend(f"Unknown person '{person}'" for person in names if person not in known_people)
+        for pair in self.avoid_pairs:
+            if len(pair) != 2:
+                errors.append(f"Pairing {list(pair)} must name exactly two people")
+            errors.extend(f"Unknown person '{person}'" for person in pair if person not in known_people)
+        for person in list(self.skills) + list(self.max_daily) + list(self.preferred_days):
+            if person not in known_people:
+                errors.append(f"Unknown person '{person}'")
+        for person, limit in self.max_daily.items():
+            if not isinstance(limit, int) or limit < 1:
+                errors.append(f"max_tasks_per_day for {person} must be a positive integer")
+        for task, count in self.headcount.items():
+            if not isinstance(count, int) or count < 1:
+                errors.append(f"headcount for {task} must be a positive integer")
+        for person, days in self.preferred_days.items():
+            errors.extend(f"Invalid day '{day}' in preferred_days for {person}"
+                          for day in days if day not in Config.WEEKDAYS)
+        if errors:
+            raise ValueError("; ".join(dict.fromkeys(errors)))
+
+    @classmethod
+    def from_config(cls):
+        """The built-in team from Config"""
+        return cls(Config.PEOPLE, Config.TASKS, Config.TASK_WEIGHTS,
+                   restrictions={"Sizing": Config.NO_SIZING})
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a roster from the file format described in the module docstring"""
+        if not isinstance(data, dict) or "people" not in data or "tasks" not in data:
+            raise ValueError("roster must define 'people' and 'tasks'")
+
+        people, skills, max_daily, preferred_days = [], {}, {}, {}
+        for entry in data["people"]:
+            if isinstance(entry, str):
+                entry = {"name": entry}
+            if not isinstance(entry, dict) or "name" not in entry:
+                raise ValueError(f"every entry in 'people' needs a name: {entry!r}")
+            name = entry["name"]
+            people.append(name)
+            if "skills" in entry:
+                skills[name] = entry["skills"]
+            if "max_tasks_per_day" in entry:
+                max_daily[name] = entry["max_tasks_per_day"]
+            if "preferred_days" in entry:
+                preferred_days[name] = [
+                    Config.DAY_MAPPING.get(str(day).lower(), day) for day in entry["preferred_days"]
+                ]
+
+        tasks, weights, restrictions, headcount = [], {}, {}, {}
+        for entry in data["tasks"]:
+            if isinstance(entry, str):
+                entry = {"name": entry}
+            if not isinstance(entry, dict) or "name" not in entry:
+                raise ValueError(f"every entry in 'tasks' needs a name: {entry!r}")
+            name = entry["name"]
+            tasks.append(name)
+            if "weight" in entry:
+                weights[name] = entry["weight"]
+            if "exclude" in entry:
+                restrictions[name] = entry["exclude"]
+            if "headcount" in entry:
+                headcount[name] = entry["headcount"]
+
+        return cls(people, tasks, weights, restrictions, skills, max_daily,
+                   data.get("avoid_pairs"), headcount, preferred_days)
+
+    def to_dict(self):
+        people = []
+        for person in self.people:
+            entry = {"name": person}
+            if person in self.skills:
+                entry["skills"] = self.skills[person]
+            if person in self.max_daily:
+                entry["max_tasks_per_day"] = self.max_daily[person]
+            if person in self.preferred_days:
+                entry["preferred_days"] = self.preferred_days[person]
+            people.append(entry)
+        tasks = []
+        for task in self.tasks:
+            entry = {"name": task, "weight": self.task_weights.get(task, 1)}
+            if task in self.restrictions:
+                entry["exclude"] = self.restrictions[task]
+            if task in self.headcount:
+                entry["headcount"] = self.headcount[task]
+            tasks.append(entry)
+        data = {"people": people, "tasks": tasks}
+        if self.avoid_pairs:
+            data["avoid_pairs"] = [list(pair) for pair in self.avoid_pairs]
+        return data
+
+    def compile(self):
+        return RuleIndex(self)
+
+
+def load_roster(path):
+    """
+    Read a roster from a .yaml/.yml or .json file
+
+    YAML needs PyYAML, which is imported only for YAML files.
+    """
+    with open(path, encoding="utf-8") as handle:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+            try:
+                data = yaml.safe_load(handle)
+            except yaml.YAMLError as error:
+                raise ValueError(f"{path}: {error}") from None
+        else:
+            data = json.load(handle)
+    return Roster.from_dict(data)
+
+
+def slot_name(task, seat):
+    """Schedule column for the seat-th (0-based) person on task"""
+    return task if seat == 0 else f"{task} #{seat + 1}"
+
+
+class RuleIndex:
+    """
+    A roster's rules compiled into bitmask lookup tables
+
+    Attributes:
+        people (list): Roster; bit i of every mask is people[i]
+        index (dict): Person -> bit position
+        slots (list): (column, task) per seat to fill each day; a task with
+            headcount n gets n columns, the first named after the task
+        eligible (dict): Task -> mask of people allowed to do it (the
+            person x task eligibility matrix, one row per task)
+        capacity (list): Most tasks per day for each person, None if unlimited
+        limited (list): Indices of the people with a capacity
+        avoid (list): Per person, mask of people to keep off their days
+        preferred (dict): Weekday code -> mask of people without a
+            preference or who prefer that day
+    """
+
+    def __init__(self, roster):
+        self.people = list(roster.people)
+        self.tasks = list(roster.tasks)
+        self.index = {person: i for i, person in enumerate(self.people)}
+        self.everyone = (1 << len(self.people)) - 1
+        bit = {person: 1 << i for i, person in enumerate(self.people)}
+
+        self.slots = [
+            (slot_name(task, seat), task)
+            for task in self.tasks
+            for seat in range(roster.headcount.get(task, 1))
+        ]
+        self.task_weights = {task: roster.task_weights.get(task, 1) for task in self.tasks}
+
+        self.eligible = {}
+        for task in self.tasks:
+            mask = self.everyone
+            for person in roster.restrictions.get(task, ()):
+                mask &= ~bit[person]
+            for person, skills in roster.skills.items():
+                if task not in skills:
+                    mask &= ~bit[person]
+            self.eligible[task] = mask
+
+        self.capacity = [roster.max_daily.get(person) for person in self.people]
+        self.limited = [i for i, limit in enumerate(self.capacity) if limit is not None]
+
+        self.avoid = [0] * len(self.people)
+        for first, second in roster.avoid_pairs:
+            self.avoid[self.index[first]] |= bit[second]
+            self.avoid[self.index[second]] |= bit[first]
+
+        self.preferred = {}
+        for code in Config.WEEKDAYS:
+            mask = self.everyone
+            for person, days in roster.preferred_days.items():
+                if days and code not in days:
+                    mask &= ~bit[person]
+            self.preferred[code] = mask
+
+    def allows(self, person, task):
+        """Whether person may do task at all (skills and exclusions)"""
+        i = self.index.get(person)
+        return i is not None and self.eligible.get(task, 0) >> i & 1 == 1
+
+    def weekday(self, day):
+        """Weekday code for a day key (a code already, or an ISO date)"""
+        if day in self.preferred:
+            return day
+        return Config.WEEKDAYS[date.fromisoformat(day).weekday()]
@@ -0,0 +1,214 @@
+"""
+Compact schedules for the MuniAPMs Task Scheduler
+
+A generated schedule is a dict of day -> column -> person name, which costs a
+few hundred bytes per cell once the dicts are counted. Schedule stores the
+same thing as one array('h') of interned person ids, row-major by day, with
+the day, column and people tuples shared between schedules from the same
+scheduler. Views by day and column are memoryview slices of that buffer,
+hashing and equality compare the raw bytes, and to_dict() gives back the
+legacy form the app and utils expect.
+"""
+
+from array import array
+from collections import defaultdict
+
+HOLIDAY = "🏝️ Holiday"
+UNASSIGNED = "❌ No one available"
+
+# Same codes as utils.schedule_to_matrix, so as_matrix() feeds matrix_statistics
+HOLIDAY_CODE = -1
+UNASSIGNED_CODE = -2
+# A column the day doesn't have (schedules whose days differ)
+NO_SLOT_CODE = -3
+
+_SENTINELS = {HOLIDAY: HOLIDAY_CODE, UNASSIGNED: UNASSIGNED_CODE}
+_MAX_PEOPLE = 2 ** 15 - 1
+
+
+class Schedule:
+    """
+    A schedule as a days x columns grid of int16 person ids
+
+    Args:
+        days (tuple): Day keys, in schedule order
+        columns (tuple): Slot columns (task names, "Task #2" for extra seats)
+        people (tuple): Person names; a cell holds an index into it,
+            HOLIDAY_CODE, UNASSIGNED_CODE or NO_SLOT_CODE
+        cells (array): array('h') of len(days) * len(columns) codes
+        tasks (tuple): Task behind each column (defaults to the columns)
+    """
+
+    __slots__ = ("days", "columns", "tasks", "people", "cells", "_day_index", "_hash")
+
+    def __init__(self, days, columns, people, cells, tasks=None):
+        if len(cells) != len(days) * len(columns):
+            raise ValueError(
+                f"Expected {len(days) * len(columns)} cells for {len(days)} days x "
+                f"{len(columns)} columns, got {len(cells)}"
+            )
+        self.days = tuple(days)
+        self.columns = tuple(columns)
+        self.tasks = self.columns if tasks is None else tuple(tasks)
+        self.people = tuple(people)
+        self.cells = cells
+        self._day_index = None
+        self._hash = None
+
+    @classmethod
+    def from_dict(cls, schedule, people=(), columns=None, tasks=None, days=None):
+        """
+        Intern a legacy schedule dict
+
+        Args:
+            schedule (dict): day -> column -> person name or sentinel
+            people (sequence): Person id order; anyone else assigned is
+                appended in order of first appearance. Pass the same tuple
+                (e.g. scheduler.people) to share it between schedules.
+            columns (sequence): Column order (defaults to every day's columns,
+                in order of first appearance); a day without a column
+                stores NO_SLOT_CODE there
+            tasks (sequence): Task behind each column
+            days (tuple): Shared day tuple to use when it matches the
+                schedule's days in order
+        """
+        if days is None or tuple(schedule) != days:
+            days = tuple(schedule)
+        if columns is None:
+            columns = tuple(dict.fromkeys(
+                column for day in days for column in schedule[day]
+            ))
+        people = people if isinstance(people, tuple) else tuple(people)
+        codes = dict(_SENTINELS)
+        codes.update((person, i) for i, person in enumerate(people))
+        extra = []
+
+        cells = array("h")
+        for day in days:
+            assigned = schedule[day]
+            for column in columns:
+                if column not in assigned:
+                    cells.append(NO_SLOT_CODE)
+                    continue
+                person = assigned[column]
+                code = codes.get(person)
+                if code is None:
+                    code = codes[person] = len(people) + len(extra)
+                    if code > _MAX_PEOPLE:
+                        raise ValueError(f"Schedule has more than {_MAX_PEOPLE} people")
+                    extra.append(person)
+                cells.append(code)
+        if extra:
+            people += tuple(extra)
+        return cls(days, columns, people, cells, tasks)
+
+    def __len__(self):
+        return len(self.days)
+
+    def __iter__(self):
+        return iter(self.days)
+
+    def __repr__(self):
+        return (f"Schedule({len(self.days)} days x {len(self.columns)} columns, "
+                f"{len(self.people)} people)")
+
+    def __eq__(self, other):
+        if not isinstance(other, Schedule):
+            return NotImplemented
+        return (
+            self.cells == other.cells
+            and self.days == other.days
+            and self.columns == other.columns
+            and self.tasks == other.tasks
+            and self.people == other.people
+        )
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash((self.days, self.columns, self.tasks, self.people,
+                               self.cells.tobytes()))
+        return self._hash
+
+    def __reduce__(self):
+        # The cached hash and day index are per process
+        return Schedule, (self.days, self.columns, self.people, self.cells, self.tasks)
+
+    @property
+    def nbytes(self):
+        """Size of the cell buffer"""
+        return self.cells.itemsize * len(self.cells)
+
+    def name(self, code):
+        """Person name (or sentinel) for a cell code; None where the day has no such column"""
+        if code == HOLIDAY_CODE:
+            return HOLIDAY
+        if code == UNASSIGNED_CODE:
+            return UNASSIGNED
+        if code == NO_SLOT_CODE:
+            return None
+        return self.people[code]
+
+    def row(self, day):
+        """Position of a day in the schedule"""
+        if self._day_index is None:
+            self._day_index = {key: i for i, key in enumerate(self.days)}
+        return self._day_index[day]
+
+    def by_day(self, day):
+        """One day's codes, in column order, as a memoryview of the buffer"""
+        width = len(self.columns)
+        start = self.row(day) * width
+        return memoryview(self.cells)[start:start + width]
+
+    def by_column(self, column):
+        """One column's codes, in day order, as a strided memoryview of the buffer"""
+        return memoryview(self.cells)[self.columns.index(column)::len(self.columns)]
+
+    def by_task(self, task):
+        """column -> by_column view for every seat of a task"""
+        return {
+            column: self.by_column(column)
+            for column, owner in zip(self.columns, self.tasks) if owner == task
+        }
+
+    def by_person(self, person):
+        """Lazily yield (day, column) for each of a person's assignments"""
+        code = self.people.index(person)
+        width = len(self.columns)
+        position = -1
+        cells = self.cells
+        while True:
+            try:
+                position = cells.index(code, position + 1)
+            except ValueError:
+                return
+            yield self.days[position // width], self.columns[position % width]
+
+    def as_matrix(self):
+        """days x columns int16 NumPy array sharing the buffer (numpy imported on demand)"""
+        import numpy as np
+        return np.frombuffer(self.cells, dtype=np.int16).reshape(len(self.days), len(self.columns))
+
+    def to_dict(self):
+        """The legacy day -> column -> name dict used by the app and utils"""
+        names = self.people
+        width = len(self.columns)
+        schedule = {}
+        for i, day in enumerate(self.days):
+            row = self.cells[i * width:(i + 1) * width]
+            schedule[day] = {
+                column: names[code] if code >= 0 else self.name(code)
+                for column, code in zip(self.columns, row) if code != NO_SLOT_CODE
+            }
+        return schedule
+
+    def person_tasks(self):
+        """The legacy person -> day -> [task] mapping generate_schedule returns"""
+        person_tasks = defaultdict(lambda: defaultdict(list))
+        width = len(self.columns)
+        for position, code in enumerate(self.cells):
+            if code >= 0:
+                person_tasks[self.people[code]][self.days[position // width]].append(
+                    self.tasks[position % width]
+                )
+        return person_tasks
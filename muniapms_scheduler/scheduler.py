@@ -0,0 +1,377 @@
+"""
+Core scheduling algorithm for the MuniAPMs Task Scheduler
+
+Pure Python with no Streamlit or pandas imports, so batch jobs and the CLI
+can use it without the web app's startup cost.
+"""
+
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+
+from .config import Config
+from .feasibility import DayPlan, check_feasibility
+from .improve import improve_schedule
+from .metrics import no_phase
+from .optimal import optimal_assignment
+from .repair import repair_schedule
+from .roster import Roster
+from .schedule import Schedule
+from .selection import SelectionEngine, derive_seed, week_numbers
+
+# Task Scheduler class
+class TaskScheduler:
+    ENGINES = ("greedy", "optimal")
+
+    def __init__(self, seed=None, engine="greedy", roster=None, constrained_first=False):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {self.ENGINES}")
+        # Team and rules; defaults to the built-in Config team
+        self.roster = roster or Roster.from_config()
+        self.rules = self.roster.compile()
+        self.people = self.rules.people
+        self.tasks = self.rules.tasks
+        self.task_weights = self.rules.task_weights
+        # Shared by every compact Schedule this scheduler interns
+        self._layout = (
+            tuple(self.people),
+            tuple(column for column, _ in self.rules.slots),
+            tuple(task for _, task in self.rules.slots),
+            tuple(Config.WEEKDAYS),
+        )
+        self.weekdays = Config.WEEKDAYS
+        self.weekday_display = Config.WEEKDAY_DISPLAY
+        # int, random.Random or numpy Generator; None draws a fresh seed per run
+        self.seed = seed
+        # "greedy" priority tiers, or "optimal" min-cost flow per week
+        self.engine = engine
+        # Greedy only: fill each day's most constrained slots first and keep
+        # scarce people for them. Changes which schedule a seed produces.
+        self.constrained_first = constrained_first
+
+    def is_valid_assignment(self, person, task, day, availability):
+        """Check if a person can be assigned a task on a given day"""
+        if day in availability.get(person, []):
+            return False
+        return self.rules.allows(person, task)
+
+    def compact(self, schedule):
+        """Intern a generated schedule dict as a Schedule sharing this team's tuples"""
+        people, columns, tasks, weekdays = self._layout
+        return Schedule.from_dict(schedule, people, columns, tasks, weekdays)
+
+    def generate_schedule(self, availability, holidays, seed=None, state=None, metrics=None):
+        """
+        Generate the task schedule based on availability and holidays
+
+        Returns (schedule, person_tasks, seed). Passing the returned seed back
+        in with the same inputs reproduces the schedule exactly. A state (e.g.
+        HistoryStore.window_state) seeds the fairness counters with recent
+        history; a Metrics instance collects timers and tier counters.
+        """
+        seed = derive_seed(self.seed if seed is None else seed)
+        counts = state.copy().person_task_count if state is not None else {}
+        schedule, person_tasks = self._schedule_days(
+            self.weekdays, availability, holidays, random.Random(seed), counts, metrics
+        )
+        return schedule, person_tasks, seed
+
+    def generate_variants(self, variants, seed=None, state=None):
+        """
+        Schedule several (availability, holidays) variants of one week
+
+        Every variant runs with the same seed from the same state, so results
+        differ only where the inputs do. The greedy engine builds its rule
+        and history masks once for the batch and forks them per variant.
+        Yields (schedule, person_tasks) per variant, in order.
+        """
+        seed = derive_seed(self.seed if seed is None else seed)
+        shared = None
+        if self.engine == "greedy":
+            counts = state.copy().person_task_count if state is not None else {}
+            shared = SelectionEngine(self.people, self.tasks, self.weekdays, {},
+                                     person_task_count=counts, rules=self.rules)
+        for availability, holidays in variants:
+            counts = state.copy().person_task_count if state is not None else {}
+            rng = random.Random(seed)
+            if shared is None:
+                yield self._schedule_days(self.weekdays, availability, holidays, rng, counts)
+            else:
+                yield self._schedule_days_greedy(self.weekdays, availability, holidays, rng, counts,
+                                                 None, no_phase, engine=shared.fork(availability))
+
+    def generate_horizon(self, availability, holidays, start=None, weeks=None,
+                         end=None, state=None, seed=None, metrics=None):
+        """
+        Schedule several weeks (or a date range) in one pass
+
+        Days are keyed by ISO date ("2024-07-01"). Availability and holidays
+        may list ISO dates or weekday codes ("fri"); a weekday code applies to
+        that day in every week. Passing the returned state back in continues
+        from the day after the previous horizon with its fairness counters, so
+        extending a plan by a week only schedules that week.
+
+        Returns (schedule, person_tasks, seed, state).
+        """
+        days, keys, unavailable, holiday_keys = self._horizon(
+            availability, holidays, start, weeks, end, state
+        )
+        counts = state.copy().person_task_count if state is not None else {}
+        seed = derive_seed(self.seed if seed is None else seed)
+        schedule, person_tasks = self._schedule_days(
+            keys, unavailable, holiday_keys, random.Random(seed), counts, metrics
+        )
+        next_state = FairnessState(counts, next_day=days[-1] + timedelta(days=1))
+        return schedule, person_tasks, seed, next_state
+
+    def improve_schedule(self, schedule, availability, budget=0.2, seed=None, state=None,
+                         max_steps=None):
+        """
+        Polish a generated schedule with move and swap local search
+
+        Balances weighted load, spreads tasks and avoids daily overload
+        within budget seconds (see improve.py). Returns (schedule,
+        person_tasks, report), where report.improvement is the drop in the
+        objective against the input schedule.
+        """
+        return improve_schedule(self, schedule, availability, budget=budget, seed=seed,
+                                state=state, max_steps=max_steps)
+
+    def check_feasibility(self, availability, holidays, start=None, weeks=None, end=None):
+        """
+        Find days whose slots cannot all be covered, before assigning anything
+
+        Checks the week generate_schedule would plan, or with start (and weeks
+        or end) the horizon generate_horizon would. Each day is solved as a
+        bipartite matching of slots to available, eligible people within
+        their daily capacity, so a reported shortfall is certain whatever
+        the engine or seed.
+
+        Returns:
+            dict: day -> columns left uncovered, for days with a shortfall
+        """
+        if start is None and weeks is None and end is None:
+            return check_feasibility(self.rules, self.weekdays, availability, holidays)
+        _, keys, unavailable, holiday_keys = self._horizon(
+            availability, holidays, start, weeks, end, None
+        )
+        return check_feasibility(self.rules, keys, unavailable, holiday_keys)
+
+    def _horizon(self, availability, holidays, start, weeks, end, state):
+        """Days, day keys, expanded availability and holiday keys of a horizon"""
+        if start is None:
+            if state is None or state.next_day is None:
+                raise ValueError("start date is required when not continuing from a state")
+            start = state.next_day
+        days = horizon_days(start, weeks=weeks, end=end)
+        if not days:
+            raise ValueError("horizon contains no weekdays")
+
+        keys = [day.isoformat() for day in days]
+        unavailable = {
+            person: _expand_days(entries, days)
+            for person, entries in availability.items()
+        }
+        return days, keys, unavailable, _expand_days(holidays, days)
+
+    def repair_schedule(self, schedule, availability, changes, start=None, state=None,
+                        seed=None):
+        """
+        Patch a schedule after availability changes instead of regenerating it
+
+        Only slots the change invalidates are re-picked (see repair.py), and
+        days before start are never touched. Returns (schedule, diff, seed),
+        where diff lists (day, column, before, after) for each changed slot.
+        """
+        return repair_schedule(self, schedule, availability, changes, start=start,
+                               state=state, seed=seed)
+
+    def _schedule_days(self, days, availability, holidays, rng, person_task_count,
+                       metrics=None):
+        """Assign every task on days in order, updating person_task_count in place"""
+        phase = metrics.phase if metrics is not None else no_phase
+        with phase("generate", profile=True):
+            if self.engine == "optimal":
+                with phase("generate.solve"):
+                    result = self._schedule_days_optimal(
+                        days, availability, holidays, rng, person_task_count
+                    )
+            else:
+                result = self._schedule_days_greedy(
+                    days, availability, holidays, rng, person_task_count, metrics, phase
+                )
+        if metrics is not None:
+            metrics.record_schedule(result[0], "❌ No one available", "🏝️ Holiday")
+        return result
+
+    def _schedule_days_greedy(self, days, availability, holidays, rng, person_task_count,
+                              metrics, phase, engine=None):
+        """Priority-tier assignment, one slot at a time (engine: a fresh fork to reuse)"""
+        schedule = {}
+        person_tasks = defaultdict(lambda: defaultdict(list))
+        with phase("generate.index"):
+            if engine is None:
+                engine = SelectionEngine(
+                    self.people, self.tasks, days, availability,
+                    person_task_count=person_task_count, rules=self.rules,
+                    tier_counts=metrics.tiers if metrics is not None else None
+                )
+
+        weeks = week_numbers(days, self.rules.weekday)
+        with phase("generate.assign"):
+            for d, day in enumerate(days):
+                if d and weeks[d] != weeks[d - 1]:
+                    engine.new_week(person_task_count)
+                schedule[day] = {}
+
+                if day in holidays:
+                    for slot, task in self.rules.slots:
+                        schedule[day][slot] = "🏝️ Holiday"
+                    continue
+
+                slots = self.rules.slots
+                plan = None
+                if self.constrained_first:
+                    plan = DayPlan(engine, day, slots)
+                    slots = plan.slots
+
+                seated = {}
+                for position, (slot, task) in enumerate(slots):
+                    keeps_feasible = plan.guard(position, seated) if plan is not None else None
+                    chosen = engine.select(task, day, rng, exclude=seated.get(task, 0),
+                                           keeps_feasible=keeps_feasible)
+                    if plan is not None:
+                        plan.taken(chosen)
+
+                    if chosen is None:
+                        schedule[day][slot] = "❌ No one available"
+                        continue
+
+                    schedule[day][slot] = chosen
+                    seated[task] = seated.get(task, 0) | 1 << engine.index[chosen]
+                    person_tasks[chosen][day].append(task)
+                    counts = person_task_count.setdefault(chosen, {})
+                    counts[task] = counts.get(task, 0) + 1
+                    engine.assign(chosen, task, day)
+
+                if plan is not None:
+                    # Back to roster column order
+                    schedule[day] = {slot: schedule[day][slot] for slot, _ in self.rules.slots}
+
+        return schedule, person_tasks
+
+    def _schedule_days_optimal(self, days, availability, holidays, rng, person_task_count):
+        """
+        Solve each week of working days as a min-cost flow
+
+        Skills, exclusions, headcount and daily capacity are honoured;
+        avoided pairings and preferred days only shape the greedy engine.
+        """
+        unavailable = {person: set(days_off) for person, days_off in availability.items()}
+        slot_task = dict(self.rules.slots)
+        seat_of = {slot: task for slot, task in self.rules.slots if slot != task}
+        seat_of.update({task: task for task in seat_of.values()})
+        weights = {slot: self.task_weights[task] for slot, task in self.rules.slots}
+        capacity = dict(zip(self.people, self.rules.capacity))
+
+        def is_eligible(person, slot, day):
+            return self.is_valid_assignment(person, slot_task[slot], day, unavailable)
+
+        working = [day for day in days if day not in holidays]
+        week = len(self.weekdays)
+        assignment = {}
+        for start in range(0, len(working), week):
+            load = {
+                person: sum(count * self.task_weights.get(task, 1) for task, count in counts.items())
+                for person, counts in person_task_count.items()
+            }
+            solved = optimal_assignment(
+                self.people, list(slot_task), working[start:start + week], is_eligible,
+                task_weights=weights, person_load=load, rng=rng,
+                daily_capacity=capacity, seat_of=seat_of
+            )
+            for (day, slot), person in solved.items():
+                if person is not None:
+                    counts = person_task_count.setdefault(person, {})
+                    task = slot_task[slot]
+                    counts[task] = counts.get(task, 0) + 1
+            assignment.update(solved)
+
+        schedule = {}
+        person_tasks = defaultdict(lambda: defaultdict(list))
+        for day in days:
+            schedule[day] = {}
+            for slot, task in self.rules.slots:
+                if day in holidays:
+                    schedule[day][slot] = "🏝️ Holiday"
+                elif assignment[(day, slot)] is None:
+                    schedule[day][slot] = "❌ No one available"
+                else:
+                    chosen = assignment[(day, slot)]
+                    schedule[day][slot] = chosen
+                    person_tasks[chosen][day].append(task)
+        return schedule, person_tasks
+
+class FairnessState:
+    """Fairness counters carried from one horizon into the next"""
+
+    def __init__(self, person_task_count=None, next_day=None):
+        self.person_task_count = {
+            person: dict(counts) for person, counts in (person_task_count or {}).items()
+        }
+        self.next_day = next_day
+
+    def copy(self):
+        return FairnessState(self.person_task_count, self.next_day)
+
+    def record(self, person_tasks):
+        """Add a schedule's person -> day -> [task] assignments to the counters"""
+        for person, days in person_tasks.items():
+            counts = self.person_task_count.setdefault(person, {})
+            for tasks in days.values():
+                for task in tasks:
+                    counts[task] = counts.get(task, 0) + 1
+
+    def to_dict(self):
+        """JSON-serialisable form, e.g. for saving between CLI runs"""
+        return {
+            "person_task_count": self.person_task_count,
+            "next_day": self.next_day.isoformat() if self.next_day else None
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        next_day = data.get("next_day")
+        return cls(
+            data.get("person_task_count"),
+            date.fromisoformat(next_day) if next_day else None
+        )
+
+def horizon_days(start, weeks=None, end=None):
+    """Weekdays from start for a number of weeks or up to end (inclusive)"""
+    if isinstance(start, str):
+        start = date.fromisoformat(start)
+    if isinstance(end, str):
+        end = date.fromisoformat(end)
+    if end is None:
+        if weeks is None:
+            raise ValueError("either weeks or end must be given")
+        end = start + timedelta(weeks=weeks) - timedelta(days=1)
+    elif weeks is not None:
+        raise ValueError("give either weeks or end, not both")
+
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < len(Config.WEEKDAYS):
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+def _expand_days(entries, days):
+    """Resolve ISO dates and recurring weekday codes to the ISO keys in days"""
+    wanted = {str(entry) for entry in entries}
+    return {
+        day.isoformat() for day in days
+        if day.isoformat() in wanted or Config.WEEKDAYS[day.weekday()] in wanted
+    }
@@ -0,0 +1,335 @@
+"""
+Candidate selection engine for the MuniAPMs Task Scheduler
+
+People are numbered by their position in the roster and every set of people
+is stored as an integer bitmask, so the priority tiers used by
+TaskScheduler.generate_schedule become a handful of AND operations instead of
+list comprehensions over the whole team.
+"""
+
+import copy
+import random
+from collections import defaultdict
+
+from .config import Config
+
+
+def derive_seed(source=None):
+    """
+    Turn a seed source into a concrete integer seed for one scheduling run
+
+    Args:
+        source: None for fresh OS entropy, an int seed, a random.Random
+            instance or a NumPy Generator (anything with .integers)
+
+    Returns:
+        int: Seed to build the run's random.Random from
+    """
+    if source is None:
+        return random.SystemRandom().getrandbits(63)
+    if isinstance(source, bool):
+        raise TypeError("seed must be an int, random.Random or numpy Generator")
+    if isinstance(source, int):
+        return source
+    if isinstance(source, random.Random):
+        return source.getrandbits(63)
+    if hasattr(source, "integers"):
+        return int(source.integers(2 ** 63))
+    raise TypeError("seed must be an int, random.Random or numpy Generator")
+
+
+if hasattr(int, "bit_count"):
+    def count_bits(mask):
+        """Number of people in a bitmask"""
+        return mask.bit_count()
+else:  # Python < 3.10
+    def count_bits(mask):
+        """Number of people in a bitmask"""
+        return bin(mask).count("1")
+
+
+def nth_bit(mask, n):
+    """
+    Index of the n-th (0-based) set bit of mask, counting from bit 0
+
+    Bisects on the bit position, counting the set bits below the midpoint
+    each step, so a pick takes O(log n) popcounts for a team of n people
+    rather than a Python-level step per set bit.
+    """
+    low, high = 0, mask.bit_length()
+    # Smallest position whose lower bits already hold more than n set bits
+    while low < high:
+        middle = (low + high) // 2
+        if count_bits(mask & ((1 << middle) - 1)) > n:
+            high = middle
+        else:
+            low = middle + 1
+    return low - 1
+
+
+def priority_tier(eligible, never_done, buckets, levels):
+    """
+    The greedy priority tiers over one (day, task) slot
+
+    Args:
+        eligible (int): Mask of people who can take the slot
+        never_done (int): Mask of people who haven't done the task yet this week
+        buckets (dict): Load today -> mask of people with that load
+        levels (list): Sorted loads present in buckets
+
+    Returns:
+        tuple: (tier, mask) where tier is "zero_task", "never_done" or
+        "least_loaded" (the priority the mask came from; zero-task people
+        narrowed to those who haven't done the task are still "zero_task"),
+        or (None, 0) if nobody is eligible
+    """
+    if not eligible:
+        return None, 0
+
+    # Priority 1: People with 0 tasks today
+    zero_task = eligible & buckets.get(0, 0)
+    if zero_task:
+        # Among zero-task people, prefer those who haven't done this task
+        never = zero_task & never_done
+        return "zero_task", never or zero_task
+
+    # Priority 2: People who haven't done this task
+    never = eligible & never_done
+    if never:
+        return "never_done", never
+
+    # Priority 3: Least loaded person
+    for level in levels:
+        least_loaded = eligible & buckets[level]
+        if least_loaded:
+            return "least_loaded", least_loaded
+    return None, 0
+
+
+def count_levels(counts, everyone):
+    """
+    Masks of people grouped by count, lowest count first
+
+    Args:
+        counts (dict): person index -> count; people not listed count 0
+        everyone (int): Mask of the whole team
+    """
+    levels = {}
+    for i, count in counts.items():
+        levels[count] = levels.get(count, 0) | 1 << i
+    zero = everyone & ~sum(levels.values())
+    ranked = [levels[count] for count in sorted(levels)]
+    return [zero] + ranked if zero else ranked
+
+
+def week_numbers(days, weekday):
+    """
+    Week of each day in a run, counting from 0
+
+    A new week starts whenever the weekday doesn't move forward, so ISO
+    dates split at each Monday and a plain mon..fri run is one week.
+
+    Args:
+        days (list): Day keys in scheduling order
+        weekday (callable): Day key -> weekday code (RuleIndex.weekday)
+    """
+    numbers = []
+    week = 0
+    previous = None
+    for day in days:
+        position = Config.WEEKDAYS.index(weekday(day))
+        if previous is not None and position <= previous:
+            week += 1
+        numbers.append(week)
+        previous = position
+    return numbers
+
+
+class SelectionEngine:
+    """
+    Precomputed candidate index for one scheduling run
+
+    Args:
+        people (list): Roster in priority order (defines bit positions)
+        tasks (list): Task names
+        days (list): Day keys that will be scheduled
+        availability (dict): person -> iterable of unavailable day keys
+        restrictions (dict): task -> iterable of people who may not do it
+        person_task_count (dict): Optional person -> task -> count carried in
+            from earlier runs; breaks ties inside a tier (see new_week)
+        rules (RuleIndex): Compiled roster rules; replaces restrictions and
+            adds daily capacity, avoided pairings and preferred days
+        tier_counts (dict): Optional tier -> count, incremented on every pick
+            (Metrics.tiers)
+    """
+
+    def __init__(self, people, tasks, days, availability, restrictions=None,
+                 person_task_count=None, rules=None, tier_counts=None):
+        self.people = list(people)
+        self.tier_counts = tier_counts
+        self.index = {person: i for i, person in enumerate(self.people)}
+        everyone = (1 << len(self.people)) - 1
+
+        self.days = list(days)
+        self.everyone = everyone
+        self._reset_days(availability)
+
+        # Per-task eligibility sets (NO_SIZING-style exclusions)
+        self.rules = rules
+        self.preferred = None
+        if rules is not None:
+            self.allowed = {task: rules.eligible[task] for task in tasks}
+            self.preferred = {day: rules.preferred[rules.weekday(day)] for day in days}
+        else:
+            restrictions = restrictions or {}
+            self.allowed = {}
+            for task in tasks:
+                mask = everyone
+                for person in restrictions.get(task, ()):
+                    if person in self.index:
+                        mask &= ~(1 << self.index[person])
+                self.allowed[task] = mask
+
+        self.tasks = list(tasks)
+        self.new_week(person_task_count)
+
+    def _reset_days(self, availability):
+        """Per-day availability bitsets and empty load buckets"""
+        self.available = {}
+        for day in self.days:
+            mask = self.everyone
+            for person, unavailable in availability.items():
+                if person in self.index and day in unavailable:
+                    mask &= ~(1 << self.index[person])
+            self.available[day] = mask
+
+        # Per-day load buckets: load -> bitmask of people with that many tasks
+        # today, plus the sorted list of non-empty load levels
+        self.buckets = {day: {0: self.everyone} for day in self.days}
+        self.levels = {day: [0] for day in self.days}
+        self.daily_load = defaultdict(lambda: defaultdict(int))
+
+    def fork(self, availability):
+        """
+        A fresh engine for the same days, rules and history with other availability
+
+        Eligibility, preferred-day and history masks are shared with this
+        engine rather than rebuilt; only availability and loads start over.
+        Fork an engine nothing has been assigned on yet.
+        """
+        engine = copy.copy(self)
+        engine.never_done = dict(self.never_done)
+        engine._reset_days(availability)
+        return engine
+
+    def new_week(self, person_task_count=None):
+        """
+        Start a week: reset the "never done" tier and rank people by history
+
+        The tiers only look at the current week, so a run's first week with
+        no history draws exactly as the list-based scheduler did. Counts from
+        before the week (a carried state plus earlier weeks of a horizon)
+        break ties inside whichever tier a pick comes from: fewest tasks
+        overall first, then fewest turns at the task.
+        """
+        self.never_done = {task: self.everyone for task in self.tasks}
+        by_task = {task: {} for task in self.tasks}
+        totals = {}
+        for person, counts in (person_task_count or {}).items():
+            i = self.index.get(person)
+            if i is None:
+                continue
+            for task, times in counts.items():
+                if task in by_task and times:
+                    by_task[task][i] = times
+                    totals[i] = totals.get(i, 0) + times
+        self.fewest = {task: count_levels(counts, self.everyone) for task, counts in by_task.items()}
+        self.fewest_total = count_levels(totals, self.everyone)
+
+    def least_done(self, task, mask):
+        """The part of mask with the fewest earlier tasks, then the fewest turns at task"""
+        for ranking in (self.fewest_total, self.fewest[task]):
+            for level in ranking:
+                if mask & level:
+                    mask &= level
+                    break
+        return mask
+
+    def eligible(self, task, day):
+        """Bitmask of people who can take task on day"""
+        return self.available[day] & self.allowed[task]
+
+    def candidates(self, task, day, exclude=0):
+        """
+        Bitmask of the priority tier the next pick comes from
+
+        Args:
+            exclude (int): Mask of people to leave out, e.g. those already
+                filling another seat of the same task
+
+        Returns:
+            tuple: (tier, mask) where tier is one of "zero_task",
+            "never_done" or "least_loaded", or (None, 0) if nobody is eligible
+        """
+        eligible = self.eligible(task, day) & ~exclude
+        return priority_tier(eligible, self.never_done[task], self.buckets[day], self.levels[day])
+
+    def pick(self, mask, rng):
+        """
+        Choose one person from mask
+
+        Draws exactly as rng.choice would on the same people listed in roster
+        order, so a seeded run reproduces the list-based scheduler.
+        """
+        return self.people[nth_bit(mask, rng.randrange(count_bits(mask)))]
+
+    def select(self, task, day, rng, exclude=0, keeps_feasible=None):
+        """
+        Pick the next person for (day, task), or None if nobody is eligible
+
+        Args:
+            keeps_feasible (callable): Optional veto, person -> bool; a vetoed
+                person is dropped and the pick redrawn, falling through the
+                tiers if the whole tier is vetoed
+        """
+        while True:
+            tier, mask = self.candidates(task, day, exclude)
+            if not mask:
+                return None
+            if self.preferred is not None:
+                # Within the tier, favour people who prefer this day
+                preferred = mask & self.preferred[day]
+                if preferred:
+                    mask = preferred
+            person = self.pick(self.least_done(task, mask), rng)
+            if keeps_feasible is None or keeps_feasible(person):
+                if self.tier_counts is not None:
+                    self.tier_counts[tier] += 1
+                return person
+            exclude |= 1 << self.index[person]
+
+    def assign(self, person, task, day):
+        """Record an assignment and move person to the next load bucket"""
+        bit = 1 << self.index[person]
+        self.never_done[task] &= ~bit
+
+        load = self.daily_load[day][person]
+        buckets = self.buckets[day]
+        buckets[load] &= ~bit
+        if not buckets[load]:
+            del buckets[load]
+            self.levels[day].remove(load)
+        if load + 1 not in buckets:
+            buckets[load + 1] = 0
+            self.levels[day].append(load + 1)
+            self.levels[day].sort()
+        buckets[load + 1] |= bit
+        self.daily_load[day][person] = load + 1
+
+        if self.rules is not None:
+            i = self.index[person]
+            # Full people and anyone paired against this person drop out for the day
+            limit = self.rules.capacity[i]
+            if limit is not None and load + 1 >= limit:
+                self.available[day] &= ~bit
+            self.available[day] &= ~self.rules.avoid[i]
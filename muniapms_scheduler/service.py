@@ -0,0 +1,391 @@
+"""
+Multi-team scheduling service for the MuniAPMs Task Scheduler
+
+A small asyncio HTTP/1.1 server (standard library only) that schedules many
+teams per request. Independent teams fan out over a process pool, and
+results are cached under a key built from the normalized availability,
+holidays, roster and options, so identical requests, including ones still
+in flight, are solved once.
+
+    muniapms-service --port 8080 --workers 4
+
+    POST /schedule  {"teams": [{"team": "ops", "availability": {"Max": ["mon"]},
+                                "holidays": ["fri"], "roster": {...}, "seed": 7}]}
+    GET  /stats     request, cache and latency counters
+    GET  /health
+
+Each team accepts the same options as the CLI: seed, engine, roster (the
+roster file format as an object), and start with weeks or end for a
+multi-week horizon.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from .config import Config
+from .roster import Roster
+from .scheduler import TaskScheduler
+
+MAX_BODY = 8 * 1024 * 1024
+CACHE_SIZE = 4096
+# Compiled rosters each worker keeps, least recently used dropped first
+ROSTER_CACHE_SIZE = 64
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _day(value):
+    """Weekday code for anything in Config.DAY_MAPPING, or an ISO date"""
+    text = str(value).strip()
+    code = Config.DAY_MAPPING.get(text.lower())
+    if code is not None:
+        return code
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise ValueError(f"Unknown day '{value}'") from None
+
+
+def _days(values, field):
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        raise ValueError(f"{field} must be a list of days")
+    return sorted({_day(value) for value in values if str(value).strip()})
+
+
+def normalize_team(team):
+    """
+    Canonical form of one team's request
+
+    Day names are mapped through Config.DAY_MAPPING, lists are sorted and
+    de-duplicated, empty entries dropped and the roster validated, so requests
+    that mean the same thing share one cache key. Raises ValueError for
+    anything that isn't a valid request (unknown days, holidays that aren't
+    a list, weeks that isn't a positive integer, start/end that aren't dates).
+    """
+    if not isinstance(team, dict):
+        raise ValueError("each team must be an object")
+    availability = team.get("availability") or {}
+    if not isinstance(availability, dict):
+        raise ValueError("availability must be an object of person -> list of days")
+    engine = team.get("engine", "greedy")
+    if engine not in TaskScheduler.ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {TaskScheduler.ENGINES}")
+    if not all(isinstance(days, list) for days in availability.values()):
+        raise ValueError("availability must be an object of person -> list of days")
+    seed = team.get("seed")
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+        raise ValueError("seed must be an integer")
+
+    weeks = team.get("weeks")
+    if weeks is not None and (isinstance(weeks, bool) or not isinstance(weeks, int) or weeks < 1):
+        raise ValueError("weeks must be a positive integer")
+
+    request = {
+        "availability": {
+            str(person): _days(days, "availability")
+            for person, days in sorted(availability.items()) if days
+        },
+        "holidays": _days(team.get("holidays"), "holidays"),
+        "engine": engine,
+        "seed": seed,
+    }
+    if team.get("roster") is not None:
+        request["roster"] = Roster.from_dict(team["roster"]).to_dict()
+    for option in ("start", "end"):
+        if team.get(option) is not None:
+            try:
+                request[option] = date.fromisoformat(str(team[option]).strip()).isoformat()
+            except ValueError:
+                raise ValueError(f"{option} must be an ISO date, got '{team[option]}'") from None
+    if weeks is not None:
+        request["weeks"] = weeks
+    return request
+
+
+def request_key(request):
+    """Cache key for a normalized team request"""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+_rosters = OrderedDict()
+
+
+def solve(request):
+    """Worker: schedule one normalized team request"""
+    roster = None
+    if "roster" in request:
+        key = request_key(request["roster"])
+        roster = _rosters.get(key)
+        if roster is None:
+            roster = _rosters[key] = Roster.from_dict(request["roster"])
+            if len(_rosters) > ROSTER_CACHE_SIZE:
+                _rosters.popitem(last=False)
+        else:
+            _rosters.move_to_end(key)
+    scheduler = TaskScheduler(seed=request["seed"], engine=request["engine"], roster=roster)
+
+    if "start" in request or "weeks" in request or "end" in request:
+        weeks = request.get("weeks") if request.get("weeks") or request.get("end") else 1
+        schedule, _, seed, state = scheduler.generate_horizon(
+            request["availability"], request["holidays"], start=request.get("start"),
+            weeks=weeks, end=request.get("end")
+        )
+        return {"seed": seed, "schedule": schedule, "state": state.to_dict()}
+
+    schedule, _, seed = scheduler.generate_schedule(request["availability"], request["holidays"])
+    return {"seed": seed, "schedule": schedule}
+
+
+def solve_batch(requests):
+    """Worker: solve several team requests in one round trip; errors are returned per team"""
+    results = []
+    for request in requests:
+        try:
+            results.append(solve(request))
+        except (ValueError, TypeError) as error:
+            results.append({"error": str(error)})
+    return results
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+class SchedulingService:
+    """
+    Request handling, result cache and in-flight de-duplication
+
+    Args:
+        workers (int): Worker processes (defaults to the CPU count); 0 solves
+            on the event loop's default thread pool instead
+        cache_size (int): Most results kept, least recently used evicted
+    """
+
+    def __init__(self, workers=None, cache_size=CACHE_SIZE):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers else None
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.in_flight = {}
+        self.counters = {"requests": 0, "teams": 0, "cache_hits": 0, "deduplicated": 0,
+                         "solved": 0, "errors": 0}
+        self.latencies = []
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def schedule_teams(self, teams):
+        """
+        Results for a batch of teams
+
+        Each team is answered from the cache, by an identical solve already
+        in flight, or by a new solve; new solves are split into one chunk per
+        worker so a large batch costs a few pool round trips, not one per team.
+        """
+        loop = asyncio.get_running_loop()
+        entries = []
+        pending = {}
+        for team in teams:
+            self.counters["teams"] += 1
+            name = team.get("team") if isinstance(team, dict) else None
+            try:
+                request = normalize_team(team)
+            except (ValueError, TypeError, KeyError) as error:
+                entries.append((name, None, {"error": str(error)}, False))
+                continue
+            key = request_key(request)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.counters["cache_hits"] += 1
+                entries.append((name, key, self.cache[key], True))
+            elif key in self.in_flight:
+                self.counters["deduplicated"] += 1
+                entries.append((name, key, self.in_flight[key], True))
+            else:
+                pending[key] = request
+                self.in_flight[key] = loop.create_future()
+                entries.append((name, key, self.in_flight[key], False))
+
+        if pending:
+            keys = list(pending)
+            size = -(-len(keys) // max(1, self.workers))
+            await asyncio.gather(*(
+                self._solve_chunk(keys[i:i + size], [pending[key] for key in keys[i:i + size]])
+                for i in range(0, len(keys), size)
+            ))
+
+        results = []
+        for name, key, result, cached in entries:
+            if isinstance(result, asyncio.Future):
+                result = await asyncio.shield(result)
+            if "error" in result:
+                self.counters["errors"] += 1
+                results.append({"team": name, "error": result["error"]})
+            else:
+                results.append(dict(result, team=name, key=key, cached=cached))
+        return results
+
+    async def _solve_chunk(self, keys, requests):
+        try:
+            solved = await asyncio.get_running_loop().run_in_executor(
+                self.pool, solve_batch, requests
+            )
+        except Exception as error:  # a broken pool fails this chunk only
+            solved = [{"error": f"{type(error).__name__}: {error}"}] * len(keys)
+        for key, result in zip(keys, solved):
+            future = self.in_flight.pop(key)
+            if "error" not in result:
+                self.counters["solved"] += 1
+                self.cache[key] = result
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+            future.set_result(result)
+
+    async def handle(self, method, path, body):
+        """Route one request; returns (status, payload)"""
+        path = path.split("?", 1)[0]
+        if path == "/health":
+            return 200, {"status": "ok"}
+        if path == "/stats":
+            return 200, self.stats()
+        if path != "/schedule":
+            return 404, {"error": f"no route for {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError as error:
+            return 400, {"error": f"invalid JSON: {error}"}
+        teams = payload.get("teams", [payload]) if isinstance(payload, dict) else payload
+        if not isinstance(teams, list):
+            return 400, {"error": "expected {\"teams\": [...]} or a single team object"}
+
+        started = time.perf_counter()
+        self.counters["requests"] += 1
+        results = await self.schedule_teams(teams)
+        self.latencies.append(time.perf_counter() - started)
+        if len(self.latencies) > 100_000:
+            del self.latencies[:50_000]
+        return 200, {"results": results}
+
+    def stats(self):
+        latencies = self.latencies
+        return dict(
+            self.counters,
+            workers=self.workers,
+            cached_results=len(self.cache),
+            p50_ms=percentile(latencies, 0.50) * 1000,
+            p99_ms=percentile(latencies, 0.99) * 1000,
+        )
+
+    async def serve_connection(self, reader, writer):
+        """HTTP/1.1 with keep-alive: one request at a time per connection"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, path, version = line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, False)
+                    break
+
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = headers.get("content-length") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    await self._respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    break
+                length = int(length)
+                if length > MAX_BODY:
+                    await self._respond(writer, 413, {"error": "request body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                try:
+                    status, payload = await self.handle(method, path, body)
+                except Exception as error:  # keep serving other requests
+                    status, payload = 500, {"error": f"{type(error).__name__}: {error}"}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+            # Client went away, or the server is shutting down
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+
+async def start_server(service, host="127.0.0.1", port=8080):
+    """Start listening; returns the asyncio Server (port 0 picks a free port)"""
+    return await asyncio.start_server(service.serve_connection, host, port)
+
+
+async def _serve(args):
+    service = SchedulingService(workers=args.workers, cache_size=args.cache_size)
+    server = await start_server(service, args.host, args.port)
+    host, port = server.sockets[0].getsockname()[:2]
+    print(f"muniapms-service listening on http://{host}:{port} with {service.workers} workers",
+          flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="muniapms-service",
+        description="Serve batched multi-team scheduling over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
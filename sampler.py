@@ -0,0 +1,147 @@
+"""
+Best-of-N schedule sampling for the MuniAPMs Task Scheduler
+
+The greedy scheduler breaks ties at random, so schedule quality varies from
+run to run. The sampler draws many independently seeded schedules across a
+process pool, scores each with a fairness objective and keeps the best few.
+"""
+
+import heapq
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from muniapms_scheduler import Config, TaskScheduler, derive_seed
+from utils import matrix_statistics, schedule_to_matrix
+
+# Objective weights: spread of task counts, spread of weighted load, and a
+# heavy penalty for every slot left without anyone
+LOAD_VARIANCE_WEIGHT = 1.0
+WEIGHTED_VARIANCE_WEIGHT = 1.0
+UNASSIGNED_WEIGHT = 10.0
+
+
+class Candidate:
+    """One sampled schedule (legacy dict form) and its fairness score (lower is better)"""
+
+    __slots__ = ("score", "seed", "schedule")
+
+    def __init__(self, score, seed, schedule):
+        self.score = score
+        self.seed = seed
+        self.schedule = schedule
+
+    def __repr__(self):
+        return f"Candidate(score={self.score:.3f}, seed={self.seed})"
+
+
+class SampleResult:
+    """Best candidates from a sampling run plus throughput figures"""
+
+    def __init__(self, best, samples, elapsed, workers):
+        self.best = best
+        self.samples = samples
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def samples_per_second(self):
+        return self.samples / self.elapsed if self.elapsed > 0 else float("inf")
+
+
+def fairness_score(schedule, people=None, task_weights=None):
+    """
+    Score a schedule for fairness (lower is better)
+
+    Args:
+        schedule (dict): Generated schedule dictionary
+        people (list): Everyone who could have been assigned (defaults to Config.PEOPLE)
+        task_weights (dict): Task weights (defaults to Config.TASK_WEIGHTS)
+
+    Returns:
+        float: Weighted sum of task-count variance, weighted-load variance and
+        unassigned slots
+    """
+    people = people or Config.PEOPLE
+    task_weights = task_weights or Config.TASK_WEIGHTS
+    matrix, _, tasks, people = schedule_to_matrix(schedule, people)
+    weights = [task_weights.get(task, 1) for task in tasks]
+    return matrix_score(matrix, len(people), weights)
+
+
+def matrix_score(matrix, n_people, weights):
+    """fairness_score for a schedule already in matrix form"""
+    arrays = matrix_statistics(matrix, n_people, weights)
+    return float(
+        LOAD_VARIANCE_WEIGHT * arrays['person_counts'].var()
+        + WEIGHTED_VARIANCE_WEIGHT * arrays['weighted_loads'].var()
+        + UNASSIGNED_WEIGHT * arrays['unassigned_tasks']
+    )
+
+
+def _sample_chunk(scheduler, availability, holidays, seeds, top_k):
+    """
+    Worker: generate and score one schedule per seed, keep the best top_k
+
+    The scheduler (roster, rules and engine) is pickled over from the
+    parent. Schedules are held as compact Schedule objects, which are also
+    what crosses back to the parent process.
+    """
+    weights = None
+    scored = []
+    for seed in seeds:
+        schedule, _, _ = scheduler.generate_schedule(availability, holidays, seed=seed)
+        compact = scheduler.compact(schedule)
+        if weights is None:
+            weights = [scheduler.task_weights.get(task, 1) for task in compact.tasks]
+        score = matrix_score(compact.as_matrix(), len(compact.people), weights)
+        scored.append((score, seed, compact))
+    return heapq.nsmallest(top_k, scored, key=lambda item: (item[0], item[1]))
+
+
+def sample_schedules(availability, holidays, samples=1000, top_k=5, workers=None,
+                     seed=None, scheduler=None):
+    """
+    Draw many schedules and return the fairest ones
+
+    Args:
+        availability (dict): person -> list of unavailable days
+        holidays (list): Company holidays
+        samples (int): Number of schedules to draw
+        top_k (int): Number of best candidates to return
+        workers (int): Worker processes (defaults to the CPU count); 1 runs
+            in-process without a pool
+        seed: Master seed (int, random.Random or numpy Generator); each sample
+            gets its own seed drawn from it, so a run is reproducible
+        scheduler (TaskScheduler): Roster, rules, engine and options to
+            sample with (defaults to the built-in Config team, greedy)
+
+    Returns:
+        SampleResult: Best candidates (ascending score) and samples/second
+    """
+    workers = workers or os.cpu_count() or 1
+    scheduler = scheduler or TaskScheduler()
+    master = random.Random(derive_seed(seed))
+    seeds = [master.getrandbits(63) for _ in range(samples)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        best = _sample_chunk(scheduler, availability, holidays, seeds, top_k)
+    else:
+        # A few chunks per worker keeps them busy without per-sample IPC
+        chunk_size = max(1, -(-samples // (workers * 4)))
+        chunks = [seeds[i:i + chunk_size] for i in range(0, samples, chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_sample_chunk, scheduler, availability, holidays, chunk, top_k)
+                for chunk in chunks
+            ]
+            best = [item for future in futures for item in future.result()]
+        best = heapq.nsmallest(top_k, best, key=lambda item: (item[0], item[1]))
+    elapsed = time.perf_counter() - start
+
+    return SampleResult(
+        [Candidate(score, seed, schedule.to_dict()) for score, seed, schedule in best],
+        samples, elapsed, workers
+    )
@@ -0,0 +1,247 @@
+"""
+What-if scenarios for the MuniAPMs Task Scheduler
+
+A scenario is a handful of changes to the current availability and holidays
+("Max is also off Thursday", "Friday becomes a holiday"). ScenarioRunner
+schedules a batch of them side by side: every variant runs against the same
+compiled roster rules and the same seed, so differences between results come
+from the changes alone. Variants not seen before are scheduled as one batch
+(TaskScheduler.generate_variants), which builds the rule and history masks
+once and shares them. Every result is kept under a key of its normalized
+inputs, so showing a scenario again (or a variant that works out the same as
+another) is a dictionary lookup.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from muniapms_scheduler import Config, derive_seed
+from utils import calculate_workload_statistics, check_schedule_conflicts
+
+BASELINE = "Current plan"
+
+CACHE_SIZE = 256
+
+
+def _day(value):
+    value = str(value).strip()
+    return Config.DAY_MAPPING.get(value.lower(), value)
+
+
+def _days(values):
+    return {_day(value) for value in values or () if str(value).strip()}
+
+
+class Scenario:
+    """
+    Changes to the current availability and holidays
+
+    Args:
+        name (str): Label shown in comparisons
+        unavailable (dict): person -> extra days they are off
+        available (dict): person -> days they are back after all
+        holidays (list): Extra company holidays
+        workdays (list): Current holidays that are worked after all
+
+    Days may be weekday codes, anything in Config.DAY_MAPPING or ISO dates.
+    """
+
+    def __init__(self, name, unavailable=None, available=None, holidays=(), workdays=()):
+        self.name = name
+        self.unavailable = {person: _days(days) for person, days in (unavailable or {}).items()}
+        self.available = {person: _days(days) for person, days in (available or {}).items()}
+        self.holidays = _days(holidays)
+        self.workdays = _days(workdays)
+
+    def apply(self, availability, holidays):
+        """
+        Availability and holidays with this scenario's changes
+
+        Args:
+            availability (dict): Current person -> list of unavailable days
+            holidays (list): Current company holidays
+
+        Returns:
+            tuple: (availability, holidays), new objects in canonical form
+        """
+        changed = {person: _days(days) for person, days in availability.items()}
+        for person, days in self.unavailable.items():
+            changed[person] = changed.get(person, set()) | days
+        for person, days in self.available.items():
+            if person in changed:
+                changed[person] -= days
+        holidays = (_days(holidays) | self.holidays) - self.workdays
+        return (
+            {person: sorted(days) for person, days in sorted(changed.items())},
+            sorted(holidays)
+        )
+
+    def __repr__(self):
+        return f"Scenario({self.name!r})"
+
+
+class ScenarioResult:
+    """One scheduled scenario with its statistics and conflicts"""
+
+    def __init__(self, name, schedule, seed, stats, conflicts, elapsed, cached=False):
+        self.name = name
+        self.schedule = schedule
+        self.seed = seed
+        self.stats = stats
+        self.conflicts = conflicts
+        self.elapsed = elapsed
+        self.cached = cached
+
+    @property
+    def load_spread(self):
+        """Most minus fewest tasks per person"""
+        counts = self.stats['person_task_counts'].values()
+        return max(counts) - min(counts) if counts else 0
+
+    def __repr__(self):
+        return (f"ScenarioResult({self.name!r}, {len(self.conflicts)} conflicts, "
+                f"spread {self.load_spread})")
+
+
+def _freeze_state(state):
+    if state is None:
+        return None
+    return tuple(sorted(
+        (person, tuple(sorted(counts.items())))
+        for person, counts in state.person_task_count.items()
+    ))
+
+
+class ScenarioRunner:
+    """
+    Schedules batches of scenarios with one scheduler and remembers the results
+
+    Args:
+        scheduler (TaskScheduler): Supplies the engine and the compiled roster
+            rules every scenario shares
+        cache_size (int): Results to keep, least recently used dropped first
+
+    The cache is shared between threads (e.g. Streamlit sessions) and
+    guarded by a lock; scheduling itself runs in the calling thread.
+    """
+
+    def __init__(self, scheduler, cache_size=CACHE_SIZE):
+        self.scheduler = scheduler
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def run(self, availability, holidays, scenarios, seed=None, state=None):
+        """
+        Schedule the current inputs and every scenario
+
+        Args:
+            availability (dict): Current person -> list of unavailable days
+            holidays (list): Current company holidays
+            scenarios (list): Scenario objects to compare with the current plan
+            seed: One seed for the whole batch (int, random.Random or numpy
+                Generator); pass the same one again to get cached results
+            state (FairnessState): Fairness counters every variant starts from
+
+        Returns:
+            list: ScenarioResult for the current plan (named BASELINE), then
+            one per scenario, in order
+        """
+        seed = derive_seed(self.scheduler.seed if seed is None else seed)
+        variants = [(BASELINE, Scenario(BASELINE).apply(availability, holidays))]
+        variants += [(scenario.name, scenario.apply(availability, holidays)) for scenario in scenarios]
+        frozen = _freeze_state(state)
+        keys = [self._key(inputs, seed, frozen) for _, inputs in variants]
+
+        with self._lock:
+            found = {key: self.cache[key] for key in keys if key in self.cache}
+        pending = {}
+        for key, (_, inputs) in zip(keys, variants):
+            if key not in found and key not in pending:
+                pending[key] = inputs
+
+        computed = {}
+        if pending:
+            computed = dict(zip(pending, self._evaluate(list(pending.values()), seed, state)))
+            with self._lock:
+                for key, result in computed.items():
+                    self.cache[key] = result
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+
+        results = []
+        with self._lock:
+            for key, (name, _) in zip(keys, variants):
+                if key in found:
+                    self.hits += 1
+                    if key in self.cache:
+                        self.cache.move_to_end(key)
+                else:
+                    self.misses += 1
+                schedule, stats, conflicts, elapsed = found[key] if key in found else computed[key]
+                results.append(ScenarioResult(name, schedule, seed, stats, conflicts, elapsed,
+                                              cached=key in found))
+        return results
+
+    @staticmethod
+    def _key(inputs, seed, frozen_state):
+        availability, holidays = inputs
+        return (
+            tuple((person, tuple(days)) for person, days in availability.items() if days),
+            tuple(holidays), seed, frozen_state,
+        )
+
+    def _evaluate(self, variants, seed, state):
+        """Schedule a batch of variants and score each; yields results in order"""
+        started = time.perf_counter()
+        for schedule, _ in self.scheduler.generate_variants(variants, seed=seed, state=state):
+            raw = calculate_workload_statistics(schedule, self.scheduler.task_weights)
+            stats = {
+                'person_task_counts': {
+                    person: raw['person_task_counts'].get(person, 0) for person in self.scheduler.people
+                },
+                'weighted_loads': {
+                    person: raw['weighted_loads'].get(person, 0) for person in self.scheduler.people
+                },
+                'task_distribution': dict(raw['task_distribution']),
+                'total_tasks': int(raw['total_tasks']),
+                'holiday_days': int(raw['holiday_days']),
+                'unassigned_tasks': int(raw['unassigned_tasks']),
+            }
+            conflicts = check_schedule_conflicts(schedule)
+            finished = time.perf_counter()
+            yield schedule, stats, conflicts, finished - started
+            started = finished
+
+
+def comparison_table(results, people=None):
+    """
+    Side-by-side numbers for a batch of scenario results
+
+    Args:
+        results (list): ScenarioResult objects, e.g. from ScenarioRunner.run
+        people (list): People to list tasks for (defaults to Config.PEOPLE)
+
+    Returns:
+        dict: scenario name -> {row label -> value}, rows in the same order
+        for every scenario (pd.DataFrame of it has scenarios as columns)
+    """
+    table = {}
+    for result in results:
+        stats = result.stats
+        column = {
+            "Tasks assigned": stats['total_tasks'],
+            "Unassigned slots": stats['unassigned_tasks'],
+            "Holiday days": stats['holiday_days'],
+            "Conflicts": len(result.conflicts),
+            "Load spread (tasks)": result.load_spread,
+        }
+        for person in people or Config.PEOPLE:
+            column[f"{person}: tasks"] = stats['person_task_counts'].get(person, 0)
+        for person in people or Config.PEOPLE:
+            column[f"{person}: weighted load"] = stats['weighted_loads'].get(person, 0)
+        table[result.name] = column
+    return table
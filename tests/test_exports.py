@@ -0,0 +1,127 @@
+"""Export views follow the roster they are given"""
+
+import io
+import zipfile
+from datetime import date
+
+import pytest
+
+from exports import (
+    iter_assignment_rows,
+    iter_ics,
+    iter_person_rows,
+    iter_task_rows,
+    write_arrow,
+    write_bundle,
+    write_csv,
+    write_parquet,
+)
+from muniapms_scheduler import Config, Roster, TaskScheduler
+from utils import format_schedule_for_export
+
+ROSTER = Roster.from_dict({
+    "people": ["Ana", "Ben", "Cy"],
+    "tasks": [{"name": "Triage", "weight": 2}, {"name": "Review", "weight": 1}],
+})
+
+
+def csv_text(rows):
+    buffer = io.BytesIO()
+    write_csv(rows, buffer)
+    return buffer.getvalue().decode("utf-8")
+
+
+def test_person_view_lists_the_roster_it_is_given():
+    scheduler = TaskScheduler(seed=2, roster=ROSTER)
+    schedule, _, _ = scheduler.generate_schedule({"Cy": ["mon", "tue", "wed", "thu", "fri"]}, [])
+    rows = list(iter_person_rows(schedule, scheduler.people))
+    assert [row[0] for row in rows[1:]] == ["Ana", "Ben", "Cy"]
+    assert set(rows[3][1:]) == {"😎"}
+
+
+def test_person_view_defaults_to_the_built_in_team():
+    scheduler = TaskScheduler(seed=2)
+    schedule, _, _ = scheduler.generate_schedule({"Max": list(Config.WEEKDAYS)}, [])
+    people = [row[0] for row in iter_person_rows(schedule)][1:]
+    assert people == Config.PEOPLE
+    view = format_schedule_for_export(schedule, "person_view")
+    assert list(view.index) == Config.PEOPLE
+    assert set(view.loc["Max"]) == {"😎"}
+    assert csv_text(iter_person_rows(schedule)).replace("\r\n", "\n") == view.to_csv().replace("\r\n", "\n")
+
+
+def test_bundle_has_a_feed_per_roster_person():
+    scheduler = TaskScheduler(seed=2, roster=ROSTER)
+    schedule, _, _, _ = scheduler.generate_horizon({}, [], start="2024-07-01", weeks=1)
+    buffer = io.BytesIO()
+    write_bundle(schedule, buffer, scheduler.people, columnar=False)
+    names = zipfile.ZipFile(buffer).namelist()
+    assert sorted(name for name in names if name.startswith("calendars/")) == [
+        "calendars/Ana.ics", "calendars/Ben.ics", "calendars/Cy.ics"
+    ]
+    assert len(list(iter_task_rows(schedule))) == 1 + 5
+
+
+def test_task_view_columns_cover_every_day():
+    schedule = {"mon": {"Triage": "Ana"}, "tue": {"Triage": "Ben", "Review": "Ana"}}
+    rows = list(iter_task_rows(schedule))
+    assert rows == [["", "Triage", "Review"], ["Monday", "Ana", ""], ["Tuesday", "Ben", "Ana"]]
+    expected = format_schedule_for_export(schedule, "task_view").fillna("").to_csv()
+    assert csv_text(rows).replace("\r\n", "\n") == expected.replace("\r\n", "\n")
+
+
+def assignment_schedule(days):
+    return {f"2024-07-{day:02d}": {"Triage": "Ana", "Review": "Ben"} for day in range(1, days + 1)}
+
+
+@pytest.mark.parametrize("writer", ["parquet", "arrow"])
+@pytest.mark.parametrize("days", [2, 3, 4])
+def test_columnar_round_trip_across_chunk_boundaries(tmp_path, writer, days):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    schedule = assignment_schedule(days)
+    path = tmp_path / f"assignments.{writer}"
+    if writer == "parquet":
+        write_parquet(iter_assignment_rows(schedule), str(path), chunk_rows=3)
+        table = pq.read_table(str(path))
+        groups = pq.ParquetFile(str(path)).num_row_groups
+    else:
+        write_arrow(iter_assignment_rows(schedule), str(path), chunk_rows=3)
+        with pa.ipc.open_file(str(path)) as reader:
+            groups = reader.num_record_batches
+            table = reader.read_all()
+
+    rows = list(iter_assignment_rows(schedule))
+    assert table.column_names == rows[0]
+    assert [list(row.values()) for row in table.to_pylist()] == rows[1:]
+    assert groups == -(-(2 * days) // 3)
+
+
+def test_ics_feed():
+    schedule = {"mon": {"Sizing, urgent; 2nd": "Ana", "Review": "Ben"}, "wed": {"Sizing, urgent; 2nd": "Ana"}}
+    lines = list(iter_ics(schedule, "Ana", week_start=date(2024, 7, 1), stamp="20240101T000000Z"))
+    assert all(line.endswith("\r\n") for line in lines)
+    text = "".join(lines)
+    assert text.count("BEGIN:VEVENT") == 2
+    assert "SUMMARY:Sizing\\, urgent\\; 2nd\r\n" in text
+    assert "DTSTART;VALUE=DATE:20240701\r\nDTEND;VALUE=DATE:20240702\r\n" in text
+    assert "DTSTART;VALUE=DATE:20240703\r\nDTEND;VALUE=DATE:20240704\r\n" in text
+
+    again = "".join(iter_ics(schedule, "Ana", week_start=date(2024, 7, 1), stamp="20250101T000000Z"))
+    uids = [line for line in text.splitlines() if line.startswith("UID:")]
+    assert uids == [line for line in again.splitlines() if line.startswith("UID:")]
+    assert len(set(uids)) == 2
+
+
+def test_ics_needs_week_start_for_weekday_codes():
+    with pytest.raises(ValueError):
+        list(iter_ics({"mon": {"Review": "Ana"}}, "Ana"))
+
+
+def test_bundle_member_names_cannot_escape_the_calendar_folder():
+    schedule = {"2024-07-01": {"Triage": "../../evil", "Review": "a/b"}, "2024-07-02": {"Triage": "Ana"}}
+    buffer = io.BytesIO()
+    write_bundle(schedule, buffer, ["Ana"], columnar=False)
+    calendars = sorted(name for name in zipfile.ZipFile(buffer).namelist() if name.startswith("calendars/"))
+    assert calendars == ["calendars/Ana.ics", "calendars/a_b.ics", "calendars/evil.ics"]
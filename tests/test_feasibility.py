@@ -0,0 +1,53 @@
+"""Per-day matching against exhaustive search"""
+
+import itertools
+import random
+
+import pytest
+
+from muniapms_scheduler import Config, TaskScheduler
+from muniapms_scheduler.feasibility import DayMatching, iter_bits
+
+
+def valid(match, domains, tasks, room):
+    load, seats = {}, set()
+    for j, person in enumerate(match):
+        if person is None:
+            continue
+        if not domains[j] >> person & 1 or (person, tasks[j]) in seats:
+            return False
+        seats.add((person, tasks[j]))
+        load[person] = load.get(person, 0) + 1
+    return all(count <= room.get(person, len(match)) for person, count in load.items())
+
+
+def brute_force(domains, tasks, room):
+    choices = [list(iter_bits(domain)) + [None] for domain in domains]
+    return max(
+        sum(person is not None for person in match)
+        for match in itertools.product(*choices) if valid(match, domains, tasks, room)
+    )
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matching_size_matches_brute_force(seed):
+    rng = random.Random(seed)
+    people = rng.randint(1, 5)
+    slots = rng.randint(1, 6)
+    tasks = [rng.randrange(3) for _ in range(slots)]
+    domains = [rng.getrandbits(people) for _ in range(slots)]
+    room = {i: rng.randint(0, 2) for i in range(people) if rng.random() < 0.5}
+
+    matching = DayMatching(domains, tasks, room)
+
+    assert valid(matching.match, domains, tasks, room)
+    assert matching.size == sum(person is not None for person in matching.match)
+    assert matching.size == brute_force(domains, tasks, room)
+
+
+def test_feasibility_reports_days_nobody_can_cover():
+    scheduler = TaskScheduler(seed=1)
+    everyone_off = {person: ["wed"] for person in Config.PEOPLE}
+    shortfalls = scheduler.check_feasibility(everyone_off, [])
+    assert list(shortfalls) == ["wed"]
+    assert scheduler.check_feasibility({}, []) == {}
@@ -0,0 +1,42 @@
+"""History windows steer the next week's selection"""
+
+from collections import Counter
+from datetime import date
+
+from muniapms_scheduler import Config, HistoryStore, TaskScheduler
+
+WEEK = date(2024, 7, 8)
+BUSY = ("Max", "Zi")
+
+
+def busy_history():
+    """A store where BUSY covered every slot of the previous two weeks"""
+    store = HistoryStore()
+    for week, start in enumerate(("2024-06-24", "2024-07-01")):
+        schedule = {
+            day: {task: BUSY[(index + week) % 2] for index, task in enumerate(Config.TASKS)}
+            for day in Config.WEEKDAYS
+        }
+        store.save_schedule(schedule, week_start=start)
+    return store
+
+
+def test_window_state_counts_recent_assignments():
+    state = busy_history().window_state(WEEK)
+    assert sum(sum(counts.values()) for counts in state.person_task_count.values()) == 2 * 5 * len(Config.TASKS)
+    assert set(state.person_task_count) == set(BUSY)
+
+
+def test_history_moves_tasks_away_from_recently_busy_people():
+    state = busy_history().window_state(WEEK)
+    with_history, without_history = Counter(), Counter()
+    changed = 0
+    for seed in range(30):
+        scheduler = TaskScheduler(seed=seed)
+        balanced = scheduler.generate_schedule({}, [], state=state)[0]
+        plain = scheduler.generate_schedule({}, [])[0]
+        changed += balanced != plain
+        for schedule, counts in ((balanced, with_history), (plain, without_history)):
+            counts.update(person for assigned in schedule.values() for person in assigned.values())
+    assert changed
+    assert sum(with_history[person] for person in BUSY) < sum(without_history[person] for person in BUSY)
@@ -0,0 +1,64 @@
+"""Multi-week horizons and carried fairness state"""
+
+import random
+from collections import Counter
+from statistics import pvariance
+
+from muniapms_scheduler import Config, FairnessState, TaskScheduler
+
+WEEKS = 8
+
+
+def totals(schedule):
+    counts = Counter({person: 0 for person in Config.PEOPLE})
+    for assigned in schedule.values():
+        for person in assigned.values():
+            if person in counts:
+                counts[person] += 1
+    return counts
+
+
+def random_availability(rng):
+    return {person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in Config.PEOPLE}
+
+
+def test_horizon_totals_are_more_even_than_independent_weeks():
+    horizon_spread = independent_spread = 0
+    for seed in range(40):
+        availability = random_availability(random.Random(seed))
+        scheduler = TaskScheduler(seed=seed)
+        schedule, _, _, _ = scheduler.generate_horizon(
+            availability, [], start="2024-07-01", weeks=WEEKS
+        )
+        horizon_spread += pvariance(list(totals(schedule).values()))
+
+        independent = Counter()
+        for week in range(WEEKS):
+            weekly, _, _ = scheduler.generate_schedule(availability, [], seed=seed * 100 + week)
+            independent.update(totals(weekly))
+        independent_spread += pvariance([independent[person] for person in Config.PEOPLE])
+    assert horizon_spread < 0.75 * independent_spread
+
+
+def test_carried_state_favours_people_with_fewer_tasks():
+    # Everyone has done every task once, Max and Zi ten times more
+    counts = {person: {task: 1 for task in Config.TASKS} for person in Config.PEOPLE}
+    for person in ("Max", "Zi"):
+        counts[person] = {task: 11 for task in Config.TASKS}
+    state = FairnessState(counts)
+
+    with_state, without_state = Counter(), Counter()
+    for seed in range(30):
+        scheduler = TaskScheduler(seed=seed)
+        with_state.update(totals(scheduler.generate_schedule({}, [], state=state)[0]))
+        without_state.update(totals(scheduler.generate_schedule({}, [])[0]))
+    busy = ("Max", "Zi")
+    assert sum(with_state[person] for person in busy) < sum(without_state[person] for person in busy)
+
+
+def test_continuing_from_state_picks_up_the_next_day():
+    scheduler = TaskScheduler(seed=3)
+    _, _, _, state = scheduler.generate_horizon({}, [], start="2024-07-01", weeks=2)
+    schedule, _, _, following = scheduler.generate_horizon({}, [], weeks=1, state=state)
+    assert list(schedule)[0] == "2024-07-15"
+    assert sum(sum(counts.values()) for counts in following.person_task_count.values()) == 3 * 25
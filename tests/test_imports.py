@@ -0,0 +1,70 @@
+"""Bulk availability import"""
+
+import io
+import json
+
+import pytest
+
+from imports import import_availability, parse_availability_text
+
+TEAM = ["Max", "Zi", "Grace", "Mark"]
+
+
+def test_text_maps_aliases_and_orders_days():
+    result = parse_availability_text("Max: th, m, Monday\n# comment\n\nZi; tu r", people=TEAM)
+    assert result.is_valid, result.errors
+    assert result.availability == {"Max": ["mon", "thu"], "Zi": ["tue", "thu"], "Grace": [], "Mark": []}
+    assert result.tokens == 4
+    assert not result.has_dates
+
+
+@pytest.mark.parametrize("cell, days", [
+    ("mon-wed", ["mon", "tue", "wed"]),
+    ("tue to thu", ["tue", "wed", "thu"]),
+    ("2024-07-05..2024-07-09", ["2024-07-05", "2024-07-08", "2024-07-09"]),
+    ("fri, 2024-07-02", ["fri", "2024-07-02"]),
+])
+def test_ranges_expand_to_working_days(cell, days):
+    result = parse_availability_text(f"Max: {cell}")
+    assert result.is_valid, result.errors
+    assert result.availability == {"Max": days}
+
+
+def test_problems_are_all_reported():
+    result = parse_availability_text(
+        "Bob: mon\nMax: xyz\nZi: 2024-01-01..2025-06-01\nGrace: wed-mon\n: tue", people=TEAM
+    )
+    assert not result.is_valid
+    assert "Unknown person 'Bob'" in result.errors
+    assert "1 entries have no person" in result.errors
+    for token in ("xyz", "2024-01-01..2025-06-01", "wed..mon"):
+        assert any(token in error for error in result.errors), token
+
+
+def test_csv_with_start_and_end_columns():
+    csv = b"\xef\xbb\xbfPerson,Start,End\nMax,2024-07-01,2024-07-02\nZi,thu,\nMark,,\n"
+    result = import_availability(io.BytesIO(csv), fmt="csv")
+    assert result.is_valid, result.errors
+    assert result.availability == {"Max": ["2024-07-01", "2024-07-02"], "Zi": ["thu"], "Mark": []}
+    assert result.has_dates
+
+
+def test_csv_with_day_column_and_headerless_rows_agree():
+    long = import_availability(io.StringIO("person,day\nMax,m\nMax,f\nZi,w\n"), fmt="csv")
+    wide = import_availability(io.StringIO("Max,m,f\nZi,w\n"), fmt="csv")
+    assert long.availability == wide.availability == {"Max": ["mon", "fri"], "Zi": ["wed"]}
+
+
+def test_json_object_and_records(tmp_path):
+    path = tmp_path / "availability.json"
+    path.write_text(json.dumps({"Max": ["m", "2024-07-01"], "Zi": "fri"}))
+    assert import_availability(str(path)).availability == {"Max": ["mon", "2024-07-01"], "Zi": ["fri"]}
+
+    records = [{"person": "Max", "start": "mon", "end": "tue"}, {"person": "Zi", "start": "f"}]
+    result = import_availability(io.StringIO(json.dumps(records)), fmt="json")
+    assert result.availability == {"Max": ["mon", "tue"], "Zi": ["fri"]}
+
+
+def test_json_must_be_object_or_records():
+    with pytest.raises(ValueError):
+        import_availability(io.StringIO("42"), fmt="json")
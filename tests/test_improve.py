@@ -0,0 +1,79 @@
+"""Local search never worsens the objective or breaks a rule"""
+
+import random
+
+import pytest
+
+from muniapms_scheduler import Config, Roster, TaskScheduler
+from muniapms_scheduler.improve import schedule_objective
+
+ROSTER = {
+    "people": [
+        "Grace", "Bouj", {"name": "Zi", "max_tasks_per_day": 1}, "Dapper",
+        {"name": "Max", "skills": ["Opti (Urgent and Standard)", "Sizing"]}, "Mark",
+    ],
+    "tasks": [
+        {"name": "Opti (Urgent and Standard)", "weight": 3, "headcount": 2},
+        {"name": "Sizing", "weight": 2, "exclude": ["Zi", "Mark"]},
+        {"name": "1st & 2nd File, 2nd round raises", "weight": 3},
+    ],
+    "avoid_pairs": [["Grace", "Bouj"]],
+}
+
+
+def check_rules(scheduler, before, after, availability):
+    rules = scheduler.rules
+    for day, assigned in after.items():
+        weekday = rules.weekday(day)
+        working = {}
+        for column, task in rules.slots:
+            person = assigned[column]
+            if person not in rules.index:
+                # Holidays and empty slots are left alone
+                assert person == before[day][column]
+                continue
+            assert before[day][column] in rules.index
+            assert scheduler.is_valid_assignment(person, task, weekday, availability)
+            assert day not in availability.get(person, ())
+            working.setdefault(person, []).append(task)
+        for person, tasks in working.items():
+            i = rules.index[person]
+            assert len(tasks) == len(set(tasks)), (day, person)
+            assert rules.capacity[i] is None or len(tasks) <= rules.capacity[i]
+            assert not any(rules.avoid[i] >> rules.index[other] & 1 for other in working)
+
+
+@pytest.mark.parametrize("seed", range(40))
+@pytest.mark.parametrize("team", ["default", "roster"])
+def test_improve_never_worsens_and_keeps_rules(seed, team):
+    rng = random.Random(seed)
+    roster = Roster.from_dict(ROSTER) if team == "roster" else None
+    scheduler = TaskScheduler(seed=seed, roster=roster)
+    people = scheduler.people
+    availability = {person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in people}
+    schedule, _, _, state = scheduler.generate_horizon(
+        availability, rng.sample(["2024-07-03", "2024-07-11"], rng.randint(0, 1)),
+        start="2024-07-01", weeks=2
+    )
+
+    improved, person_tasks, report = scheduler.improve_schedule(
+        schedule, availability, budget=10, seed=seed, max_steps=3000
+    )
+
+    before = schedule_objective(scheduler, schedule)
+    after = schedule_objective(scheduler, improved)
+    assert after <= before + 1e-9
+    assert report.before == pytest.approx(before)
+    assert report.after == pytest.approx(after)
+    check_rules(scheduler, schedule, improved, availability)
+    assert sum(len(tasks) for days in person_tasks.values() for tasks in days.values()) == sum(
+        person in scheduler.rules.index for assigned in improved.values() for person in assigned.values()
+    )
+
+
+def test_same_seed_and_steps_reproduce_the_result():
+    scheduler = TaskScheduler(seed=4)
+    schedule, _, _ = scheduler.generate_schedule({"Max": ["mon"]}, [])
+    first = scheduler.improve_schedule(schedule, {"Max": ["mon"]}, budget=10, seed=9, max_steps=500)[0]
+    second = scheduler.improve_schedule(schedule, {"Max": ["mon"]}, budget=10, seed=9, max_steps=500)[0]
+    assert first == second
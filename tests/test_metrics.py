@@ -0,0 +1,65 @@
+"""Instrumentation counters and exports"""
+
+import json
+
+import pytest
+
+from muniapms_scheduler import Metrics, Roster, TaskScheduler
+from muniapms_scheduler.selection import priority_tier
+
+# Two people and three tasks a day: the first two slots always find someone
+# with no task yet, the third goes to whoever hasn't done it this week
+# (Monday and Tuesday) and then to the least loaded (Wednesday and Thursday;
+# Friday is a holiday)
+ROSTER = Roster.from_dict({"people": ["Ana", "Ben"], "tasks": ["One", "Two", "Three"]})
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_tier_counters_on_a_hand_built_week(seed):
+    metrics = Metrics()
+    TaskScheduler(seed=seed, roster=ROSTER).generate_schedule({}, ["fri"], metrics=metrics)
+    assert metrics.tiers == {"zero_task": 8, "never_done": 2, "least_loaded": 2}
+    assert metrics.counters == {"runs": 1, "slots": 15, "unassigned": 0, "holiday_slots": 3}
+
+
+def test_zero_task_pick_narrowed_to_never_done_is_still_zero_task():
+    assert priority_tier(0b11, 0b01, {0: 0b11}, [0]) == ("zero_task", 0b01)
+    assert priority_tier(0b11, 0b01, {1: 0b11}, [1]) == ("never_done", 0b01)
+    assert priority_tier(0b11, 0, {1: 0b01, 2: 0b10}, [1, 2]) == ("least_loaded", 0b01)
+    assert priority_tier(0, 0b11, {0: 0b11}, [0]) == (None, 0)
+
+
+def filled_metrics():
+    metrics = Metrics()
+    metrics.tiers.update(zero_task=3, never_done=2)
+    with metrics.phase("generate"):
+        pass
+    metrics.record_schedule({"mon": {"One": "Ana", "Two": "❌"}, "tue": {"One": "🏝️"}}, "❌", "🏝️")
+    return metrics
+
+
+def test_prometheus_text():
+    lines = filled_metrics().to_prometheus().splitlines()
+    assert lines[0] == "# TYPE muniapms_tier_selections_total counter"
+    assert 'muniapms_tier_selections_total{tier="zero_task"} 3' in lines
+    assert 'muniapms_tier_selections_total{tier="least_loaded"} 0' in lines
+    assert "muniapms_unassigned_total 1" in lines
+    assert "muniapms_holiday_slots_total 1" in lines
+    assert 'muniapms_phase_calls_total{phase="generate"} 1' in lines
+    assert sum(line.startswith("# TYPE") for line in lines) == len({
+        line.split("{")[0].split()[0] for line in lines if not line.startswith("#")
+    })
+
+
+def test_json_lines_match_the_samples():
+    metrics = filled_metrics()
+    records = [json.loads(line) for line in metrics.to_json_lines().splitlines()]
+    assert {"metric": "tier_selections_total", "value": 2, "tier": "never_done"} in records
+    assert {"metric": "slots_total", "value": 3} in records
+    assert len(records) == len(list(metrics.samples()))
+    assert metrics.to_dict()["counters"]["runs"] == 1
+
+
+def test_unknown_profiler_is_rejected():
+    with pytest.raises(ValueError):
+        Metrics(profiler="perf")
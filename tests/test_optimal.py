@@ -0,0 +1,40 @@
+"""Min-cost flow engine"""
+
+import random
+
+from muniapms_scheduler import Config, TaskScheduler
+from muniapms_scheduler.optimal import optimal_assignment
+
+
+def test_carried_load_takes_the_lighter_task():
+    weights = {"heavy": 3, "light": 1}
+    solved = optimal_assignment(
+        ["Ann", "Bo"], ["heavy", "light"], ["mon"], lambda person, task, day: True,
+        task_weights=weights, person_load={"Ann": 10}
+    )
+    assert solved == {("mon", "heavy"): "Bo", ("mon", "light"): "Ann"}
+
+
+def test_single_week_balances_weighted_load():
+    weights = {"heavy": 3, "light": 1}
+    for seed in range(10):
+        solved = optimal_assignment(
+            ["Ann", "Bo"], ["heavy", "light"], ["mon", "tue"], lambda person, task, day: True,
+            task_weights=weights, rng=random.Random(seed)
+        )
+        loads = {"Ann": 0, "Bo": 0}
+        for (day, task), person in solved.items():
+            loads[person] += weights[task]
+        assert loads == {"Ann": 4, "Bo": 4}
+
+
+def test_horizon_covers_every_slot_with_valid_people():
+    for seed in range(10):
+        rng = random.Random(seed)
+        availability = {person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in Config.PEOPLE}
+        scheduler = TaskScheduler(seed=seed, engine="optimal")
+        schedule, _, _, _ = scheduler.generate_horizon(availability, [], start="2024-07-01", weeks=3)
+        for day, assigned in schedule.items():
+            weekday = scheduler.rules.weekday(day)
+            for task, person in assigned.items():
+                assert scheduler.is_valid_assignment(person, task, weekday, availability)
@@ -0,0 +1,114 @@
+"""Incremental repair keeps what is still valid and re-picks the rest"""
+
+import random
+from datetime import date
+
+import pytest
+
+from muniapms_scheduler import Config, TaskScheduler, diff_schedules
+from muniapms_scheduler.repair import HOLIDAY, UNASSIGNED
+from muniapms_scheduler.selection import SelectionEngine, week_numbers
+
+
+def consistent(schedule, scheduler, availability):
+    """Replay the greedy engine and check every assignee is in its tier"""
+    rules = scheduler.rules
+    days = list(schedule)
+    unavailable = {
+        person: {day for day in days if day in entries or rules.weekday(day) in entries}
+        for person, entries in availability.items()
+    }
+    counts = {}
+    engine = SelectionEngine(rules.people, rules.tasks, days, unavailable,
+                             person_task_count=counts, rules=rules)
+    weeks = week_numbers(days, rules.weekday)
+    for d, day in enumerate(days):
+        if d and weeks[d] != weeks[d - 1]:
+            engine.new_week(counts)
+        seated = {}
+        for column, task in rules.slots:
+            person = schedule[day][column]
+            if person == HOLIDAY:
+                continue
+            _, mask = engine.candidates(task, day, seated.get(task, 0))
+            mask = mask & engine.preferred[day] or mask
+            if person == UNASSIGNED:
+                assert not mask, (day, column)
+                continue
+            assert mask >> rules.index[person] & 1, (day, column, person)
+            engine.assign(person, task, day)
+            counts.setdefault(person, {})[task] = counts.get(person, {}).get(task, 0) + 1
+            seated[task] = seated.get(task, 0) | 1 << rules.index[person]
+
+
+def toggled(availability, person, day):
+    changed = {name: list(days) for name, days in availability.items()}
+    days = changed.setdefault(person, [])
+    if day in days:
+        days.remove(day)
+    else:
+        days.append(day)
+    return changed
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_weekly_repair_matches_the_greedy_rules(seed):
+    rng = random.Random(seed)
+    scheduler = TaskScheduler(seed=seed)
+    availability = {person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in Config.PEOPLE}
+    schedule, _, _ = scheduler.generate_schedule(availability, rng.sample(Config.WEEKDAYS, rng.randint(0, 1)))
+    person, day = rng.choice(Config.PEOPLE), rng.choice(Config.WEEKDAYS)
+    changed = toggled(availability, person, day)
+
+    repaired, diff, _ = scheduler.repair_schedule(schedule, changed, {person: [day]}, seed=seed)
+
+    consistent(repaired, scheduler, changed)
+    assert diff == diff_schedules(schedule, repaired)
+    changed_from = Config.WEEKDAYS.index(day)
+    assert all(Config.WEEKDAYS.index(entry[0]) >= changed_from for entry in diff)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_horizon_repair_only_touches_the_changed_week(seed):
+    rng = random.Random(seed)
+    scheduler = TaskScheduler(seed=seed)
+    availability = {person: rng.sample(Config.WEEKDAYS, rng.randint(0, 1)) for person in Config.PEOPLE}
+    schedule, _, _, _ = scheduler.generate_horizon(availability, [], start="2024-07-01", weeks=6)
+    day = rng.choice(list(schedule))
+    person = next(name for name in schedule[day].values() if name in Config.PEOPLE)
+    changed = toggled(availability, person, day)
+
+    repaired, diff, _ = scheduler.repair_schedule(schedule, changed, {person: [day]})
+
+    consistent(repaired, scheduler, changed)
+    assert diff and diff[0][0] == day
+    week = date.fromisoformat(day).isocalendar()[1]
+    assert all(date.fromisoformat(entry[0]).isocalendar()[1] == week for entry in diff)
+    untouched = [key for key in schedule if key < day or date.fromisoformat(key).isocalendar()[1] != week]
+    assert all(repaired[key] == schedule[key] for key in untouched)
+
+
+def test_days_before_start_are_left_alone():
+    scheduler = TaskScheduler(seed=5)
+    schedule, _, _ = scheduler.generate_schedule({}, [])
+    person = schedule["mon"]["Sizing"]
+    changed = {person: ["mon", "tue"]}
+
+    _, diff, _ = scheduler.repair_schedule(schedule, changed, changed, start=date(2024, 7, 2))
+
+    assert diff and all(entry[0] != "mon" for entry in diff)
+
+
+@pytest.mark.parametrize("start", ["2024-07-06", "someday"])
+def test_start_that_cannot_be_placed_raises(start):
+    scheduler = TaskScheduler(seed=5)
+    schedule, _, _ = scheduler.generate_schedule({}, [])
+    with pytest.raises(ValueError):
+        scheduler.repair_schedule(schedule, {"Max": ["mon"]}, {"Max": ["mon"]}, start=start)
+
+
+def test_weekday_start_on_a_dated_schedule_raises():
+    scheduler = TaskScheduler(seed=5)
+    schedule, _, _, _ = scheduler.generate_horizon({}, [], start="2024-07-01", weeks=1)
+    with pytest.raises(ValueError):
+        scheduler.repair_schedule(schedule, {"Max": ["mon"]}, {"Max": ["mon"]}, start="wed")
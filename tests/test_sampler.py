@@ -0,0 +1,64 @@
+"""Best-of-N sampling"""
+
+import pytest
+
+from muniapms_scheduler import Config, Roster, TaskScheduler
+from sampler import fairness_score, sample_schedules
+
+AVAILABILITY = {"Max": ["mon", "tue"], "Zi": ["fri"]}
+
+ROSTER = Roster.from_dict({
+    "people": ["Ana", "Ben", "Cy", "Dee"],
+    "tasks": [{"name": "Triage", "weight": 3}, {"name": "Review", "weight": 1}],
+})
+
+
+def summary(result):
+    return [(candidate.score, candidate.seed, candidate.schedule) for candidate in result.best]
+
+
+def test_same_master_seed_gives_the_same_top_k():
+    first = sample_schedules(AVAILABILITY, [], samples=60, top_k=4, workers=1, seed=11)
+    second = sample_schedules(AVAILABILITY, [], samples=60, top_k=4, workers=1, seed=11)
+    assert summary(first) == summary(second)
+    assert len(first.best) == 4
+
+
+def test_pool_and_in_process_runs_agree():
+    in_process = sample_schedules(AVAILABILITY, [], samples=80, top_k=5, workers=1, seed=5)
+    pooled = sample_schedules(AVAILABILITY, [], samples=80, top_k=5, workers=2, seed=5)
+    assert summary(pooled) == summary(in_process)
+    assert pooled.workers == 2
+
+
+def test_top_k_is_sorted_by_fairness_score():
+    result = sample_schedules(AVAILABILITY, ["wed"], samples=50, top_k=5, workers=1, seed=2)
+    scores = [candidate.score for candidate in result.best]
+    assert scores == sorted(scores)
+    for candidate in result.best:
+        assert candidate.score == pytest.approx(fairness_score(candidate.schedule))
+        schedule, _, _ = TaskScheduler().generate_schedule(AVAILABILITY, ["wed"], seed=candidate.seed)
+        assert schedule == candidate.schedule
+
+
+def test_throughput_is_reported():
+    result = sample_schedules({}, [], samples=30, top_k=2, workers=1, seed=1)
+    assert result.samples == 30
+    assert result.elapsed > 0
+    assert result.samples_per_second == pytest.approx(30 / result.elapsed)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_samples_the_callers_roster_and_engine(workers):
+    scheduler = TaskScheduler(roster=ROSTER, engine="optimal")
+    result = sample_schedules({"Ana": ["mon"]}, [], samples=20, top_k=3, workers=workers, seed=4,
+                              scheduler=scheduler)
+    for candidate in result.best:
+        assigned = {person for day in candidate.schedule.values() for person in day.values()}
+        assert assigned <= set(ROSTER.people)
+        assert not assigned & (set(Config.PEOPLE) - set(ROSTER.people))
+        assert candidate.score == pytest.approx(
+            fairness_score(candidate.schedule, ROSTER.people, ROSTER.task_weights)
+        )
+        expected, _, _ = scheduler.generate_schedule({"Ana": ["mon"]}, [], seed=candidate.seed)
+        assert candidate.schedule == expected
@@ -0,0 +1,56 @@
+"""What-if batches reproduce one-off runs and are cached"""
+
+import random
+
+import pytest
+
+from muniapms_scheduler import Config, FairnessState, TaskScheduler
+from scenarios import BASELINE, Scenario, ScenarioRunner
+
+
+def random_variants(rng, count):
+    return [
+        ({person: rng.sample(Config.WEEKDAYS, rng.randint(0, 2)) for person in Config.PEOPLE},
+         rng.sample(Config.WEEKDAYS, rng.randint(0, 1)))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("engine, constrained_first", [
+    ("greedy", False), ("greedy", True), ("optimal", False)
+])
+@pytest.mark.parametrize("seed", range(20))
+def test_batched_variants_match_separate_runs(engine, constrained_first, seed):
+    rng = random.Random(seed)
+    scheduler = TaskScheduler(seed=seed, engine=engine, constrained_first=constrained_first)
+    state = None
+    if seed % 2:
+        state = FairnessState({person: {task: rng.randint(0, 3) for task in Config.TASKS}
+                               for person in Config.PEOPLE})
+    variants = random_variants(rng, 4)
+
+    batched = list(scheduler.generate_variants(variants, seed=seed, state=state))
+
+    for (availability, holidays), result in zip(variants, batched):
+        schedule, person_tasks, _ = scheduler.generate_schedule(availability, holidays,
+                                                                seed=seed, state=state)
+        assert result == (schedule, person_tasks)
+
+
+def test_runner_compares_against_the_current_plan_and_caches():
+    scheduler = TaskScheduler(seed=7)
+    runner = ScenarioRunner(scheduler)
+    scenarios = [Scenario("Max off Thu", unavailable={"Max": ["thu"]}),
+                 Scenario("Friday holiday", holidays=["Friday"])]
+
+    results = runner.run({"Zi": ["mon"]}, [], scenarios, seed=7)
+
+    assert [result.name for result in results] == [BASELINE, "Max off Thu", "Friday holiday"]
+    assert results[0].schedule == scheduler.generate_schedule({"Zi": ["mon"]}, [], seed=7)[0]
+    assert all(person != "Max" for person in results[1].schedule["thu"].values())
+    assert set(results[2].schedule["fri"].values()) == {"🏝️ Holiday"}
+    assert not any(result.cached for result in results)
+
+    again = runner.run({"Zi": ["mon"]}, [], scenarios[::-1], seed=7)
+    assert all(result.cached for result in again)
+    assert again[1].schedule == results[2].schedule
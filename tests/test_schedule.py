@@ -0,0 +1,74 @@
+"""Compact Schedule grid"""
+
+import pickle
+
+from muniapms_scheduler import Roster, Schedule, TaskScheduler
+from muniapms_scheduler.schedule import HOLIDAY, NO_SLOT_CODE, UNASSIGNED
+
+ROSTER = Roster.from_dict({
+    "people": ["Ana", "Ben", "Cy"],
+    "tasks": [{"name": "Triage", "headcount": 2}, "Review"],
+})
+
+
+def generated():
+    scheduler = TaskScheduler(seed=3, roster=ROSTER)
+    schedule, person_tasks, _ = scheduler.generate_schedule({"Cy": ["wed"]}, ["fri"])
+    return scheduler, schedule, person_tasks
+
+
+def plain(person_tasks):
+    return {person: dict(days) for person, days in person_tasks.items() if days}
+
+
+def test_round_trip_matches_the_generated_schedule():
+    scheduler, schedule, person_tasks = generated()
+    compact = scheduler.compact(schedule)
+    assert compact.to_dict() == schedule
+    assert plain(compact.person_tasks()) == plain(person_tasks)
+    assert compact.columns == ("Triage", "Triage #2", "Review")
+    assert compact.tasks == ("Triage", "Triage", "Review")
+
+
+def test_day_task_and_person_views():
+    scheduler, schedule, _ = generated()
+    compact = scheduler.compact(schedule)
+    assert [compact.name(code) for code in compact.by_day("mon")] == list(schedule["mon"].values())
+    assert [compact.name(code) for code in compact.by_column("Review")] == [
+        schedule[day]["Review"] for day in schedule
+    ]
+    assert set(compact.by_task("Triage")) == {"Triage", "Triage #2"}
+    assert {compact.name(code) for code in compact.by_day("fri")} == {HOLIDAY}
+    for person in scheduler.people:
+        expected = [(day, column) for day, assigned in schedule.items()
+                    for column, name in assigned.items() if name == person]
+        assert list(compact.by_person(person)) == expected
+    assert compact.as_matrix().shape == (5, 3)
+
+
+def test_ragged_days_keep_every_column():
+    ragged = {"mon": {"A": "x"}, "tue": {"A": "y", "B": "x"}, "wed": {"B": UNASSIGNED}}
+    compact = Schedule.from_dict(ragged)
+    assert compact.columns == ("A", "B")
+    assert compact.by_day("mon")[1] == NO_SLOT_CODE
+    assert compact.name(NO_SLOT_CODE) is None
+    assert compact.to_dict() == ragged
+    assert plain(compact.person_tasks()) == {"x": {"mon": ["A"], "tue": ["B"]}, "y": {"tue": ["A"]}}
+
+
+def test_equality_and_hash_cover_cells_and_tasks():
+    scheduler, schedule, _ = generated()
+    first, second = scheduler.compact(schedule), scheduler.compact(schedule)
+    assert first == second and hash(first) == hash(second)
+    assert len({first, second}) == 1
+
+    relabelled = Schedule(first.days, first.columns, first.people, first.cells,
+                          tasks=("Triage", "Review", "Review"))
+    assert relabelled != first
+    assert hash(relabelled) != hash(first)
+
+    changed = dict(schedule, mon=dict(schedule["mon"], Review=UNASSIGNED))
+    assert scheduler.compact(changed) != first
+
+    restored = pickle.loads(pickle.dumps(first))
+    assert restored == first and restored.tasks == first.tasks
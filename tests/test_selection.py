@@ -0,0 +1,77 @@
+"""Bitmask selection engine against the original list-based scheduler"""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+from muniapms_scheduler import Config, TaskScheduler
+from muniapms_scheduler.selection import count_bits, nth_bit
+
+
+def list_schedule(availability, holidays, rng):
+    """The original list-comprehension scheduler, drawing from rng"""
+    schedule = {}
+    person_task_count = defaultdict(lambda: defaultdict(int))
+    daily_task_count = defaultdict(lambda: defaultdict(int))
+
+    for day in Config.WEEKDAYS:
+        schedule[day] = {}
+        if day in holidays:
+            for task in Config.TASKS:
+                schedule[day][task] = "🏝️ Holiday"
+            continue
+
+        for task in Config.TASKS:
+            eligible = [
+                person for person in Config.PEOPLE
+                if day not in availability.get(person, [])
+                and not (task == "Sizing" and person in Config.NO_SIZING)
+            ]
+            if not eligible:
+                schedule[day][task] = "❌ No one available"
+                continue
+
+            zero_task = [p for p in eligible if daily_task_count[day][p] == 0]
+            if zero_task:
+                never_done = [p for p in zero_task if person_task_count[p][task] == 0]
+                chosen = rng.choice(never_done or zero_task)
+            else:
+                never_done = [p for p in eligible if person_task_count[p][task] == 0]
+                if never_done:
+                    chosen = rng.choice(never_done)
+                else:
+                    least = min(daily_task_count[day][p] for p in eligible)
+                    chosen = rng.choice([p for p in eligible if daily_task_count[day][p] == least])
+
+            schedule[day][task] = chosen
+            person_task_count[chosen][task] += 1
+            daily_task_count[day][chosen] += 1
+    return schedule
+
+
+def random_inputs(rng):
+    availability = {
+        person: rng.sample(Config.WEEKDAYS, rng.randint(0, 4)) for person in Config.PEOPLE
+    }
+    return availability, rng.sample(Config.WEEKDAYS, rng.randint(0, 1))
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_seeded_run_matches_list_scheduler(seed):
+    availability, holidays = random_inputs(random.Random(seed))
+    schedule, _, used = TaskScheduler(seed=seed).generate_schedule(availability, holidays)
+    assert used == seed
+    assert schedule == list_schedule(availability, holidays, random.Random(seed))
+
+
+def test_nth_bit_matches_linear_scan():
+    rng = random.Random(1)
+    for _ in range(5000):
+        mask = rng.getrandbits(rng.choice([1, 6, 64, 500]))
+        if not mask:
+            continue
+        bits = [i for i in range(mask.bit_length()) if mask >> i & 1]
+        assert count_bits(mask) == len(bits)
+        n = rng.randrange(len(bits))
+        assert nth_bit(mask, n) == bits[n]
@@ -0,0 +1,110 @@
+"""HTTP framing of the scheduling service"""
+
+import asyncio
+import json
+
+import pytest
+
+from muniapms_scheduler.service import SchedulingService, start_server
+
+
+def exchange(raw):
+    """Send raw request bytes to a fresh server; returns (status, payload)"""
+    async def run():
+        service = SchedulingService(workers=0)
+        server = await start_server(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(raw)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=10)
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+            service.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "+5", "1e3", "٣"])
+def test_invalid_content_length_is_a_bad_request(length):
+    raw = f"POST /schedule HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode("utf-8")
+    status, payload = exchange(raw)
+    assert status == 400
+    assert "Content-Length" in payload["error"]
+
+
+def test_oversized_body_is_rejected_before_reading():
+    status, _ = exchange(b"POST /schedule HTTP/1.1\r\nContent-Length: 999999999999\r\n\r\n")
+    assert status == 413
+
+
+def test_valid_request_still_succeeds():
+    body = json.dumps({"availability": {}, "holidays": [], "seed": 1}).encode()
+    raw = b"POST /schedule HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body)
+    status, payload = exchange(raw)
+    assert status == 200, payload
+
+
+def schedule(service, *batches):
+    """Run batches of teams concurrently on one service"""
+    async def run():
+        return await asyncio.gather(*(service.schedule_teams(teams) for teams in batches))
+    return asyncio.run(run())
+
+
+def test_repeated_request_is_a_cache_hit():
+    service = SchedulingService(workers=0)
+    team = {"team": "ops", "availability": {"Max": ["mon"]}, "seed": 3}
+    (first,), = schedule(service, [team])
+    (second,), = schedule(service, [team])
+    assert not first["cached"] and second["cached"]
+    assert second["schedule"] == first["schedule"] and second["key"] == first["key"]
+    assert service.counters["cache_hits"] == 1 and service.counters["solved"] == 1
+
+
+def test_identical_concurrent_requests_are_solved_once():
+    service = SchedulingService(workers=0)
+    team = {"availability": {"Zi": ["tue"]}, "seed": 8}
+    (a, b), (c,) = schedule(service, [dict(team, team="a"), dict(team, team="b")], [dict(team, team="c")])
+    assert a["schedule"] == b["schedule"] == c["schedule"]
+    assert [result["team"] for result in (a, b, c)] == ["a", "b", "c"]
+    assert service.counters["solved"] == 1
+    assert service.counters["deduplicated"] == 2
+
+
+def test_bad_team_does_not_fail_the_batch():
+    service = SchedulingService(workers=0)
+    (results,) = schedule(service, [
+        {"team": "good", "seed": 1},
+        {"team": "string holidays", "holidays": "fri"},
+        {"team": "junk day", "holidays": ["fri", "someday"]},
+        {"team": "weeks", "start": "2024-07-01", "weeks": -3},
+        {"team": "start", "start": "next week"},
+    ])
+    assert "schedule" in results[0]
+    assert [("error" in result) for result in results] == [False, True, True, True, True]
+    assert service.counters["errors"] == 4
+
+
+def test_equivalent_requests_share_one_key():
+    service = SchedulingService(workers=0)
+    (results,) = schedule(service, [
+        {"availability": {"Max": ["Monday", "m", "wed"], "Zi": []}, "holidays": ["f"], "seed": 2},
+        {"availability": {"Max": ["wed", "mon"]}, "holidays": ["Friday", "fri"], "seed": 2},
+    ])
+    assert results[0]["key"] == results[1]["key"]
+    assert service.counters["solved"] == 1
+
+
+def test_worker_roster_cache_is_bounded(monkeypatch):
+    from muniapms_scheduler import service
+    monkeypatch.setattr(service, "_rosters", service.OrderedDict())
+    monkeypatch.setattr(service, "ROSTER_CACHE_SIZE", 2)
+    for name in ("Ana", "Ben", "Cy"):
+        request = service.normalize_team({"roster": {"people": [name, "Dee"], "tasks": ["Triage"]}})
+        assert "schedule" in service.solve(request)
+    assert len(service._rosters) == 2
@@ -0,0 +1,40 @@
+"""Schedule matrix helpers"""
+
+from utils import (
+    HOLIDAY,
+    NO_SLOT_CODE,
+    UNASSIGNED,
+    calculate_workload_statistics,
+    check_schedule_conflicts,
+    schedule_to_matrix,
+)
+
+# Days with different columns, e.g. a roster that gained a task mid-horizon
+SCHEDULE = {
+    "2024-07-01": {"Triage": "Ana"},
+    "2024-07-02": {"Triage": "Ben", "Review": "Ana"},
+    "2024-07-03": {"Triage": HOLIDAY, "Review": HOLIDAY},
+    "2024-07-04": {"Review": UNASSIGNED, "Audit": "Ben"},
+}
+
+
+def test_columns_are_the_union_over_all_days():
+    matrix, days, tasks, people = schedule_to_matrix(SCHEDULE)
+    assert tasks == ["Triage", "Review", "Audit"]
+    assert people == ["Ana", "Ben"]
+    assert matrix.shape == (4, 3)
+    assert matrix[0, 1] == matrix[0, 2] == matrix[3, 0] == NO_SLOT_CODE
+
+
+def test_missing_columns_are_neither_assigned_nor_unassigned():
+    stats = calculate_workload_statistics(SCHEDULE)
+    assert dict(stats['person_task_counts']) == {"Ana": 2, "Ben": 2}
+    assert dict(stats['task_distribution'])["Audit"] == 1
+    assert stats['unassigned_tasks'] == 1
+    assert check_schedule_conflicts(SCHEDULE) == ["No one available for 'Review' on 2024-07-04"]
+
+
+def test_explicit_task_order_is_kept():
+    matrix, _, tasks, _ = schedule_to_matrix(SCHEDULE, tasks=["Audit", "Triage"])
+    assert tasks == ["Audit", "Triage"]
+    assert matrix.shape == (4, 2)
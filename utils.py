@@ -3,16 +3,44 @@
 Utility functions for the MuniAPMs Task Scheduler
 """
 
+import hashlib
+import json
+import numpy as np
 import pandas as pd
-from datetime import datetime
+from datetime import date, datetime
 from collections import defaultdict
 
-def validate_availability_input(availability_data):
+from muniapms_scheduler import Config
+
+HOLIDAY = "🏝️ Holiday"
+UNASSIGNED = "❌ No one available"
+
+# Reserved cell codes in the schedule matrix; people are numbered from 0
+HOLIDAY_CODE = -1
+UNASSIGNED_CODE = -2
+# Matrix cell for a column the day doesn't have (schedules whose days differ)
+NO_SLOT_CODE = -3
+
+# More than this many tasks for one person on one day is flagged as a conflict
+MAX_DAILY_TASKS = Config.MAX_DAILY_TASKS
+
+def _is_iso_date(day):
+    try:
+        date.fromisoformat(day)
+    except (TypeError, ValueError):
+        return False
+    return len(day) == 10
+
+def validate_availability_input(availability_data, people=None, allow_dates=False):
     """
     Validate availability input data
     
     Args:
         availability_data (dict): Dictionary of person -> list of unavailable days
+        people (list): Required people (defaults to Config.PEOPLE; pass
+            roster.people for a loaded roster)
+        allow_dates (bool): Also accept ISO dates ("2024-07-04"), as used
+            for multi-week horizons
     
     Returns:
         tuple: (is_valid, error_messages)
@@ -20,108 +48,233 @@ def validate_availability_input(availability_data):
     errors = []
     
     # Check if all required people are present
-    required_people = ["Grace", "Bouj", "Zi", "Dapper", "Max", "Mark"]
-    for person in required_people:
+    for person in people or Config.PEOPLE:
         if person not in availability_data:
             errors.append(f"Missing availability data for {person}")
     
     # Check for valid day formats
-    valid_days = ["mon", "tue", "wed", "thu", "fri"]
+    valid_days = set(Config.WEEKDAYS)
+    checked = {}
     for person, days in availability_data.items():
         for day in days:
-            if day not in valid_days:
+            if day in valid_days:
+                continue
+            if allow_dates and day not in checked:
+                checked[day] = _is_iso_date(day)
+            if not checked.get(day):
                 errors.append(f"Invalid day '{day}' for {person}")
     
     return len(errors) == 0, errors
 
-def calculate_workload_statistics(schedule):
+def schedule_to_matrix(schedule, people=None, tasks=None):
+    """
+    Convert a schedule dictionary to a compact integer matrix
+    
+    Args:
+        schedule (dict): Generated schedule dictionary
+        people (list): Person order for ids; people not listed are appended
+            in order of first appearance
+        tasks (list): Column order (defaults to every day's columns, in order
+            of first appearance)
+    
+    Returns:
+        tuple: (matrix, days, tasks, people) where matrix is a days x tasks
+        int16 array of person ids, HOLIDAY_CODE, UNASSIGNED_CODE or, where a
+        day has no such column, NO_SLOT_CODE
+    """
+    days = list(schedule)
+    if tasks is None:
+        tasks = list(dict.fromkeys(task for assigned in schedule.values() for task in assigned))
+    people = list(people or [])
+    codes = {person: i for i, person in enumerate(people)}
+    codes[HOLIDAY] = HOLIDAY_CODE
+    codes[UNASSIGNED] = UNASSIGNED_CODE
+
+    cells = []
+    for day in days:
+        assigned = schedule[day]
+        for task in tasks:
+            if task not in assigned:
+                cells.append(NO_SLOT_CODE)
+                continue
+            person = assigned[task]
+            code = codes.get(person)
+            if code is None:
+                code = codes[person] = len(people)
+                people.append(person)
+            cells.append(code)
+    matrix = np.array(cells, dtype=np.int16).reshape(len(days), len(tasks))
+    return matrix, days, tasks, people
+
+def matrix_statistics(matrix, n_people, weights=None):
+    """
+    Workload arrays for a schedule matrix in one vectorized pass
+    
+    Args:
+        matrix (np.ndarray): days x tasks matrix from schedule_to_matrix
+        n_people (int): Number of person ids
+        weights (np.ndarray): Optional per-task weights (one per column)
+    
+    Returns:
+        dict: person_counts (people), task_counts (tasks), daily_loads
+        (days x people), weighted_loads (people, if weights given), and
+        total_tasks / holiday_days / unassigned_tasks totals
+    """
+    n_days, n_tasks = matrix.shape
+    assigned = matrix >= 0
+    people = matrix[assigned].astype(np.intp)
+    day_index = np.nonzero(assigned)[0]
+
+    daily_loads = np.bincount(
+        day_index * n_people + people, minlength=n_days * n_people
+    ).reshape(n_days, n_people)
+    arrays = {
+        'person_counts': daily_loads.sum(axis=0),
+        'task_counts': assigned.sum(axis=0),
+        'daily_loads': daily_loads,
+        'total_tasks': int(people.size),
+        'holiday_days': int(np.count_nonzero(matrix == HOLIDAY_CODE)),
+        'unassigned_tasks': int(np.count_nonzero(matrix == UNASSIGNED_CODE))
+    }
+    if weights is not None:
+        weights = np.asarray(weights)
+        cell_weights = np.broadcast_to(weights, matrix.shape)[assigned]
+        weighted = np.bincount(people, weights=cell_weights, minlength=n_people)
+        if np.issubdtype(weights.dtype, np.integer):
+            weighted = weighted.astype(np.int64)
+        arrays['weighted_loads'] = weighted
+    return arrays
+
+def calculate_workload_statistics(schedule, task_weights=None):
     """
     Calculate workload distribution statistics
     
     Args:
         schedule (dict): Generated schedule dictionary
+        task_weights (dict): Optional task -> weight; when given, the result
+            also holds each person's weighted load under 'weighted_loads'
     
     Returns:
         dict: Statistics including task counts, person loads, etc.
     """
+    matrix, days, tasks, people = schedule_to_matrix(schedule)
+    weights = None
+    if task_weights is not None:
+        weights = [task_weights.get(task, 1) for task in tasks]
+    arrays = matrix_statistics(matrix, len(people), weights)
+
     stats = {
         'person_task_counts': defaultdict(int),
         'task_distribution': defaultdict(int),
         'daily_loads': defaultdict(lambda: defaultdict(int)),
-        'total_tasks': 0,
-        'holiday_days': 0,
-        'unassigned_tasks': 0
+        'total_tasks': arrays['total_tasks'],
+        'holiday_days': arrays['holiday_days'],
+        'unassigned_tasks': arrays['unassigned_tasks']
     }
-    
-    for day, tasks in schedule.items():
-        for task, person in tasks.items():
-            if person == "🏝️ Holiday":
-                stats['holiday_days'] += 1
-            elif person == "❌ No one available":
-                stats['unassigned_tasks'] += 1
-            else:
-                stats['person_task_counts'][person] += 1
-                stats['task_distribution'][task] += 1
-                stats['daily_loads'][day][person] += 1
-                stats['total_tasks'] += 1
+    person_counts = arrays['person_counts'].tolist()
+    for person_id, count in enumerate(person_counts):
+        if count:
+            stats['person_task_counts'][people[person_id]] = count
+    for task_id, count in enumerate(arrays['task_counts'].tolist()):
+        if count:
+            stats['task_distribution'][tasks[task_id]] = count
+    daily_loads = arrays['daily_loads']
+    day_ids, person_ids = np.nonzero(daily_loads)
+    for day_id, person_id, load in zip(day_ids.tolist(), person_ids.tolist(),
+                                       daily_loads[day_ids, person_ids].tolist()):
+        stats['daily_loads'][days[day_id]][people[person_id]] = load
+    if task_weights is not None:
+        stats['weighted_loads'] = defaultdict(int)
+        for person_id, load in enumerate(arrays['weighted_loads'].tolist()):
+            if person_counts[person_id]:
+                stats['weighted_loads'][people[person_id]] = load
     
     return stats
 
-def format_schedule_for_export(schedule, format_type="task_view"):
+DAY_NAMES = dict(zip(Config.WEEKDAYS, Config.WEEKDAY_DISPLAY))
+
+def day_display_name(day):
+    """Weekday name for a day code; other keys (e.g. ISO dates) are shown as-is"""
+    return DAY_NAMES.get(day, day)
+
+def schedule_fingerprint(schedule):
+    """
+    Stable hash of a schedule for cache keys
+    
+    Args:
+        schedule (dict): Generated schedule dictionary
+    
+    Returns:
+        str: Hex digest that changes whenever any assignment changes
+    """
+    payload = json.dumps(schedule, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+def build_schedule_views(schedule, people=None, label=day_display_name, metrics=None):
+    """
+    Build the task-by-day and person-by-day DataFrames in a single pass
+    
+    Args:
+        schedule (dict): Generated schedule dictionary
+        people (list): Rows of the person view (defaults to everyone assigned,
+            in order of first appearance)
+        label (callable): Maps a day key to its person-view column name
+        metrics (Metrics): Optional; times the build as "views.build"
+    
+    Returns:
+        tuple: (task_df indexed by day key, person_df indexed by person)
+    """
+    if metrics is not None:
+        with metrics.phase("views.build", profile=True):
+            return build_schedule_views(schedule, people, label)
+
+    task_df = pd.DataFrame.from_dict(schedule, orient="index")
+    task_df.index.name = "Day"
+
+    # Invert the schedule once: person -> column -> tasks
+    labels = [label(day) for day in schedule]
+    person_days = {person: {} for person in people or []}
+    for day_label, tasks in zip(labels, schedule.values()):
+        for task, person in tasks.items():
+            if person == HOLIDAY or person == UNASSIGNED:
+                continue
+            days = person_days.get(person)
+            if days is None:
+                if people is not None:
+                    continue
+                days = person_days[person] = {}
+            days.setdefault(day_label, []).append(task)
+
+    rows = [
+        ["; ".join(days[day_label]) if day_label in days else "😎" for day_label in labels]
+        for days in person_days.values()
+    ]
+    person_df = pd.DataFrame(rows, index=list(person_days), columns=labels)
+    person_df.index.name = "Person"
+
+    return task_df, person_df
+
+def format_schedule_for_export(schedule, format_type="task_view", people=None):
     """
     Format schedule data for export
     
     Args:
         schedule (dict): Generated schedule dictionary
         format_type (str): "task_view" or "person_view"
+        people (list): Person-view rows; pass scheduler.people for a custom
+            roster (defaults to Config.PEOPLE, so the built-in team keeps a
+            row per person even in weeks someone has no tasks)
     
     Returns:
         pd.DataFrame: Formatted DataFrame ready for export
     """
+    task_df, person_df = build_schedule_views(schedule, people or Config.PEOPLE)
     if format_type == "task_view":
-        # Task-by-day view
-        df = pd.DataFrame(schedule).T
-        df.index.name = "Day"
-        
-        # Add day names
-        day_mapping = {
-            "mon": "Monday",
-            "tue": "Tuesday", 
-            "wed": "Wednesday",
-            "thu": "Thursday",
-            "fri": "Friday"
-        }
-        df.index = [day_mapping.get(day, day) for day in df.index]
-        
+        # Task-by-day view with day names
+        df = task_df
+        df.index = [day_display_name(day) for day in df.index]
     else:  # person_view
-        # Person-by-day view
-        person_schedule = defaultdict(dict)
-        weekdays = ["mon", "tue", "wed", "thu", "fri"]
-        weekday_display = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-        people = ["Grace", "Bouj", "Zi", "Dapper", "Max", "Mark"]
-        
-        for day, tasks in schedule.items():
-            for task, person in tasks.items():
-                if person not in ["🏝️ Holiday", "❌ No one available"]:
-                    if person not in person_schedule:
-                        person_schedule[person] = {d: [] for d in weekday_display}
-                    day_display = weekday_display[weekdays.index(day)]
-                    person_schedule[person][day_display].append(task)
-        
-        # Convert to DataFrame
-        person_data = {}
-        for person in people:
-            person_data[person] = {}
-            for day_display in weekday_display:
-                day = weekdays[weekday_display.index(day_display)]
-                if day in schedule and any(schedule[day][task] == person for task in schedule[day].keys()):
-                    tasks = [task for task, assigned_person in schedule[day].items() if assigned_person == person]
-                    person_data[person][day_display] = "; ".join(tasks) if tasks else "😎"
-                else:
-                    person_data[person][day_display] = "😎"
-        
-        df = pd.DataFrame(person_data).T
-        df.index.name = "Person"
+        df = person_df
     
     return df
 
@@ -149,24 +302,17 @@ def check_schedule_conflicts(schedule):
     Returns:
         list: List of conflict descriptions
     """
+    matrix, days, tasks, people = schedule_to_matrix(schedule)
     conflicts = []
     
     # Check for unassigned tasks
-    for day, tasks in schedule.items():
-        for task, person in tasks.items():
-            if person == "❌ No one available":
-                conflicts.append(f"No one available for '{task}' on {day}")
+    for day_id, task_id in np.argwhere(matrix == UNASSIGNED_CODE):
+        conflicts.append(f"No one available for '{tasks[task_id]}' on {days[day_id]}")
     
     # Check for overloaded days
-    daily_loads = defaultdict(lambda: defaultdict(int))
-    for day, tasks in schedule.items():
-        for task, person in tasks.items():
-            if person not in ["🏝️ Holiday", "❌ No one available"]:
-                daily_loads[day][person] += 1
-    
-    for day, person_loads in daily_loads.items():
-        for person, load in person_loads.items():
-            if load > 3:  # More than 3 tasks per day might be too much
-                conflicts.append(f"{person} has {load} tasks on {day} - consider redistributing")
+    daily_loads = matrix_statistics(matrix, len(people))['daily_loads']
+    for day_id, person_id in np.argwhere(daily_loads > MAX_DAILY_TASKS):
+        load = daily_loads[day_id, person_id]
+        conflicts.append(f"{people[person_id]} has {load} tasks on {days[day_id]} - consider redistributing")
     
     return conflicts